@@ -6,6 +6,7 @@ Setup Flask Environment Variables
 
 import os
 import inspect
+import tempfile
 from datetime import timedelta
 from typing import Literal, Optional, Mapping, Callable, Any, overload
 
@@ -97,6 +98,13 @@ class ConfigBase:
   JWT_TOKEN_LOCATION: list[str] = ['headers', 'cookies', 'json']
   JWT_ACCESS_TOKEN_EXPIRES: int | timedelta = timedelta(minutes=15)
   JWT_REFRESH_TOKEN_EXPIRES: int | timedelta = timedelta(days=30)
+  # Seconds between each worker pulling tokens revoked by other workers, one query per sync.
+  # Tokens revoked on another worker are accepted for up to this long, 0 checks on every request
+  JWT_BLOCKLIST_SYNC_INTERVAL: int = 5
+  # Seconds between background purges of revoked tokens that have expired anyway, 0 to disable.
+  # One copy runs per deployment on Postgres, `flask --app run purge-blocklist` can run it from cron instead
+  JWT_BLOCKLIST_PURGE_INTERVAL: int = 3600
+  JWT_BLOCKLIST_PURGE_BATCH_SIZE: int = 1000
   PROPAGATE_EXCEPTIONS: bool = True
 
 
@@ -108,12 +116,67 @@ class ConfigBase:
   # Docs https://flask-sqlalchemy.palletsprojects.com/en/3.1.x/config/
   SQLALCHEMY_ECHO: Optional[bool] = False
   SQLALCHEMY_DATABASE_URI: SecretVar
+  # Threads per gunicorn worker, keep in sync with `--threads`
+  WEB_THREADS: int = int(os.getenv('WEB_THREADS', 4))
+  # Docs https://docs.sqlalchemy.org/en/20/core/pooling.html
+  # Every worker process has its own pool, one connection per thread plus overflow for
+  # background jobs, so the database sees at most `workers * (pool_size + max_overflow)`
+  SQLALCHEMY_ENGINE_OPTIONS: dict[str, Any] = {
+    'pool_size': WEB_THREADS,
+    'max_overflow': max(2, WEB_THREADS // 2),
+    # Seconds to wait for a free connection before erroring instead of hanging the request
+    'pool_timeout': 10,
+    # Replace connections the server or a proxy closed while idle
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+  }
+  # Apply pending migrations on boot instead of refusing to start, production runs `flask --app run upgrade`
+  DATABASE_UPGRADE_ON_BOOT: bool = False
+
+
+  # \\\\\\ Caching ////// #
+  # Seconds a user stays cached for JWT lookups, changes made by other workers show up after this
+  USER_CACHE_TTL: int = 30
+  USER_CACHE_SIZE: int = 1024
+  # Seconds a granted textbook download is remembered, refunds apply after this
+  TEXTBOOK_ACCESS_CACHE_TTL: int = 30
+  TEXTBOOK_ACCESS_CACHE_SIZE: int = 4096
+  # Seconds a rendered admin chart is kept, writes in the same worker invalidate it sooner
+  CHART_CACHE_TTL: int = 3600
+  STATS_CACHE_TTL: int = 60
+
+
+  # \\\\\\ Passwords ////// #
+  # sync | thread | process, process sidesteps the GIL at the cost of a pickling round trip.
+  # Requests still wait on their hash, the pool only caps concurrent bcrypt work
+  BCRYPT_EXECUTOR: str = 'thread'
+  BCRYPT_ROUNDS: int = 12
+  BCRYPT_WORKERS: int = 2
+  # Checks allowed to wait for a worker before logins get a 503
+  BCRYPT_QUEUE_SIZE: int = 16
 
 
   # \\\\\\ Cloudinary //// //
   CLOUDINARY_CLOUD_NAME: SecretVar
   CLOUDINARY_API_KEY: SecretVar
   CLOUDINARY_API_SECRET: SecretVar
+  # Seconds `cloudinary.api.resource` results are reused, uploads are never overwritten in place
+  CDN_METADATA_TTL: int = 300
+  CDN_METADATA_CACHE_SIZE: int = 1024
+  # Served files are kept on local disk, shared by the workers on a host.
+  # Each worker enforces the limit alone, so disk use can reach workers × CDN_CACHE_MAX_BYTES.
+  # Created with mode 0700 when first used, caching is disabled if it belongs to another user
+  CDN_CACHE_DIR: str = os.getenv('CDN_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'edutecx-cdn'))
+  CDN_CACHE_MAX_BYTES: int = 1 << 30
+  # Larger files are proxied from Cloudinary instead
+  CDN_CACHE_MAX_FILE_BYTES: int = 100 << 20
+  # proxy sends files through the app, redirect hands them to Cloudinary or the front proxy after auth
+  CDN_SERVE_MODE: Literal['proxy', 'redirect'] = os.getenv('CDN_SERVE_MODE', 'proxy')  # type: ignore
+  # Seconds a signed Cloudinary download URL stays valid in redirect mode
+  CDN_SIGNED_URL_TTL: int = 300
+  # Internal nginx location aliased to src/uploads, local files are sent with X-Accel-Redirect in redirect mode.
+  # Unset falls back to USE_X_SENDFILE
+  CDN_ACCEL_REDIRECT_PREFIX: Optional[str] = os.getenv('CDN_ACCEL_REDIRECT_PREFIX')
 
 
 
@@ -134,6 +197,7 @@ class DevelopmentConfig(ConfigBase):
   JWT_SECRET_KEY = 'jwt-secret'
 
   SQLALCHEMY_DATABASE_URI = 'sqlite:///testing.sqlite3'
+  DATABASE_UPGRADE_ON_BOOT = True
 
 
 
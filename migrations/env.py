@@ -0,0 +1,79 @@
+"""
+Alembic environment
+
+Migrations run against the database configured for the Flask app,
+autogenerate compares it with the models in `src/database/`
+"""
+
+from alembic import context
+from flask import current_app, has_app_context
+
+from src import db
+
+
+def include_name(name, type_, parent_names) -> bool:
+  """The search index is raw DDL kept in sync by `textbook_search`, not a model"""
+  from src.database import textbook_search
+
+  return not (name or '').startswith(textbook_search.tablename)
+
+
+def run_migrations(connection) -> None:
+  context.configure(
+    connection=connection,
+    target_metadata=db.metadata,
+    include_name=include_name,
+    render_as_batch=True,
+    compare_type=True,
+  )
+
+  with context.begin_transaction():
+    context.run_migrations()
+
+
+def run_migrations_offline() -> None:
+  context.configure(
+    url=db.engine.url.render_as_string(hide_password=False),
+    target_metadata=db.metadata,
+    include_name=include_name,
+    render_as_batch=True,
+    literal_binds=True,
+    dialect_opts={'paramstyle': 'named'},
+  )
+
+  with context.begin_transaction():
+    context.run_migrations()
+
+
+def run_migrations_online() -> None:
+  connection = context.config.attributes.get('connection')
+  if connection is not None:
+    run_migrations(connection)
+    return
+
+  with db.engine.connect() as connection:
+    run_migrations(connection)
+
+
+def main() -> None:
+  run = run_migrations_offline if context.is_offline_mode() else run_migrations_online
+
+  # The `flask` CLI already has an app, `alembic` only needs the database
+  if has_app_context():
+    run()
+    return
+
+  from flask import Flask
+  from config import get_environment_config
+
+  app = Flask('src')
+  app.config.from_mapping(get_environment_config())
+  db.init_app(app)
+
+  with app.app_context():
+    from src import database  # noqa: F401
+
+    run()
+
+
+main()
@@ -0,0 +1,237 @@
+"""
+Baseline schema
+
+The schema `db.create_all()` built before migrations were added,
+databases from then are stamped here instead of being created
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 08:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  op.create_table('jwtblocklist_table',
+  sa.Column('jti', sa.String(), nullable=False),
+  sa.Column('token_type', sa.Enum('access', 'refresh', name='JWTType'), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.PrimaryKeyConstraint('jti', name=op.f('pk_jwtblocklist_table')),
+  sa.UniqueConstraint('jti', name=op.f('uq_jwtblocklist_table_jti'))
+  )
+  op.create_table('user_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('email', sa.String(), nullable=False),
+  sa.Column('username', sa.String(), nullable=False),
+  sa.Column('status', sa.Enum('Active', 'Locked', name='UserStatus'), nullable=False),
+  sa.Column('privilege', sa.Enum('Student', 'Educator', 'Admin', name='PrivilegeType'), nullable=False),
+  sa.Column('membership', sa.Enum('Free', 'Unlimited', name='MembershipType'), nullable=False),
+  sa.Column('password_hash', sa.String(), nullable=False),
+  sa.Column('email_verified', sa.Boolean(), nullable=False),
+  sa.Column('subscription_id', sa.String(), nullable=True),
+  sa.Column('subscription_status', sa.Enum('Active', 'Inactive', 'Cancelled', name='SubscriptionStatus'), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.Column('last_login', sa.DateTime(), nullable=False),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_user_table')),
+  sa.UniqueConstraint('email', name=op.f('uq_user_table_email')),
+  sa.UniqueConstraint('id', name=op.f('uq_user_table_id')),
+  sa.UniqueConstraint('username', name=op.f('uq_user_table_username'))
+  )
+  op.create_table('classroom_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('owner_id', sa.String(), nullable=False),
+  sa.Column('title', sa.String(), nullable=False),
+  sa.Column('description', sa.String(), nullable=True),
+  sa.Column('invite_id', sa.String(), nullable=False),
+  sa.Column('invite_enabled', sa.Boolean(), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.Column('updated_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['owner_id'], ['user_table.id'], name=op.f('fk_classroom_table_owner_id_user_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_classroom_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_classroom_table_id')),
+  sa.UniqueConstraint('invite_id', name=op.f('uq_classroom_table_invite_id'))
+  )
+  op.create_table('textbook_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('author_id', sa.String(), nullable=False),
+  sa.Column('title', sa.String(), nullable=False),
+  sa.Column('description', sa.String(), nullable=True),
+  sa.Column('categories', sa.String(), nullable=False),
+  sa.Column('price', sa.Float(), nullable=False),
+  sa.Column('uri', sa.String(), nullable=True),
+  sa.Column('iuri', sa.String(), nullable=True),
+  sa.Column('status', sa.Enum('Available', 'Unavailable', 'DMCA', name='TextbookStatus'), nullable=False),
+  sa.Column('upload_status', sa.Enum('Uploading', 'Uploaded', name='TextbookUploadStatus'), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.Column('updated_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['author_id'], ['user_table.id'], name=op.f('fk_textbook_table_author_id_user_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_textbook_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_textbook_table_id'))
+  )
+  op.create_table('token_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('token', sa.String(), nullable=False),
+  sa.Column('token_type', sa.Enum('Verification', 'PasswordReset', name='TokenType'), nullable=False),
+  sa.Column('expires_at', sa.DateTime(), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['id'], ['user_table.id'], name=op.f('fk_token_table_id_user_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_token_table')),
+  sa.UniqueConstraint('token', name=op.f('uq_token_table_token'))
+  )
+  op.create_table('assignment_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('classroom_id', sa.String(), nullable=False),
+  sa.Column('title', sa.String(), nullable=False),
+  sa.Column('description', sa.String(), nullable=False),
+  sa.Column('due_date', sa.DateTime(), nullable=True),
+  sa.Column('requirement', sa.String(), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.Column('updated_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['classroom_id'], ['classroom_table.id'], name=op.f('fk_assignment_table_classroom_id_classroom_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_assignment_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_assignment_table_id'))
+  )
+  op.create_table('classroom_textbook_association',
+  sa.Column('classroom_id', sa.String(), nullable=True),
+  sa.Column('textbook_id', sa.String(), nullable=True),
+  sa.ForeignKeyConstraint(['classroom_id'], ['classroom_table.id'], name=op.f('fk_classroom_textbook_association_classroom_id_classroom_table')),
+  sa.ForeignKeyConstraint(['textbook_id'], ['textbook_table.id'], name=op.f('fk_classroom_textbook_association_textbook_id_textbook_table'))
+  )
+  op.create_table('classroom_user_association',
+  sa.Column('user_id', sa.String(), nullable=False),
+  sa.Column('classroom_id', sa.String(), nullable=False),
+  sa.Column('role', sa.Enum('Owner', 'Educator', 'Student', name='classroomMmemberRole'), nullable=False),
+  sa.ForeignKeyConstraint(['classroom_id'], ['classroom_table.id'], name=op.f('fk_classroom_user_association_classroom_id_classroom_table')),
+  sa.ForeignKeyConstraint(['user_id'], ['user_table.id'], name=op.f('fk_classroom_user_association_user_id_user_table')),
+  sa.PrimaryKeyConstraint('user_id', 'classroom_id', name=op.f('pk_classroom_user_association'))
+  )
+  op.create_table('discount_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('textbook_id', sa.String(), nullable=False),
+  sa.Column('code', sa.String(), nullable=False),
+  sa.Column('used', sa.Float(), nullable=False),
+  sa.Column('limit', sa.Integer(), nullable=True),
+  sa.Column('multiplier', sa.Float(), nullable=False),
+  sa.Column('expires_at', sa.DateTime(), nullable=True),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['textbook_id'], ['textbook_table.id'], name=op.f('fk_discount_table_textbook_id_textbook_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_discount_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_discount_table_id'))
+  )
+  op.create_table('image_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('user_id', sa.String(), nullable=True),
+  sa.Column('textbook_id', sa.String(), nullable=True),
+  sa.Column('classroom_id', sa.String(), nullable=True),
+  sa.Column('uri', sa.String(), nullable=True),
+  sa.Column('iuri', sa.String(), nullable=True),
+  sa.Column('status', sa.Enum('Uploading', 'Uploaded', name='ImageUploadStatus'), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['classroom_id'], ['classroom_table.id'], name=op.f('fk_image_table_classroom_id_classroom_table')),
+  sa.ForeignKeyConstraint(['textbook_id'], ['textbook_table.id'], name=op.f('fk_image_table_textbook_id_textbook_table')),
+  sa.ForeignKeyConstraint(['user_id'], ['user_table.id'], name=op.f('fk_image_table_user_id_user_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_image_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_image_table_id'))
+  )
+  op.create_table('user_textbook_association',
+  sa.Column('user_id', sa.String(), nullable=True),
+  sa.Column('textbook_id', sa.String(), nullable=True),
+  sa.ForeignKeyConstraint(['textbook_id'], ['textbook_table.id'], name=op.f('fk_user_textbook_association_textbook_id_textbook_table')),
+  sa.ForeignKeyConstraint(['user_id'], ['user_table.id'], name=op.f('fk_user_textbook_association_user_id_user_table'))
+  )
+  op.create_table('assignment_textbook_association',
+  sa.Column('assignment_id', sa.String(), nullable=True),
+  sa.Column('textbook_id', sa.String(), nullable=True),
+  sa.ForeignKeyConstraint(['assignment_id'], ['assignment_table.id'], name=op.f('fk_assignment_textbook_association_assignment_id_assignment_table')),
+  sa.ForeignKeyConstraint(['textbook_id'], ['textbook_table.id'], name=op.f('fk_assignment_textbook_association_textbook_id_textbook_table'))
+  )
+  op.create_table('sale_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('user_id', sa.String(), nullable=False),
+  sa.Column('discount_id', sa.String(), nullable=True),
+  sa.Column('session_id', sa.String(), nullable=True),
+  sa.Column('subscription_id', sa.String(), nullable=True),
+  sa.Column('type', sa.Enum('OneTime', 'Subscription', name='SaleType'), nullable=False),
+  sa.Column('paid', sa.Boolean(), nullable=False),
+  sa.Column('total_cost', sa.Float(), nullable=False),
+  sa.Column('paid_at', sa.DateTime(), nullable=True),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['discount_id'], ['discount_table.id'], name=op.f('fk_sale_table_discount_id_discount_table')),
+  sa.ForeignKeyConstraint(['user_id'], ['user_table.id'], name=op.f('fk_sale_table_user_id_user_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_sale_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_sale_table_id'))
+  )
+  op.create_table('submission_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('student_id', sa.String(), nullable=False),
+  sa.Column('assignment_id', sa.String(), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.Column('updated_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['assignment_id'], ['assignment_table.id'], name=op.f('fk_submission_table_assignment_id_assignment_table')),
+  sa.ForeignKeyConstraint(['student_id'], ['user_table.id'], name=op.f('fk_submission_table_student_id_user_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_submission_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_submission_table_id'))
+  )
+  op.create_table('comment_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('submission_id', sa.String(), nullable=False),
+  sa.Column('author_id', sa.String(), nullable=False),
+  sa.Column('text', sa.String(), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.Column('updated_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['author_id'], ['user_table.id'], name=op.f('fk_comment_table_author_id_user_table')),
+  sa.ForeignKeyConstraint(['submission_id'], ['submission_table.id'], name=op.f('fk_comment_table_submission_id_submission_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_comment_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_comment_table_id'))
+  )
+  op.create_table('sale_textbook_association',
+  sa.Column('sale_id', sa.String(), nullable=False),
+  sa.Column('textbook_id', sa.String(), nullable=False),
+  sa.Column('cost', sa.Float(), nullable=False),
+  sa.ForeignKeyConstraint(['sale_id'], ['sale_table.id'], name=op.f('fk_sale_textbook_association_sale_id_sale_table')),
+  sa.ForeignKeyConstraint(['textbook_id'], ['textbook_table.id'], name=op.f('fk_sale_textbook_association_textbook_id_textbook_table')),
+  sa.PrimaryKeyConstraint('sale_id', 'textbook_id', name=op.f('pk_sale_textbook_association'))
+  )
+  op.create_table('submission_snippet_table',
+  sa.Column('id', sa.String(), nullable=False),
+  sa.Column('student_id', sa.String(), nullable=False),
+  sa.Column('submission_id', sa.String(), nullable=False),
+  sa.Column('uri', sa.String(), nullable=True),
+  sa.Column('iuri', sa.String(), nullable=True),
+  sa.Column('status', sa.Enum('Uploading', 'Uploaded', name='SnippetUploadStatus'), nullable=False),
+  sa.Column('created_at', sa.DateTime(), nullable=False),
+  sa.ForeignKeyConstraint(['student_id'], ['user_table.id'], name=op.f('fk_submission_snippet_table_student_id_user_table')),
+  sa.ForeignKeyConstraint(['submission_id'], ['submission_table.id'], name=op.f('fk_submission_snippet_table_submission_id_submission_table')),
+  sa.PrimaryKeyConstraint('id', name=op.f('pk_submission_snippet_table')),
+  sa.UniqueConstraint('id', name=op.f('uq_submission_snippet_table_id'))
+  )
+
+
+def downgrade() -> None:
+  op.drop_table('submission_snippet_table')
+  op.drop_table('sale_textbook_association')
+  op.drop_table('comment_table')
+  op.drop_table('submission_table')
+  op.drop_table('sale_table')
+  op.drop_table('assignment_textbook_association')
+  op.drop_table('user_textbook_association')
+  op.drop_table('image_table')
+  op.drop_table('discount_table')
+  op.drop_table('classroom_user_association')
+  op.drop_table('classroom_textbook_association')
+  op.drop_table('assignment_table')
+  op.drop_table('token_table')
+  op.drop_table('textbook_table')
+  op.drop_table('classroom_table')
+  op.drop_table('user_table')
+  op.drop_table('jwtblocklist_table')
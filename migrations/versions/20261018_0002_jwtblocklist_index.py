@@ -0,0 +1,25 @@
+"""
+Revoked token expiry index
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 08:05:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  op.create_index('ix_jwtblocklist_table_token_type_created_at', 'jwtblocklist_table', ['token_type', 'created_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+  op.drop_index('ix_jwtblocklist_table_token_type_created_at', table_name='jwtblocklist_table', if_exists=True)
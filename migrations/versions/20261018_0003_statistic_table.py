@@ -0,0 +1,70 @@
+"""
+Daily statistics rollup
+
+Filled from the user, textbook and paid sale tables, so existing databases
+do not start with empty charts. Afterwards mapper events keep it up to date
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 08:10:00
+"""
+
+from datetime import date
+from typing import Any, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+statistics = sa.table('statistic_table', sa.column('day', sa.Date()), sa.column('metric', sa.String()), sa.column('value', sa.Float()))
+users = sa.table('user_table', sa.column('created_at', sa.DateTime()))
+textbooks = sa.table('textbook_table', sa.column('created_at', sa.DateTime()))
+sales = sa.table('sale_table', sa.column('created_at', sa.DateTime()), sa.column('paid', sa.Boolean()), sa.column('total_cost', sa.Float()))
+
+
+def upgrade() -> None:
+  connection = op.get_bind()
+
+  if not sa.inspect(connection).has_table('statistic_table'):
+    op.create_table('statistic_table',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('metric', sa.Enum('users', 'textbooks', 'revenue', name='StatisticMetric'), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'metric', name=op.f('pk_statistic_table'))
+    )
+
+  # Recomputed even if the table already existed, it only counted writes since then
+  sources = (
+    ('users', users, sa.func.count(), None),
+    ('textbooks', textbooks, sa.func.count(), None),
+    ('revenue', sales, sa.func.sum(sales.c.total_cost), sales.c.paid.is_(sa.true())),
+  )
+
+  rows: list[dict[str, Any]] = []
+  for metric, source, value, where in sources:
+    day = sa.func.date(source.c.created_at)
+    stmt = sa.select(day, value).group_by(day)
+    if where is not None:
+      stmt = stmt.where(where)
+
+    for d, v in connection.execute(stmt):
+      rows.append({
+        'day': d if isinstance(d, date) else date.fromisoformat(str(d)),
+        'metric': metric,
+        'value': float(v or 0),
+      })
+
+  connection.execute(statistics.delete())
+  if rows:
+    op.bulk_insert(statistics, rows)
+
+
+def downgrade() -> None:
+  op.drop_table('statistic_table')
+  sa.Enum(name='StatisticMetric').drop(op.get_bind(), checkfirst=True)
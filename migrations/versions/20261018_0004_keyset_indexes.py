@@ -0,0 +1,27 @@
+"""
+Classroom and submission list indexes
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 08:15:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  op.create_index('ix_classroom_table_owner_id_created_at', 'classroom_table', ['owner_id', 'created_at', 'id'], unique=False, if_not_exists=True)
+  op.create_index('ix_submission_table_student_id_created_at', 'submission_table', ['student_id', 'created_at', 'id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+  op.drop_index('ix_submission_table_student_id_created_at', table_name='submission_table', if_exists=True)
+  op.drop_index('ix_classroom_table_owner_id_created_at', table_name='classroom_table', if_exists=True)
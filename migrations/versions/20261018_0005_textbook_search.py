@@ -0,0 +1,63 @@
+"""
+Textbook search index
+
+Postgres stores a weighted tsvector behind a GIN index and SQLite uses an FTS5 table,
+other dialects have no index. The index is filled when created, afterwards
+`src.database.search` keeps it up to date
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 08:20:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+schema = {
+  'postgresql': (
+    'CREATE TABLE textbook_search_table (textbook_id VARCHAR PRIMARY KEY, document TSVECTOR NOT NULL)',
+    'CREATE INDEX ix_textbook_search_table_document ON textbook_search_table USING GIN (document)',
+    """
+    INSERT INTO textbook_search_table (textbook_id, document)
+    SELECT t.id,
+      setweight(to_tsvector('english'::regconfig, coalesce(t.title, '')), 'A') ||
+      setweight(to_tsvector('english'::regconfig, coalesce(u.username, '')), 'B') ||
+      setweight(to_tsvector('english'::regconfig, replace(coalesce(t.categories, ''), '|', ' ')), 'B') ||
+      setweight(to_tsvector('english'::regconfig, coalesce(t.description, '')), 'C')
+    FROM textbook_table t JOIN user_table u ON t.author_id = u.id
+    """,
+  ),
+  'sqlite': (
+    'CREATE VIRTUAL TABLE textbook_search_table USING fts5('
+    "textbook_id UNINDEXED, title, description, categories, author, tokenize = 'unicode61 remove_diacritics 2')",
+    """
+    INSERT INTO textbook_search_table (textbook_id, title, description, categories, author)
+    SELECT t.id, t.title, t.description, replace(t.categories, '|', ' '), u.username
+    FROM textbook_table t JOIN user_table u ON t.author_id = u.id
+    """,
+  ),
+}
+
+
+def upgrade() -> None:
+  connection = op.get_bind()
+  statements = schema.get(connection.dialect.name, ())
+  if not statements or sa.inspect(connection).has_table('textbook_search_table'):
+    return
+
+  for statement in statements:
+    op.execute(statement)
+
+
+def downgrade() -> None:
+  if op.get_bind().dialect.name in schema:
+    op.execute('DROP TABLE IF EXISTS textbook_search_table')
@@ -0,0 +1,115 @@
+"""
+Textbook categories
+
+Pipe-joined categories on existing textbooks are moved onto the category table,
+leaving `textbook_table.categories` empty. Downgrading writes them back
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 08:25:00
+"""
+
+import uuid
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+batch_size = 500
+
+textbooks = sa.table('textbook_table', sa.column('id', sa.String()), sa.column('categories', sa.String()))
+categories = sa.table('category_table', sa.column('id', sa.String()), sa.column('name', sa.String()), sa.column('created_at', sa.DateTime()))
+links = sa.table('textbook_category_association', sa.column('textbook_id', sa.String()), sa.column('category_id', sa.String()))
+
+
+def upgrade() -> None:
+  inspector = sa.inspect(op.get_bind())
+
+  if not inspector.has_table('category_table'):
+    op.create_table('category_table',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id', name=op.f('pk_category_table')),
+    sa.UniqueConstraint('id', name=op.f('uq_category_table_id')),
+    sa.UniqueConstraint('name', name=op.f('uq_category_table_name'))
+    )
+
+  if not inspector.has_table('textbook_category_association'):
+    op.create_table('textbook_category_association',
+    sa.Column('textbook_id', sa.String(), nullable=False),
+    sa.Column('category_id', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['category_id'], ['category_table.id'], name=op.f('fk_textbook_category_association_category_id_category_table')),
+    sa.ForeignKeyConstraint(['textbook_id'], ['textbook_table.id'], name=op.f('fk_textbook_category_association_textbook_id_textbook_table')),
+    sa.PrimaryKeyConstraint('textbook_id', 'category_id', name=op.f('pk_textbook_category_association'))
+    )
+
+  op.create_index('ix_textbook_category_association_category_id', 'textbook_category_association', ['category_id', 'textbook_id'], unique=False, if_not_exists=True)
+
+  _backfill(op.get_bind())
+
+
+def _backfill(connection: sa.Connection) -> None:
+  """Link textbooks to their pipe-joined categories, creating missing ones"""
+  from src.database.category import CategoryModel
+
+  found: dict[str, str] = {}
+  for name, categoryId in connection.execute(sa.select(categories.c.name, categories.c.id).order_by(categories.c.created_at)):
+    for cleaned in CategoryModel.clean([name]):
+      found.setdefault(cleaned, categoryId)
+
+  while True:
+    batch = connection.execute(
+      sa.select(textbooks.c.id, textbooks.c.categories).where(textbooks.c.categories != '').limit(batch_size)
+    ).all()
+    if not batch:
+      return
+
+    ids = [textbookId for textbookId, _ in batch]
+    linked = set(connection.execute(sa.select(links.c.textbook_id, links.c.category_id).where(links.c.textbook_id.in_(ids))).all())
+
+    new, pairs = [], []
+    for textbookId, legacy in batch:
+      for name in CategoryModel.clean(legacy.split('|')):
+        if name not in found:
+          found[name] = uuid.uuid4().hex
+          new.append({'id': found[name], 'name': name, 'created_at': datetime.utcnow()})
+        if (textbookId, found[name]) not in linked:
+          pairs.append({'textbook_id': textbookId, 'category_id': found[name]})
+
+    if new:
+      op.bulk_insert(categories, new)
+    if pairs:
+      op.bulk_insert(links, pairs)
+    connection.execute(textbooks.update().where(textbooks.c.id.in_(ids)).values(categories=''))
+
+
+def downgrade() -> None:
+  _restore(op.get_bind())
+
+  op.drop_index('ix_textbook_category_association_category_id', table_name='textbook_category_association', if_exists=True)
+  op.drop_table('textbook_category_association')
+  op.drop_table('category_table')
+
+
+def _restore(connection: sa.Connection) -> None:
+  """Write each textbook's categories back as a pipe-joined string"""
+  joined: dict[str, list[str]] = {}
+  rows = connection.execute(
+    sa.select(links.c.textbook_id, categories.c.name)
+    .join(categories, categories.c.id == links.c.category_id)
+    .order_by(links.c.textbook_id, categories.c.name)
+  )
+  for textbookId, name in rows:
+    joined.setdefault(textbookId, []).append(name)
+
+  for textbookId, names in joined.items():
+    connection.execute(textbooks.update().where(textbooks.c.id == textbookId).values(categories='|'.join(names)))
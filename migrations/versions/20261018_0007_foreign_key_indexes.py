@@ -0,0 +1,82 @@
+"""
+Foreign key and created_at indexes
+
+Databases created after the indexes were declared already have them,
+so each is created only if missing
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 08:30:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  op.create_index(op.f('ix_assignment_table_classroom_id'), 'assignment_table', ['classroom_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_assignment_table_created_at'), 'assignment_table', ['created_at'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_assignment_textbook_association_assignment_id'), 'assignment_textbook_association', ['assignment_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_assignment_textbook_association_textbook_id'), 'assignment_textbook_association', ['textbook_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_classroom_table_created_at'), 'classroom_table', ['created_at'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_classroom_textbook_association_classroom_id'), 'classroom_textbook_association', ['classroom_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_classroom_textbook_association_textbook_id'), 'classroom_textbook_association', ['textbook_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_classroom_user_association_classroom_id'), 'classroom_user_association', ['classroom_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_comment_table_author_id'), 'comment_table', ['author_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_comment_table_submission_id'), 'comment_table', ['submission_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_discount_table_textbook_id'), 'discount_table', ['textbook_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_image_table_classroom_id'), 'image_table', ['classroom_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_image_table_textbook_id'), 'image_table', ['textbook_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_image_table_user_id'), 'image_table', ['user_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_sale_table_created_at'), 'sale_table', ['created_at'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_sale_table_discount_id'), 'sale_table', ['discount_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_sale_table_session_id'), 'sale_table', ['session_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_sale_table_subscription_id'), 'sale_table', ['subscription_id'], unique=False, if_not_exists=True)
+  op.create_index('ix_sale_table_user_id_paid', 'sale_table', ['user_id', 'paid'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_sale_textbook_association_textbook_id'), 'sale_textbook_association', ['textbook_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_submission_snippet_table_student_id'), 'submission_snippet_table', ['student_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_submission_snippet_table_submission_id'), 'submission_snippet_table', ['submission_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_submission_table_assignment_id'), 'submission_table', ['assignment_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_textbook_table_author_id'), 'textbook_table', ['author_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_textbook_table_created_at'), 'textbook_table', ['created_at'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_user_table_created_at'), 'user_table', ['created_at'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_user_textbook_association_textbook_id'), 'user_textbook_association', ['textbook_id'], unique=False, if_not_exists=True)
+  op.create_index(op.f('ix_user_textbook_association_user_id'), 'user_textbook_association', ['user_id'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+  op.drop_index(op.f('ix_user_textbook_association_user_id'), table_name='user_textbook_association', if_exists=True)
+  op.drop_index(op.f('ix_user_textbook_association_textbook_id'), table_name='user_textbook_association', if_exists=True)
+  op.drop_index(op.f('ix_user_table_created_at'), table_name='user_table', if_exists=True)
+  op.drop_index(op.f('ix_textbook_table_created_at'), table_name='textbook_table', if_exists=True)
+  op.drop_index(op.f('ix_textbook_table_author_id'), table_name='textbook_table', if_exists=True)
+  op.drop_index(op.f('ix_submission_table_assignment_id'), table_name='submission_table', if_exists=True)
+  op.drop_index(op.f('ix_submission_snippet_table_submission_id'), table_name='submission_snippet_table', if_exists=True)
+  op.drop_index(op.f('ix_submission_snippet_table_student_id'), table_name='submission_snippet_table', if_exists=True)
+  op.drop_index(op.f('ix_sale_textbook_association_textbook_id'), table_name='sale_textbook_association', if_exists=True)
+  op.drop_index('ix_sale_table_user_id_paid', table_name='sale_table', if_exists=True)
+  op.drop_index(op.f('ix_sale_table_subscription_id'), table_name='sale_table', if_exists=True)
+  op.drop_index(op.f('ix_sale_table_session_id'), table_name='sale_table', if_exists=True)
+  op.drop_index(op.f('ix_sale_table_discount_id'), table_name='sale_table', if_exists=True)
+  op.drop_index(op.f('ix_sale_table_created_at'), table_name='sale_table', if_exists=True)
+  op.drop_index(op.f('ix_image_table_user_id'), table_name='image_table', if_exists=True)
+  op.drop_index(op.f('ix_image_table_textbook_id'), table_name='image_table', if_exists=True)
+  op.drop_index(op.f('ix_image_table_classroom_id'), table_name='image_table', if_exists=True)
+  op.drop_index(op.f('ix_discount_table_textbook_id'), table_name='discount_table', if_exists=True)
+  op.drop_index(op.f('ix_comment_table_submission_id'), table_name='comment_table', if_exists=True)
+  op.drop_index(op.f('ix_comment_table_author_id'), table_name='comment_table', if_exists=True)
+  op.drop_index(op.f('ix_classroom_user_association_classroom_id'), table_name='classroom_user_association', if_exists=True)
+  op.drop_index(op.f('ix_classroom_textbook_association_textbook_id'), table_name='classroom_textbook_association', if_exists=True)
+  op.drop_index(op.f('ix_classroom_textbook_association_classroom_id'), table_name='classroom_textbook_association', if_exists=True)
+  op.drop_index(op.f('ix_classroom_table_created_at'), table_name='classroom_table', if_exists=True)
+  op.drop_index(op.f('ix_assignment_textbook_association_textbook_id'), table_name='assignment_textbook_association', if_exists=True)
+  op.drop_index(op.f('ix_assignment_textbook_association_assignment_id'), table_name='assignment_textbook_association', if_exists=True)
+  op.drop_index(op.f('ix_assignment_table_created_at'), table_name='assignment_table', if_exists=True)
+  op.drop_index(op.f('ix_assignment_table_classroom_id'), table_name='assignment_table', if_exists=True)
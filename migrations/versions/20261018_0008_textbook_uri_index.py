@@ -0,0 +1,25 @@
+"""
+Textbook uri index for download access checks
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 14:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  op.create_index(op.f('ix_textbook_table_uri'), 'textbook_table', ['uri'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+  op.drop_index(op.f('ix_textbook_table_uri'), table_name='textbook_table', if_exists=True)
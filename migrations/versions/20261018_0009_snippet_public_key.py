@@ -0,0 +1,50 @@
+"""
+Submission snippet public key
+
+Snippets were looked up with `iuri LIKE '%key%'`, the key is now stored
+and indexed. Existing rows are filled from the end of their iuri, and their
+uri is pointed at the submission route instead of the textbook one
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 16:00:00
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+  connection = op.get_bind()
+  columns = {i['name'] for i in sa.inspect(connection).get_columns('submission_snippet_table')}
+  if 'public_key' not in columns:
+    op.add_column('submission_snippet_table', sa.Column('public_key', sa.String(), nullable=True))
+
+  snippets = sa.table(
+    'submission_snippet_table', sa.column('id'), sa.column('uri'), sa.column('iuri'), sa.column('public_key')
+  )
+  rows = connection.execute(sa.select(snippets.c.id, snippets.c.iuri).where(snippets.c.iuri.isnot(None))).all()
+  for snippetId, iuri in rows:
+    key = iuri.split('/')[-1]
+    connection.execute(
+      snippets.update().where(snippets.c.id == snippetId).values(public_key=key, uri=f'/public/submission/{key}')
+    )
+
+  op.create_index(
+    op.f('ix_submission_snippet_table_public_key'), 'submission_snippet_table', ['public_key'],
+    unique=True, if_not_exists=True
+  )
+
+
+def downgrade() -> None:
+  op.drop_index(op.f('ix_submission_snippet_table_public_key'), table_name='submission_snippet_table', if_exists=True)
+  with op.batch_alter_table('submission_snippet_table') as batch_op:
+    batch_op.drop_column('public_key')
@@ -7,6 +7,7 @@ from flask_limiter import Limiter, util
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 
+import os
 import resend
 import stripe
 import thread
@@ -90,6 +91,11 @@ def init_app(testing: bool = False) -> Flask:
   # Init DB
   db.init_app(app=app)
 
+  # Connections opened while booting must not be shared with workers forked by `--preload`
+  with app.app_context():
+    engine = db.engine
+  os.register_at_fork(after_in_child=lambda: engine.dispose(close=False))
+
   # Init Limiting
   limiter.init_app(app=app)
 
@@ -99,6 +105,16 @@ def init_app(testing: bool = False) -> Flask:
   # Init JWT
   jwt.init_app(app=app)
 
+  # Init password hashing
+  from .utils import passwords
+
+  passwords.configure(
+    mode=app.config.get('BCRYPT_EXECUTOR', 'sync'),
+    rounds=app.config.get('BCRYPT_ROUNDS', 12),
+    workers=app.config.get('BCRYPT_WORKERS', 2),
+    queue_size=app.config.get('BCRYPT_QUEUE_SIZE', 16),
+  )
+
   # Init Stripe
   stripe.api_key = app.config.get('STRIPE_SECRET_KEY')
 
@@ -114,10 +130,53 @@ def init_app(testing: bool = False) -> Flask:
     # Import Database models
     from . import database
 
+    database.identity_cache.configure(
+      ttl=app.config.get('USER_CACHE_TTL'),
+      maxsize=app.config.get('USER_CACHE_SIZE'),
+    )
+    database.textbook_access_cache.configure(
+      ttl=app.config.get('TEXTBOOK_ACCESS_CACHE_TTL'),
+      maxsize=app.config.get('TEXTBOOK_ACCESS_CACHE_SIZE'),
+    )
+    database.blocklist_index.sync_interval = app.config.get(
+      'JWT_BLOCKLIST_SYNC_INTERVAL', database.blocklist_index.sync_interval
+    )
+
+    from .service import cdn_provider
+
+    cdn_provider.resourceCache.configure(
+      ttl=app.config.get('CDN_METADATA_TTL'),
+      maxsize=app.config.get('CDN_METADATA_CACHE_SIZE'),
+    )
+    cdn_provider.fileCache.configure(
+      directory=app.config.get('CDN_CACHE_DIR'),
+      max_bytes=app.config.get('CDN_CACHE_MAX_BYTES'),
+      max_file_bytes=app.config.get('CDN_CACHE_MAX_FILE_BYTES'),
+    )
+
     # Import routes
     from . import api
     from . import routes
 
-    db.create_all()
+    # Schema is owned by migrations, see `flask --app run upgrade`
+    from .service import migrations
+
+    migrations.check_schema(
+      upgrade_on_boot=testing or app.config.get('DATABASE_UPGRADE_ON_BOOT', False)
+    )
+
+    # Import CLI commands
+    from . import commands
+
+    # Background jobs
+    if not testing:
+      from .service import scheduler
+
+      scheduler.schedule(
+        app,
+        'blocklist-purge',
+        app.config.get('JWT_BLOCKLIST_PURGE_INTERVAL', 0),
+        commands.purge_blocklist,
+      )
 
     return app
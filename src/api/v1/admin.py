@@ -2,44 +2,79 @@
 Admin-Only Endpoints
 """
 
+import csv
+import zlib
 import numpy
+import hashlib
 import logging
-from io import StringIO
-from sqlalchemy import and_
-from functools import cache, lru_cache
+import matplotlib
+from io import BytesIO, StringIO
+from sqlalchemy import event, select
 from datetime import datetime
-import matplotlib.pyplot as plt
-from thread import ConcurrentProcessing
-from flask_sqlalchemy.query import Query
-from typing import Callable, Tuple, TypeVar
+from matplotlib.figure import Figure
+from typing import Any, Iterable, Iterator, Literal, Tuple, TypeVar
 from flask import (
   request,
   Response,
   current_app as app,
-  stream_template_string,
+  stream_with_context,
 )
 
+from src import db
 from src.database import UserModel, SaleModel, TextbookModel
 from src.utils.http import HTTPStatusCode
-from src.service import auth_provider
+from src.service import auth_provider, stats_provider
 from src.utils.ext import utc_time
+from src.utils.ext.cache import TTLCache, cached
 from src.utils.api import AdminGraphGetRequest, AdminStatsGetReply, _AdminStatsGetData, GenericReply
 
 
 # Mute matplotlib INFO stdout
 logging.getLogger('matplotlib').setLevel(logging.WARNING)
 
+# Fixed seed for the SVG element ids, so the same data renders to the same bytes and ETag in every worker
+matplotlib.rcParams['svg.hashsalt'] = 'edutecx-charts'
+
 # Config
 basePath: str = '/api/v1/admin'
 
 _TModel = TypeVar('_TModel', UserModel, SaleModel, TextbookModel)
-_TYValue = TypeVar('_TYValue')
-_YFunc = Callable[[_TModel], _TYValue]
 LabelX = int
 LabelY = int
 
 DateRange = Tuple[datetime, datetime] | datetime | None
 
+GraphFor = Literal['User', 'Textbook', 'Revenue']
+ExportFor = Literal['User', 'Textbook', 'Revenue']
+
+# CSV header to column attribute
+exportColumns: dict[str, Tuple[Any, dict[str, str]]] = {
+  'Revenue': (SaleModel, {
+    'id': 'id', 'type': 'type', 'created_at': 'created_at',
+    'total_cost': 'total_cost', 'paid': 'paid', 'paid_at': 'paid_at',
+  }),
+  'User': (UserModel, {
+    'id': 'id', 'username': 'username', 'email': 'email',
+    'status': 'status', 'created_at': 'created_at', 'privilege': 'privilege',
+  }),
+  'Textbook': (TextbookModel, {
+    'id': 'id', 'title': 'title', 'author': 'author_id',
+    'price': 'price', 'status': 'status', 'created_at': 'created_at',
+  }),
+}
+Bucket = Literal['month']
+ChartKey = Tuple[GraphFor, str, str, Bucket]
+
+# Rendered SVG and its ETag, writes in other workers show up after CHART_CACHE_TTL
+chartCache: TTLCache[ChartKey, Tuple[bytes, str]] = TTLCache(
+  ttl=app.config.get('CHART_CACHE_TTL', 3600), maxsize=64
+)
+
+# Stats reply, a single entry
+statsCache: TTLCache[Any, Tuple[dict[str, Any], int]] = TTLCache(
+  ttl=app.config.get('STATS_CACHE_TTL', 60), maxsize=1
+)
+
 
 # Helper Functions
 def getDateRange(dateRange: DateRange = None) -> Tuple[datetime, datetime]:
@@ -55,33 +90,79 @@ def getDateRange(dateRange: DateRange = None) -> Tuple[datetime, datetime]:
   return dateRange
 
 
-@cache
-def fetchAll(model: type[_TModel], dateRange: DateRange = None) -> Query:
+def exportRows(exportFor: ExportFor, dateRange: DateRange = None, batchSize: int = 1000) -> Iterator[str]:
+  """
+  Stream a CSV export in chunks
+
+  Only the exported columns are selected and rows are fetched `batchSize` at a time
+  with a server-side cursor, so memory stays flat whatever the table size
+
+  Parameters
+  ----------
+  `exportFor: User | Textbook | Revenue`, required
+
+  `dateRange: DateRange`, optional (defaults to None)
+
+  `batchSize: int`, optional (defaults to 1000)
+    Rows fetched and written per chunk
+
+  Returns
+  -------
+  `chunks: Iterator[str]`
+  """
+  model, columns = exportColumns[exportFor]
   range_ = getDateRange(dateRange)
-  return model.query.filter(
-    and_((range_[0] <= model.created_at), (model.created_at <= range_[1]))
+
+  stmt = (
+    select(*(getattr(model, column) for column in columns.values()))
+    .where(model.created_at.between(*range_))
+    .order_by(model.created_at)
+    .execution_options(yield_per=batchSize)
   )
 
+  buffer = StringIO()
+  writer = csv.writer(buffer, lineterminator='\n')
+  writer.writerow(columns.keys())
+
+  for partition in db.session.execute(stmt).partitions():
+    writer.writerows(partition)
+    yield buffer.getvalue()
+
+    buffer.seek(0)
+    buffer.truncate()
+
+  if buffer.tell():
+    yield buffer.getvalue()
+
+
+def gzipStream(chunks: Iterable[str]) -> Iterator[bytes]:
+  """Gzip a stream of text chunks on the fly"""
+  compressor = zlib.compressobj(wbits=31)
+
+  for chunk in chunks:
+    compressed = compressor.compress(chunk.encode())
+    if compressed:
+      yield compressed
+
+  yield compressor.flush()
+
 
 # Drawing
 def drawGraph(
-  model: type[_TModel],
-  axisY: _YFunc[_TModel, _TYValue],
+  series: stats_provider.MonthlySeries,
   title: str,
   labelCount: Tuple[LabelX, LabelY] = (6, 10),
   ylabel: str = 'Count',
-  dateRange: DateRange = None,
-  ) -> StringIO:
+  ) -> bytes:
   """
   Draw the graph to an image
 
+  Uses a standalone `Figure` instead of pyplot so concurrent renders do not share state
+
   Parameters
   ----------
-  `model: Model`, required
-    The model to draw a graph on
-
-  `axisY: (model) -> Any`, required
-    The function to calculate an individual Y-Axis plot point
+  `series: MonthlySeries`, required
+    The monthly points to plot
 
   `title: str`, required
 
@@ -91,198 +172,170 @@ def drawGraph(
   `ylabel: str`, optional (defaults to 'Count')
     The Y-Axis title
 
-  `dateRange: DateRange`, optional (defaults to None)
-    The year to consider, else defaults to the past 12 months
-
   Returns
   -------
-  svg: StringIO
+  svg: bytes
   """
-  fetched: list[_TModel] = fetchAll(model, dateRange).all()
-  processed: list[Tuple[datetime, _TYValue | int]] = []
-
-  try:
-
-    def _processor(m: _TModel) -> Tuple[datetime, _TYValue]:
-      return (m.created_at, axisY(m))
-
-    process = ConcurrentProcessing(
-      function=_processor, dataset=fetched, max_threads=4, daemon=True
-    )
-    process.start()
-    processed = process.get_return_values()
-
-  except Exception:
-    pass
-
-  if len(processed) < 12:
-    # Populate dummy data
-    first = processed[0][0] if len(processed) >= 1 else None
-    processed = [
-      (utc_time.unskip(f'{i}months', first), 0)
-      for i in range(13 - len(processed), 1, -1)
-    ] + processed
-
-  # Split format data
-  hashMap = {}
-  for x, y in processed:
-    curr: _TYValue | None = hashMap.get(f'{x.month}/{x.year}')
-    if isinstance(y, (int, float)):
-      hashMap[f'{x.month}/{x.year}'] = (
-        (curr + y) if isinstance(curr, (int, float)) else y
-      )
+  fig = Figure(figsize=(16, 11))
+  ax = fig.subplots()
 
   # Plotting
-  plt.figure(figsize=(16, 11))
-  plt.plot(tuple(hashMap.keys()), tuple(hashMap.values()))
+  ax.plot(series.labels, series.values)
 
   # Curl X and Y points
-  _width = len(hashMap)
-  _height = max(hashMap.values())
+  _width = len(series.values)
+  _height = float(series.values.max(initial=0))
 
-  plt.xticks(
+  ax.set_xticks(
     numpy.arange(0, _width + 1, max(1, round(_width / labelCount[0]))), minor=True
   )
-  plt.yticks(
+  ax.set_yticks(
     numpy.arange(0, _height + 1, max(1, round(_height / labelCount[1]))), minor=True
   )
 
   # Label
-  plt.title(title)
-  plt.xlabel('Time')
-  plt.ylabel(ylabel)
-  plt.tick_params('both')
-  plt.autoscale(True, 'both')
+  ax.set_title(title)
+  ax.set_xlabel('Time')
+  ax.set_ylabel(ylabel)
+  ax.tick_params('both')
+  ax.autoscale(True, 'both')
 
   # Set Y-Axis Limit
-  plt.ylim([0, _height + 1])
+  ax.set_ylim([0, _height + 1])
 
-  # Write to stream
-  f = StringIO()
-  plt.savefig(f, format='svg')
-  plt.close()
+  # Write to stream, without the render timestamp
+  f = BytesIO()
+  fig.savefig(f, format='svg', metadata={'Date': None})
 
-  return f
+  return f.getvalue()
 
 
-@lru_cache(maxsize=1)
-def getStats():
-  users: list[UserModel] = fetchAll(UserModel).all()
-  textbooks: list[TextbookModel] = fetchAll(TextbookModel).all()
-  sales: list[SaleModel] = fetchAll(SaleModel).all()
+def renderChart(graphFor: GraphFor, dateRange: DateRange = None) -> Tuple[bytes, str]:
+  """
+  Render a chart, served from `chartCache` when possible
 
-  userCount = len(users)
-  textbookCount = len(textbooks)
-  revenue = sum([ i.total_cost for i in sales if i.paid ])
+  Parameters
+  ----------
+  `graphFor: User | Textbook | Revenue`, required
 
-  return AdminStatsGetReply(
-    message='Successfully fetched stats',
-    status=HTTPStatusCode.OK,
-    data = _AdminStatsGetData(
-      user_count = userCount,
-      textbook_count = textbookCount,
-      revenue = revenue
-    )
-  ).to_dict(), HTTPStatusCode.OK
+  `dateRange: DateRange`, optional (defaults to None)
 
+  Returns
+  -------
+  `(svg, etag): tuple[bytes, str]`
+  """
+  range_ = getDateRange(dateRange)
+  key: ChartKey = (
+    graphFor, range_[0].strftime('%Y-%m'), range_[1].strftime('%Y-%m'), 'month'
+  )
 
-@app.route(f'{basePath}/draw', methods=['POST'])
-@auth_provider.require_admin
-def admin_draw_api(_: UserModel):
-  req = AdminGraphGetRequest(request)
+  cached = chartCache.get(key)
+  if cached is not None:
+    return cached
 
-  match req.graphFor:
+  match graphFor:
     case 'User':
       svg = drawGraph(
-        UserModel,
-        lambda _: 1,
+        stats_provider.rollupMonthly('users', range_),
         'Users Accounts Created Over a 12 Month Period',
         ylabel='Accounts Created',
       )
 
     case 'Revenue':
       svg = drawGraph(
-        SaleModel,
-        lambda model: model.total_cost,
+        stats_provider.rollupMonthly('revenue', range_),
         'Revenue Over a 12 Month Period',
         ylabel='Total Revenue ($)',
       )
 
     case 'Textbook':
       svg = drawGraph(
-        TextbookModel,
-        lambda _: 1,
+        stats_provider.rollupMonthly('textbooks', range_),
         'Textbooks Created Over a 12 Month Period',
         ylabel='Textbooks Created',
       )
 
-    case _:
-      return GenericReply(
-        message='Invalid graphFor', status=HTTPStatusCode.BAD_REQUEST
-      ).to_dict(), HTTPStatusCode.BAD_REQUEST
+  rendered = (svg, hashlib.blake2b(svg, digest_size=16).hexdigest())
+  chartCache.set(key, rendered)
+  return rendered
 
-  return Response(
-    stream_template_string(svg.getvalue()),
+
+def invalidateCharts(graphFor: GraphFor) -> None:
+  """Drop every cached chart for a graph"""
+  chartCache.invalidate_where(lambda key: key[0] == graphFor)
+
+
+# Counts only change on insert/delete, revenue also changes when a sale is updated
+for _model, _graphFor, _events in (
+  (UserModel, 'User', ('after_insert', 'after_delete')),
+  (TextbookModel, 'Textbook', ('after_insert', 'after_delete')),
+  (SaleModel, 'Revenue', ('after_insert', 'after_update', 'after_delete')),
+):
+  for _event in _events:
+    event.listen(_model, _event, lambda *_, g=_graphFor: invalidateCharts(g))
+  statsCache.invalidate_on(_model, *_events)
+
+
+@cached(statsCache)
+def getStats():
+  range_ = getDateRange()
+
+  userCount = stats_provider.rollupTotal('users', range_)
+  textbookCount = stats_provider.rollupTotal('textbooks', range_)
+  revenue = stats_provider.rollupTotal('revenue', range_)
+
+  return AdminStatsGetReply(
+    message='Successfully fetched stats',
     status=HTTPStatusCode.OK,
-    mimetype='image/svg+xml',
-  )
+    data = _AdminStatsGetData(
+      user_count = int(userCount),
+      textbook_count = int(textbookCount),
+      revenue = revenue
+    )
+  ).to_dict(), HTTPStatusCode.OK
+
+
+@app.route(f'{basePath}/draw', methods=['GET', 'POST'])
+@auth_provider.require_admin
+def admin_draw_api(_: UserModel):
+  req = AdminGraphGetRequest(request)
+
+  if req.graphFor not in ('User', 'Textbook', 'Revenue'):
+    return GenericReply(
+      message='Invalid graphFor', status=HTTPStatusCode.BAD_REQUEST
+    ).to_dict(), HTTPStatusCode.BAD_REQUEST
+
+  svg, etag = renderChart(req.graphFor)
+
+  if request.if_none_match.contains(etag):
+    response = Response(status=HTTPStatusCode.NOT_MODIFIED)
+  else:
+    response = Response(svg, status=HTTPStatusCode.OK, mimetype='image/svg+xml')
+
+  response.set_etag(etag)
+  response.cache_control.private = True
+  response.cache_control.no_cache = True
+  return response
 
 
 @app.route(f'{basePath}/export/<string:exportFor>', methods=['GET'])
 @auth_provider.require_admin
 def admin_export_api(_: UserModel | None, exportFor: str):
-  fetched: list[UserModel | TextbookModel | SaleModel]
-  match exportFor:
-    case 'Revenue':
-      fetched = fetchAll(SaleModel).all()
-    case 'Textbook':
-      fetched = fetchAll(TextbookModel).all()
-    case 'User':
-      fetched = fetchAll(UserModel).all()
-    case _:
-      return GenericReply(
-        message='Invalid exportFor! Must be one of User, Textbook, or Revenue',
-        status=HTTPStatusCode.BAD_REQUEST,
-      ).to_dict(), HTTPStatusCode.BAD_REQUEST
-
-  def generator():
-    if exportFor == 'Revenue':
-      yield 'id,type,created_at,total_cost,paid,paid_at\n'
-
-      for model in fetched:
-        if not isinstance(model, SaleModel):
-          continue
-        yield f'{model.id},{model.type},{model.created_at},{model.total_cost},{model.paid},{model.paid_at}\n'
-
-    elif exportFor == 'User':
-      yield 'id,username,email,status,created_at,privilege\n'
-
-      for model in fetched:
-        if not isinstance(model, UserModel):
-          continue
-        yield (
-          f'{model.id},{model.username},{model.email},{model.status},{model.created_at},{model.privilege}'
-            + ('\n' if model != fetched[-1] else '')
-        )
-
-    elif exportFor == 'Textbook':
-      yield 'id,title,author,price,status,created_at\n'
-
-      for model in fetched:
-        if not isinstance(model, TextbookModel):
-          continue
-        yield (
-          f'{model.id},{model.title},{model.author},{model.price},{model.status},{model.created_at}'
-            + ('\n' if model != fetched[-1] else '')
-        )
+  if exportFor not in exportColumns:
+    return GenericReply(
+      message='Invalid exportFor! Must be one of User, Textbook, or Revenue',
+      status=HTTPStatusCode.BAD_REQUEST,
+    ).to_dict(), HTTPStatusCode.BAD_REQUEST
+
+  compress = request.args.get('compress') == 'gzip'
+  filename = f'{exportFor}-{datetime.now().isoformat()}.csv' + ('.gz' if compress else '')
 
+  rows = exportRows(exportFor)
   return Response(
-    generator(),
-    mimetype='application/octet-stream',
+    stream_with_context(gzipStream(rows) if compress else rows),
+    mimetype='application/gzip' if compress else 'text/csv',
     status=HTTPStatusCode.OK,
-    headers={
-      'Content-Disposition': f'attachment; filename={exportFor}-{datetime.now().isoformat()}.csv'
-    },
+    headers={'Content-Disposition': f'attachment; filename={filename}'},
   )
 
 
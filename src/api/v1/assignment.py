@@ -7,6 +7,7 @@ from src.database import AssignmentModel, ClassroomModel, UserModel
 from src.service.auth_provider import require_login
 from src.utils.http import HTTPStatusCode
 from src.utils.ext import utc_time
+from src.utils.pagination import paginate
 from src.utils.api import (
   AssignmentListRequest,
   AssignmentListReply,
@@ -77,15 +78,20 @@ def assignment_list_api(user: UserModel):
     ),
   ]
 
-  filtered = (
+  filtered = paginate(
     AssignmentModel.query.join(ClassroomModel)
+    .options(*_AssignmentGetData.loader_options(AssignmentModel))
     .filter(
       and_(
         ClassroomModel.members.contains(user),
         and_(*query) if req.criteria == 'and' else or_(*query),
       )
-    )
-    .paginate(page=req.page, error_out=False)
+    ),
+    (AssignmentModel.created_at, AssignmentModel.id),
+    req.after,
+    req.page,
+    req.per_page,
+    req.count in ('y', True),
   )
 
   return AssignmentListReply(
@@ -106,6 +112,8 @@ def assignment_list_api(user: UserModel):
       )
       for assignment in filtered
     ],
+    cursor=filtered.cursor,
+    total=filtered.total,
   ).to_dict(), HTTPStatusCode.OK
 
 
@@ -115,9 +123,11 @@ def assignment_list_api(user: UserModel):
 def assignment_get_api(user: UserModel):
   req = AssignmentGetRequest(request)
 
-  assignment = AssignmentModel.query.filter(
-    AssignmentModel.id == req.assignment_id
-  ).first()
+  assignment = (
+    AssignmentModel.query.options(*_AssignmentGetData.loader_options(AssignmentModel))
+    .filter(AssignmentModel.id == req.assignment_id)
+    .first()
+  )
   if not isinstance(assignment, AssignmentModel):
     return GenericReply(
       message='Unable to locate assignment', status=HTTPStatusCode.BAD_REQUEST
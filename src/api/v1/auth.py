@@ -9,8 +9,8 @@ from src.service import auth_provider
 from src.utils.ext import utc_time
 
 from src.utils.http import HTTPStatusCode
-from src.utils.passwords import hash_password
-from src.database import UserModel, TokenModel
+from src.utils.passwords import hash_password, PasswordHasherBusy
+from src.database import UserModel, TokenModel, JWTBlocklistModel
 from sqlalchemy import or_
 
 from src.utils.api import (
@@ -34,24 +34,34 @@ from flask import (
 )
 from flask_jwt_extended import (
   jwt_required,
+  decode_token,
   get_current_user,
   create_access_token,
   create_refresh_token,
 )
 
-# Routes
+# Config
 basePath: str = '/api/v1'
 auth_limit = limiter.shared_limit(
   '100 per hour', scope=lambda _: request.host, key_func=util.get_remote_address
 )
 
 
-@app.route(f'{basePath}/login', methods=['POST'])
-@auth_limit
-@auth_provider.anonymous_required(admin_override=False)
-def apiv1_Login():
-  req = LoginRequest(request)
+# Helpers
+def login_user(req: LoginRequest) -> tuple[GenericReply | LoginReply, int]:
+  """
+  Validates credentials and mints a login token pair in-process
+
+  Shared by the api endpoint and the /login form
+
+  Parameters
+  ----------
+  `req: LoginRequest`, required
 
+  Returns
+  -------
+  `(reply, status): tuple[GenericReply | LoginReply, int]`
+  """
   # Ensure email and password exist
   if (
       (not req.email)
@@ -61,21 +71,27 @@ def apiv1_Login():
       ):
     return GenericReply(
       message='Missing email or password', status=HTTPStatusCode.BAD_REQUEST
-    ).to_dict(), HTTPStatusCode.BAD_REQUEST
+    ), HTTPStatusCode.BAD_REQUEST
 
   # Ensure user exists
   user: UserModel | None = UserModel.query.filter(UserModel.email == req.email).first()
-  if not isinstance(user, UserModel) or not user.verify_password(req.password):
+  try:
+    if not isinstance(user, UserModel) or not user.verify_password(req.password):
+      return GenericReply(
+        message='Invalid email or password', status=HTTPStatusCode.BAD_REQUEST
+      ), HTTPStatusCode.BAD_REQUEST
+
+  except PasswordHasherBusy as e:
     return GenericReply(
-      message='Invalid email or password', status=HTTPStatusCode.BAD_REQUEST
-    ).to_dict(), HTTPStatusCode.BAD_REQUEST
+      message=str(e.description), status=HTTPStatusCode.SERVICE_UNAVAILABLE
+    ), HTTPStatusCode.SERVICE_UNAVAILABLE
 
   # Check for locked account
   if user.status == 'Locked':
     return GenericReply(
       message='Your account has been locked, contact us at contact@edutecx.ngjx.org for more information',
       status=HTTPStatusCode.FORBIDDEN,
-    ).to_dict(), HTTPStatusCode.FORBIDDEN
+    ), HTTPStatusCode.FORBIDDEN
 
   # Create tokens
   add_claims = {
@@ -89,7 +105,65 @@ def apiv1_Login():
     message='Login successful',
     status=HTTPStatusCode.OK,
     data=_LoginData(access_token=access_token, refresh_token=refresh_token),
-  ).to_dict(), HTTPStatusCode.OK
+  ), HTTPStatusCode.OK
+
+
+def refresh_access_token(refresh_token: str) -> tuple[GenericReply | TokenRefreshReply, int]:
+  """
+  Mints a new access token from an encoded refresh token in-process
+
+  Applies the same checks as `jwt_required(refresh=True)` on the refresh endpoint
+
+  Parameters
+  ----------
+  `refresh_token: str`, required
+
+  Returns
+  -------
+  `(reply, status): tuple[GenericReply | TokenRefreshReply, int]`
+  """
+  try:
+    decoded = decode_token(refresh_token)
+  except Exception as e:
+    return GenericReply(
+      message=str(e), status=HTTPStatusCode.UNPROCESSABLE_ENTITY
+    ), HTTPStatusCode.UNPROCESSABLE_ENTITY
+
+  if decoded.get('type') != 'refresh':
+    return GenericReply(
+      message='Only refresh tokens are allowed', status=HTTPStatusCode.UNPROCESSABLE_ENTITY
+    ), HTTPStatusCode.UNPROCESSABLE_ENTITY
+
+  if JWTBlocklistModel.is_revoked(decoded['jti']):
+    return GenericReply(
+      message='Token has been revoked', status=HTTPStatusCode.UNAUTHORIZED
+    ), HTTPStatusCode.UNAUTHORIZED
+
+  user = UserModel.query_identity(decoded['sub'])
+  if not isinstance(user, UserModel):
+    return GenericReply(
+      message='Unable to locate user', status=HTTPStatusCode.UNAUTHORIZED
+    ), HTTPStatusCode.UNAUTHORIZED
+
+  return _mint_refreshed(user), HTTPStatusCode.OK
+
+
+def _mint_refreshed(user: UserModel) -> TokenRefreshReply:
+  """Non-fresh access token handed out on refresh"""
+  return TokenRefreshReply(
+    message='Refreshed access token',
+    status=HTTPStatusCode.OK,
+    data=_TokenRefreshData(access_token=create_access_token(identity=user, fresh=False)),
+  )
+
+
+# Routes
+@app.route(f'{basePath}/login', methods=['POST'])
+@auth_limit
+@auth_provider.anonymous_required(admin_override=False)
+def apiv1_Login():
+  reply, status = login_user(LoginRequest(request))
+  return reply.to_dict(), status
 
 
 @app.route(f'{basePath}/register', methods=['POST'])
@@ -144,10 +218,17 @@ def apiV1Register():
       message='Email or username already exists', status=HTTPStatusCode.BAD_REQUEST
     ).to_dict(), HTTPStatusCode.BAD_REQUEST
 
+  try:
+    passwordHash = hash_password(req.password).decode('utf-8')
+  except PasswordHasherBusy as e:
+    return GenericReply(
+      message=str(e.description), status=HTTPStatusCode.SERVICE_UNAVAILABLE
+    ).to_dict(), HTTPStatusCode.SERVICE_UNAVAILABLE
+
   user = UserModel(
     email=req.email,
     username=req.username,
-    password=hash_password(req.password).decode('utf-8'),
+    password=passwordHash,
     privilege=req.privilege,
   )
   token = TokenModel(user=user, token_type='Verification')
@@ -185,14 +266,7 @@ def apiV1Register():
 @auth_limit
 @jwt_required(refresh=True)
 def apiV1Refresh():
-  identity = get_current_user()
-  access_token = create_access_token(identity=identity, fresh=False)
-
-  return TokenRefreshReply(
-    message='Refreshed access token',
-    status=HTTPStatusCode.OK,
-    data=_TokenRefreshData(access_token=access_token),
-  ).to_dict(), HTTPStatusCode.OK
+  return _mint_refreshed(get_current_user()).to_dict(), HTTPStatusCode.OK
 
 
 @app.route(f'{basePath}/send-verification-email', methods=['POST'])
@@ -7,6 +7,7 @@ from src.database import ClassroomModel, UserModel, TextbookModel, ImageModel
 from src.utils.http import HTTPStatusCode, escape_id
 from src.service.auth_provider import require_login
 from src.utils.ext import utc_time
+from src.utils.pagination import paginate
 from src.utils.api import (
   ClassroomListRequest,
   ClassroomListReply,
@@ -32,6 +33,8 @@ from datetime import datetime
 from flask_limiter import util
 from flask import request, current_app as app
 
+from sqlalchemy import and_, or_
+
 
 # Routes
 basePath: str = '/api/v1/classroom'
@@ -70,6 +73,28 @@ def classroom_list_api(user: UserModel):
   if not req.query or req.query == 'None':
     req.query = ''
 
+  # Build query
+  query = [
+    and_(
+      dateRange[0] <= ClassroomModel.created_at, ClassroomModel.created_at <= dateRange[1]
+    ),
+    ClassroomModel.title.contains(req.query),
+  ]
+
+  page = paginate(
+    ClassroomModel.query.options(*_ClassroomListData.loader_options(ClassroomModel)).filter(
+      and_(
+        ClassroomModel.accessible_by(user.id),
+        and_(*query) if req.criteria == 'and' else or_(*query),
+      )
+    ),
+    (ClassroomModel.created_at, ClassroomModel.id),
+    req.after,
+    req.page,
+    req.per_page,
+    req.count in ('y', True),
+  )
+
   return ClassroomListReply(
     message='Successfully fetched classrooms',
     status=HTTPStatusCode.OK,
@@ -83,23 +108,10 @@ def classroom_list_api(user: UserModel):
         cover_image=classroom.cover_image.id if classroom.cover_image else None,
         created_at=classroom.created_at.timestamp(),
       )
-      for classroom in (user.classrooms + user.owned_classrooms)
-      if (
-        (
-          (req.criteria == 'and') and (
-            (dateRange[0] <= classroom.created_at)
-            and (classroom.created_at <= dateRange[1])
-            and (req.query in classroom.title)
-          )
-        )
-        or (
-          (req.criteria == 'or') and (
-            (dateRange[0] <= classroom.created_at and classroom.created_at <= dateRange[1])
-            or (req.query in classroom.title)
-          )
-        )
-      )
+      for classroom in page
     ],
+    cursor=page.cursor,
+    total=page.total,
   ).to_dict(), HTTPStatusCode.OK
 
 
@@ -109,7 +121,11 @@ def classroom_list_api(user: UserModel):
 def classroom_get_api(user: UserModel):
   req = ClassroomGetRequest(request)
 
-  classroom = ClassroomModel.query.filter(ClassroomModel.id == req.classroom_id).first()
+  classroom = (
+    ClassroomModel.query.options(*_ClassroomGetData.loader_options(ClassroomModel))
+    .filter(ClassroomModel.id == req.classroom_id)
+    .first()
+  )
   if not isinstance(classroom, ClassroomModel):
     return GenericReply(
       message='Classroom could not be located', status=HTTPStatusCode.BAD_REQUEST
@@ -292,37 +308,47 @@ def classroom_delete_api(user: UserModel):
   ).to_dict(), HTTPStatusCode.OK
 
 
-@app.route(f'{basePath}/join', methods=['POST'])
-@auth_limit
-@require_login
-def classroom_join_api(user: UserModel):
-  req = ClassroomJoinRequest(request)
+def join_classroom(user: UserModel, invite_id: str) -> tuple[GenericReply | ClassroomJoinReply, int]:
+  """
+  Adds the user to the classroom behind an invite
+
+  Shared by the api endpoint and the invite link route
+
+  Parameters
+  ----------
+  `user: UserModel`, required
 
+  `invite_id: str`, required
+
+  Returns
+  -------
+  `(reply, status): tuple[GenericReply | ClassroomJoinReply, int]`
+  """
   classroom = ClassroomModel.query.filter(
-    ClassroomModel.invite_id == req.invite_id
+    ClassroomModel.invite_id == invite_id
   ).first()
   if not isinstance(classroom, ClassroomModel):
     return GenericReply(
       message='Classroom could not be located', status=HTTPStatusCode.BAD_REQUEST
-    ).to_dict(), HTTPStatusCode.BAD_REQUEST
+    ), HTTPStatusCode.BAD_REQUEST
 
   if not classroom.invite_enabled:
     return GenericReply(
       message='Classroom invite is disabled', status=HTTPStatusCode.FORBIDDEN
-    ).to_dict(), HTTPStatusCode.FORBIDDEN
+    ), HTTPStatusCode.FORBIDDEN
 
   # Impose limitations
   if classroom.is_member(user):
     return GenericReply(
       message='You are already a member of this classroom',
       status=HTTPStatusCode.FORBIDDEN,
-    ).to_dict(), HTTPStatusCode.FORBIDDEN
+    ), HTTPStatusCode.FORBIDDEN
 
   elif (classroom.owner.membership == 'Free') and (len(classroom.members) > 5):
     return GenericReply(
       message='The classroom owner has reached the classroom limit',
       status=HTTPStatusCode.FORBIDDEN,
-    ).to_dict(), HTTPStatusCode.FORBIDDEN
+    ), HTTPStatusCode.FORBIDDEN
 
   else:
     classroom.add_students(user)
@@ -332,20 +358,30 @@ def classroom_join_api(user: UserModel):
     message='Successfully joined classroom',
     status=HTTPStatusCode.OK,
     data=_ClassroomCreateData(classroom_id=classroom.id),
-  ).to_dict(), HTTPStatusCode.OK
+  ), HTTPStatusCode.OK
 
 
-@app.route(f'{basePath}/leave', methods=['POST'])
-@auth_limit
-@require_login
-def classroom_leave_api(user: UserModel):
-  req = ClassroomLeaveRequest(request)
+def leave_classroom(user: UserModel, classroom_id: str) -> tuple[GenericReply, int]:
+  """
+  Removes the user from a classroom
 
-  classroom = ClassroomModel.query.filter(ClassroomModel.id == req.classroom_id).first()
+  Shared by the api endpoint and the leave route
+
+  Parameters
+  ----------
+  `user: UserModel`, required
+
+  `classroom_id: str`, required
+
+  Returns
+  -------
+  `(reply, status): tuple[GenericReply, int]`
+  """
+  classroom = ClassroomModel.query.filter(ClassroomModel.id == classroom_id).first()
   if not isinstance(classroom, ClassroomModel):
     return GenericReply(
       message='Classroom could not be located', status=HTTPStatusCode.BAD_REQUEST
-    ).to_dict(), HTTPStatusCode.BAD_REQUEST
+    ), HTTPStatusCode.BAD_REQUEST
 
   if classroom.is_student(user):
     classroom.remove_students(user)
@@ -358,13 +394,31 @@ def classroom_leave_api(user: UserModel):
   elif classroom.is_owner(user):
     return GenericReply(
       message='The classroom owner cannot leave', status=HTTPStatusCode.FORBIDDEN
-    ).to_dict(), HTTPStatusCode.FORBIDDEN
+    ), HTTPStatusCode.FORBIDDEN
 
   else:
     return GenericReply(
       message='You are not a member of this classroom', status=HTTPStatusCode.FORBIDDEN
-    ).to_dict(), HTTPStatusCode.FORBIDDEN
+    ), HTTPStatusCode.FORBIDDEN
 
   return ClassroomLeaveReply(
     message='Successfully left classroom', status=HTTPStatusCode.OK
-  ).to_dict(), HTTPStatusCode.OK
+  ), HTTPStatusCode.OK
+
+
+@app.route(f'{basePath}/join', methods=['POST'])
+@auth_limit
+@require_login
+def classroom_join_api(user: UserModel):
+  req = ClassroomJoinRequest(request)
+  reply, status = join_classroom(user, req.invite_id)
+  return reply.to_dict(), status
+
+
+@app.route(f'{basePath}/leave', methods=['POST'])
+@auth_limit
+@require_login
+def classroom_leave_api(user: UserModel):
+  req = ClassroomLeaveRequest(request)
+  reply, status = leave_classroom(user, req.classroom_id)
+  return reply.to_dict(), status
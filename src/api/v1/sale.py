@@ -5,6 +5,7 @@ Sale Endpoint
 from src import limiter
 from flask_limiter import util
 from src.utils.ext import utc_time
+from src.utils.pagination import paginate
 from src.utils.http import HTTPStatusCode
 from src.database import SaleModel, UserModel
 from src.service.auth_provider import require_login, require_admin
@@ -78,9 +79,15 @@ def sale_list_api(user: UserModel):
     ),
   ]
 
-  filtered = SaleModel.query.filter(
-    and_(*query) if req.criteria == 'and' else or_(*query)
-  ).paginate(page=req.page, error_out=False)
+  filtered = paginate(
+    SaleModel.query.options(*_SaleGetData.loader_options(SaleModel))
+    .filter(and_(*query) if req.criteria == 'and' else or_(*query)),
+    (SaleModel.created_at, SaleModel.id),
+    req.after,
+    req.page,
+    req.per_page,
+    req.count in ('y', True),
+  )
 
   return SaleListReply(
     message='Successfully fetched sales',
@@ -98,6 +105,8 @@ def sale_list_api(user: UserModel):
       )
       for i in filtered.items
     ],
+    cursor=filtered.cursor,
+    total=filtered.total,
   ).to_dict(), HTTPStatusCode.OK
 
 
@@ -107,7 +116,11 @@ def sale_list_api(user: UserModel):
 def sale_get_api(user: UserModel):
   req = SaleGetRequest(request)
 
-  sale = SaleModel.query.filter(SaleModel.id == req.sale_id).first()
+  sale = (
+    SaleModel.query.options(*_SaleGetData.loader_options(SaleModel))
+    .filter(SaleModel.id == req.sale_id)
+    .first()
+  )
   if not isinstance(sale, SaleModel):
     return GenericReply(
       message='Unable to locate sale', status=HTTPStatusCode.BAD_REQUEST
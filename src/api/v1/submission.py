@@ -9,11 +9,13 @@ from src.database import (
   AssignmentModel,
   SubmissionSnippetModel,
   TextbookModel,
+  ClassroomModel,
 )
 from src.service.auth_provider import require_login
 from src.service.cdn_provider import BadFileEXT
 from src.utils.http import HTTPStatusCode
 from src.utils.ext import utc_time
+from src.utils.pagination import paginate
 from src.utils.api import (
   SubmissionListRequest,
   SubmissionListReply,
@@ -72,6 +74,31 @@ def submission_list_api(user: UserModel):
   if not req.query or req.query == 'None':
     req.query = ''
 
+  # Build query
+  query = [
+    and_(
+      dateRange[0] <= SubmissionModel.created_at, SubmissionModel.created_at <= dateRange[1]
+    ),
+    ClassroomModel.title.contains(req.query),
+  ]
+
+  page = paginate(
+    SubmissionModel.query.join(AssignmentModel)
+    .join(ClassroomModel)
+    .options(*_SubmissionGetData.loader_options(SubmissionModel))
+    .filter(
+      and_(
+        SubmissionModel.student_id == user.id,
+        and_(*query) if req.criteria == 'and' else or_(*query),
+      )
+    ),
+    (SubmissionModel.created_at, SubmissionModel.id),
+    req.after,
+    req.page,
+    req.per_page,
+    req.count in ('y', True),
+  )
+
   return SubmissionListReply(
     message='Successfully fetched submissions',
     status=HTTPStatusCode.OK,
@@ -85,24 +112,11 @@ def submission_list_api(user: UserModel):
         created_at=submission.created_at.timestamp(),
         updated_at=submission.updated_at.timestamp(),
       )
-      for submission in user.submissions
-      if (
-        (
-          (req.criteria == 'and') and (
-            (dateRange[0] <= submission.created_at)
-            and (submission.created_at <= dateRange[1])
-            and (req.query in submission.assignment.classroom.title)
-          )
-        )
-        or (
-          (req.criteria == 'or') and (
-            (dateRange[0] <= submission.created_at and submission.created_at <= dateRange[1])
-            or (req.query in submission.assignment.classroom.title)
-          )
-        )
-      )
+      for submission in page
     ],
-  ).to_dict()
+    cursor=page.cursor,
+    total=page.total,
+  ).to_dict(), HTTPStatusCode.OK
 
 
 @app.route(f'{basePath}/get', methods=['GET'])
@@ -111,9 +125,13 @@ def submission_list_api(user: UserModel):
 def submission_get_api(user: UserModel):
   req = SubmissionGetRequest(request)
 
-  submission = SubmissionModel.query.filter(
-    SubmissionModel.id == req.submission_id
-  ).first()
+  submission = (
+    SubmissionModel.query.options(
+      *_SubmissionGetData.loader_options(SubmissionModel, 'assignment.classroom')
+    )
+    .filter(SubmissionModel.id == req.submission_id)
+    .first()
+  )
   if not isinstance(submission, SubmissionModel):
     return GenericReply(
       message='Could not locate submission', status=HTTPStatusCode.BAD_REQUEST
@@ -4,9 +4,16 @@ Textbook Endpoint
 
 from src import limiter
 from src.utils.http import HTTPStatusCode
-from src.database import TextbookModel, UserModel, ImageModel
+from src.database import (
+  TextbookModel,
+  UserModel,
+  ImageModel,
+  CategoryModel,
+  textbook_search,
+)
 from src.service.auth_provider import require_login
 from src.utils.ext import utc_time
+from src.utils.pagination import paginate, given_cursor
 from src.utils.api import (
   TextbookListRequest,
   TextbookListReply,
@@ -75,17 +82,47 @@ def textbooks_list_api():
   if not req.query or req.query == 'None':
     req.query = ''
 
-  # Build query
+  if not req.categories or req.categories == 'None':
+    req.categories = ''
+
+  # Build query, ranked by relevance when the search index is available
+  base = TextbookModel.query
+  textMatch = TextbookModel.title.contains(req.query)
+
+  hits = textbook_search.match(req.query)
+  if hits is not None:
+    base = base.outerjoin(hits, hits.c.textbook_id == TextbookModel.id)
+    textMatch = hits.c.textbook_id.is_not(None)
+
+    # Keyset pages need a stable sort key, so only page mode ranks
+    if given_cursor(req.after) is None:
+      base = base.order_by(hits.c.rank.is_(None), hits.c.rank)
+
   query = [
     and_(
       dateRange[0] <= TextbookModel.created_at, TextbookModel.created_at <= dateRange[1]
     ),
-    TextbookModel.title.contains(req.query)
+    textMatch,
   ]
 
-  filtered = TextbookModel.query.filter(
-    and_(*query) if req.criteria == 'and' else or_(*query)
-  ).paginate(page=req.page, error_out=False)
+  matching = base.filter(and_(*query) if req.criteria == 'and' else or_(*query))
+  categories = CategoryModel.clean(req.categories.split(','))
+
+  filtered = paginate(
+    (matching.filter(TextbookModel.in_categories(categories)) if categories else matching)
+    .options(*_TextbookGetData.loader_options(TextbookModel)),
+    (TextbookModel.created_at, TextbookModel.id),
+    req.after,
+    req.page,
+    req.per_page,
+    req.count in ('y', True),
+  )
+
+  facets = None
+  if req.facets in ('y', True):
+    facets = CategoryModel.facets(
+      matching.with_entities(TextbookModel.id).order_by(None).statement
+    )
 
   return TextbookListReply(
     message='Successfully fetched textbook list',
@@ -96,7 +133,7 @@ def textbooks_list_api():
         author_id=i.author_id,
         title=i.title,
         description=i.description,
-        categories=i.categories.split('|'),
+        categories=i.category_names,
         price=i.price,
         uri=i.uri,
         status=i.status,
@@ -106,6 +143,9 @@ def textbooks_list_api():
       )
       for i in filtered
     ],
+    cursor=filtered.cursor,
+    total=filtered.total,
+    facets=facets,
   ).to_dict(), HTTPStatusCode.OK
 
 
@@ -145,6 +185,30 @@ def textbooks_owned_api(user: UserModel):
   if not req.query or req.query == 'None':
     req.query = ''
 
+  # Build query
+  query = [
+    and_(
+      dateRange[0] <= TextbookModel.created_at, TextbookModel.created_at <= dateRange[1]
+    ),
+    (TextbookModel.title + UserModel.username).contains(req.query),
+  ]
+
+  filtered = paginate(
+    TextbookModel.query.join(UserModel, TextbookModel.author_id == UserModel.id)
+    .options(*_TextbookGetData.loader_options(TextbookModel))
+    .filter(
+      and_(
+        TextbookModel.owned_by(user.id),
+        and_(*query) if req.criteria == 'and' else or_(*query),
+      )
+    ),
+    (TextbookModel.created_at, TextbookModel.id),
+    req.after,
+    req.page,
+    req.per_page,
+    req.count in ('y', True),
+  )
+
   return TextbookListReply(
     message='Successfully fetched textbook list',
     status=HTTPStatusCode.OK,
@@ -154,7 +218,7 @@ def textbooks_owned_api(user: UserModel):
         author_id=i.author_id,
         title=i.title,
         description=i.description,
-        categories=i.categories.split('|'),
+        categories=i.category_names,
         price=i.price,
         uri=i.uri,
         status=i.status,
@@ -162,23 +226,10 @@ def textbooks_owned_api(user: UserModel):
         created_at=i.created_at.timestamp(),
         updated_at=i.updated_at.timestamp(),
       )
-      for i in user.textbooks + user.owned_textbooks
-      if (
-        (
-          (req.criteria == 'and') and (
-            (dateRange[0] <= i.created_at)
-            and (i.created_at <= dateRange[1])
-            and (req.query in (i.title + i.author.username))
-          )
-        )
-        or (
-          (req.criteria == 'or') and (
-            (dateRange[0] <= i.created_at and i.created_at <= dateRange[1])
-            or (req.query in (i.title + i.author.username))
-          )
-        )
-      )
+      for i in filtered
     ],
+    cursor=filtered.cursor,
+    total=filtered.total,
   ).to_dict(), HTTPStatusCode.OK
 
 
@@ -187,7 +238,11 @@ def textbooks_owned_api(user: UserModel):
 def textbooks_get_api():
   req = TextbookGetRequest(request)
 
-  textbook = TextbookModel.query.filter(TextbookModel.id == req.textbook_id).first()
+  textbook = (
+    TextbookModel.query.options(*_TextbookGetData.loader_options(TextbookModel))
+    .filter(TextbookModel.id == req.textbook_id)
+    .first()
+  )
   if not isinstance(textbook, TextbookModel):
     return GenericReply(
       message='Unable to locate textbook', status=HTTPStatusCode.BAD_REQUEST
@@ -201,7 +256,7 @@ def textbooks_get_api():
       author_id=textbook.author_id,
       title=textbook.title,
       description=textbook.description,
-      categories=textbook.categories.split('|'),
+      categories=textbook.category_names,
       price=textbook.price,
       uri=textbook.uri,
       status=textbook.status,
@@ -311,6 +366,11 @@ def textbooks_edit_api(user: UserModel):
 
       ImageModel(file=value, textbook=textbook).save()
 
+    elif key == 'categories':
+      textbook.categories = CategoryModel.resolve(
+        value if isinstance(value, list) else str(value).split(',')
+      )
+
     else:
       textbook.__setattr__(key, value)
 
@@ -8,7 +8,8 @@ from src.utils.http import HTTPStatusCode
 from src.database import UserModel, ImageModel
 
 from src.utils.ext import utc_time
-from src.utils.passwords import hash_password
+from src.utils.pagination import paginate
+from src.utils.passwords import hash_password, PasswordHasherBusy
 from src.service.email_provider import dns_check
 from src.service.auth_provider import require_login, require_admin
 from src.utils.api import (
@@ -26,7 +27,7 @@ from src.utils.api import (
 
 import re
 from datetime import datetime
-from functools import lru_cache
+from typing import Optional
 from sqlalchemy import or_, and_
 from flask import (
   request,
@@ -45,7 +46,6 @@ DateRange = tuple[datetime, datetime] | datetime | None
 @app.route(f'{basePath}/list', methods=['GET'])
 @auth_limit
 @require_admin
-@lru_cache
 def user_list_api(user: UserModel):
   req = UserListRequest(request)
 
@@ -80,9 +80,15 @@ def user_list_api(user: UserModel):
     UserModel.username.contains(req.query)
   ]
 
-  filtered = UserModel.query.filter(
-    and_(*query) if req.criteria == 'and' else or_(*query)
-  ).paginate(page=req.page, error_out=False)
+  filtered = paginate(
+    UserModel.query.options(*_UserGetData.loader_options(UserModel))
+    .filter(and_(*query) if req.criteria == 'and' else or_(*query)),
+    (UserModel.created_at, UserModel.id),
+    req.after,
+    req.page,
+    req.per_page,
+    req.count in ('y', True),
+  )
 
   return UserListReply(
     message='Successfully fetched users',
@@ -100,6 +106,8 @@ def user_list_api(user: UserModel):
       )
       for i in filtered
     ],
+    cursor=filtered.cursor,
+    total=filtered.total,
   ).to_dict(), HTTPStatusCode.OK
 
 
@@ -205,6 +213,16 @@ def user_edit_api(user: UserModel):
       status=HTTPStatusCode.BAD_REQUEST,
     ).to_dict(), HTTPStatusCode.BAD_REQUEST
 
+  # Hash first so a busy hasher does not leave a half applied edit
+  passwordHash: Optional[str] = None
+  if req.password and (req.password != 'None'):
+    try:
+      passwordHash = hash_password(req.password).decode('utf-8')
+    except PasswordHasherBusy as e:
+      return GenericReply(
+        message=str(e.description), status=HTTPStatusCode.SERVICE_UNAVAILABLE
+      ).to_dict(), HTTPStatusCode.SERVICE_UNAVAILABLE
+
   # Edit User
   changed = False
   profileImg = request.files.get('upload', None)
@@ -215,8 +233,8 @@ def user_edit_api(user: UserModel):
     ImageModel(profileImg, user=user).save()
     changed = True
 
-  if req.password and (req.password != 'None'):
-    foundUser.password_hash = hash_password(req.password).decode('utf-8')
+  if passwordHash:
+    foundUser.password_hash = passwordHash
     changed = True
 
   if (req.privilege == 'Student') or (req.privilege == 'Educator'):
@@ -0,0 +1,65 @@
+"""
+Flask CLI commands
+
+Run with `flask --app run <command>`
+"""
+
+from src.database import JWTBlocklistModel, StatisticModel, textbook_search
+from src.service import migrations
+
+import time
+import click
+from flask import current_app as app
+
+
+# Jobs
+def purge_blocklist() -> int:
+  """
+  Delete revoked tokens that have expired anyway
+
+  Returns
+  -------
+  `purged: int`
+  """
+  return JWTBlocklistModel.clear_expired(
+    batch_size=app.config.get('JWT_BLOCKLIST_PURGE_BATCH_SIZE', 1000)
+  )
+
+
+# Commands
+@app.cli.command('upgrade')
+@click.argument('revision', default='head')
+def upgrade_command(revision: str) -> None:
+  """Migrate the database schema, to the latest revision by default"""
+  started = time.perf_counter()
+  before, after = migrations.upgrade(revision)
+  click.echo(f'Migrated database from {before} to {after} in {time.perf_counter() - started:.3f}s')
+
+
+@app.cli.command('purge-blocklist')
+def purge_blocklist_command() -> None:
+  """Delete revoked tokens that have expired anyway"""
+  started = time.perf_counter()
+  purged = purge_blocklist()
+  click.echo(f'Purged {purged} revoked tokens in {time.perf_counter() - started:.3f}s')
+
+
+@app.cli.command('rebuild-statistics')
+def rebuild_statistics_command() -> None:
+  """
+  Recompute the admin statistics rollup from scratch
+
+  Run after bulk `query.delete()` or `update()` on users, textbooks or sales,
+  which skip the mapper events that keep the rollup current
+  """
+  started = time.perf_counter()
+  rows = StatisticModel.rebuild()
+  click.echo(f'Rebuilt {rows} statistic rows in {time.perf_counter() - started:.3f}s')
+
+
+@app.cli.command('reindex-search')
+def reindex_search_command() -> None:
+  """Rebuild the textbook search index from scratch"""
+  started = time.perf_counter()
+  textbooks = textbook_search.rebuild()
+  click.echo(f'Indexed {textbooks} textbooks in {time.perf_counter() - started:.3f}s')
@@ -15,10 +15,11 @@ from .user import (
   EnumPrivilegeType,
   UserStatus,
   EnumUserStatus,
+  identity_cache,
 )
 
 from .token import TokenModel, TokenType, EnumTokenType
-from .jwtblocklist import JWTBlocklistModel, JWTType, EnumJWTType
+from .jwtblocklist import JWTBlocklistModel, JWTType, EnumJWTType, blocklist_index
 
 # Misc
 from .comment import CommentModel
@@ -29,12 +30,14 @@ from .assignment import AssignmentModel
 # Uploads
 from .image import ImageModel, ImageUploadStatus, EnumImageUploadStatus
 from .discount import DiscountModel
+from .category import CategoryModel
 from .textbook import (
   TextbookModel,
   TextbookStatus,
   EnumTextbookStatus,
   TextbookUploadStatus,
   EnumTextbookUploadStatus,
+  access_cache as textbook_access_cache,
 )
 from .submissionsnippet import (
   SubmissionSnippetModel,
@@ -43,10 +46,13 @@ from .submissionsnippet import (
 )
 
 from .sale import SaleModel, SaleInfo, SaleType, EnumSaleType
+from .statistic import StatisticModel, StatisticMetric, EnumStatisticMetric
+from .search import TextbookSearchIndex, textbook_search
 
 # Associations
 from .association import (
   user_textbook_association,
+  textbook_category_association,
   classroom_textbook_association,
   assignment_textbook_association,
   sale_textbook_association,
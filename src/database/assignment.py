@@ -38,7 +38,7 @@ class AssignmentModel(db.Model):
     default=lambda: uuid.uuid4().hex,
   )
   classroom_id: Mapped[str] = mapped_column(
-    ForeignKey('classroom_table.id'), nullable=False
+    ForeignKey('classroom_table.id'), nullable=False, index=True
   )
   classroom: Mapped['ClassroomModel'] = relationship(
     'ClassroomModel', back_populates='assignments'
@@ -60,7 +60,7 @@ class AssignmentModel(db.Model):
 
   # Logs
   created_at: Mapped[datetime] = mapped_column(
-    DateTime, nullable=False, default=datetime.utcnow
+    DateTime, nullable=False, default=datetime.utcnow, index=True
   )
   updated_at: Mapped[datetime] = mapped_column(
     DateTime, nullable=False, default=datetime.utcnow
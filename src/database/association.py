@@ -3,10 +3,11 @@ Association tables for many-to-many relaionships
 """
 
 from src import db
-from sqlalchemy import ForeignKey, Column, String, Float, Enum
+from sqlalchemy import ForeignKey, Column, String, Float, Enum, Index, select, insert, update, delete
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects import postgresql, sqlite
 
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Iterable, Literal, Optional
 
 if TYPE_CHECKING:
   from .user import UserModel
@@ -17,8 +18,8 @@ if TYPE_CHECKING:
 
 user_textbook_association = db.Table(
   'user_textbook_association',
-  Column('user_id', String, ForeignKey('user_table.id')),
-  Column('textbook_id', String, ForeignKey('textbook_table.id')),
+  Column('user_id', String, ForeignKey('user_table.id'), index=True),
+  Column('textbook_id', String, ForeignKey('textbook_table.id'), index=True),
 )
 
 
@@ -35,7 +36,7 @@ class classroom_user_association(db.Model):
     String, ForeignKey('user_table.id'), nullable=False, primary_key=True
   )
   classroom_id = Column(
-    String, ForeignKey('classroom_table.id'), nullable=False, primary_key=True
+    String, ForeignKey('classroom_table.id'), nullable=False, primary_key=True, index=True
   )
   role: Mapped[ClassroomMemberRole] = mapped_column(
     EnumClassroomMemberRole, nullable=False, default='Student'
@@ -54,6 +55,90 @@ class classroom_user_association(db.Model):
   def __hash__(self) -> int:
     return hash((self.user_id, self.classroom_id))
 
+  # Bulk
+  @classmethod
+  def add_many(
+    cls, pairs: Iterable[tuple[str, str]], role: ClassroomMemberRole, replace_role: bool = False
+  ) -> None:
+    """
+    Insert memberships in a single statement, does not commit
+
+    Loaded `members`, `students`, `educators` and `classrooms` collections are not refreshed
+
+    Parameters
+    ----------
+    `pairs: Iterable[tuple[str, str]]`, required
+      `(user_id, classroom_id)` of each membership
+
+    `role: Owner | Educator | Student`, required
+
+    `replace_role: bool`, optional (defaults to False)
+      Existing members take the new role, else they are left as is
+    """
+    pairs = list(dict.fromkeys(pairs))
+    if not pairs:
+      return
+
+    table = cls.__table__
+    rows = [{'user_id': u, 'classroom_id': c, 'role': role} for u, c in pairs]
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+      upsert = (postgresql.insert if dialect == 'postgresql' else sqlite.insert)(table).values(rows)
+      keys = ['user_id', 'classroom_id']
+      db.session.execute(
+        upsert.on_conflict_do_update(index_elements=keys, set_={'role': upsert.excluded.role})
+        if replace_role
+        else upsert.on_conflict_do_nothing(index_elements=keys)
+      )
+      return
+
+    existing = set(
+      db.session.execute(
+        select(cls.user_id, cls.classroom_id).where(
+          cls.user_id.in_({u for u, _ in pairs}), cls.classroom_id.in_({c for _, c in pairs})
+        )
+      ).tuples()
+    )
+    missing = [row for row in rows if (row['user_id'], row['classroom_id']) not in existing]
+    if missing:
+      db.session.execute(insert(table).values(missing))
+    if replace_role:
+      for u, c in existing & set(pairs):
+        db.session.execute(
+          update(table).where(cls.user_id == u, cls.classroom_id == c).values(role=role)
+        )
+
+  @classmethod
+  def remove_many(
+    cls,
+    user_ids: Iterable[str],
+    classroom_ids: Iterable[str],
+    role: Optional[ClassroomMemberRole] = None,
+  ) -> None:
+    """
+    Delete memberships of any of the users in any of the classrooms in a single statement, does not commit
+
+    Loaded `members`, `students`, `educators` and `classrooms` collections are not refreshed
+
+    Parameters
+    ----------
+    `user_ids: Iterable[str]`, required
+
+    `classroom_ids: Iterable[str]`, required
+
+    `role: Owner | Educator | Student`, optional (defaults to None)
+      Only remove members with this role, else any role
+    """
+    user_ids, classroom_ids = set(user_ids), set(classroom_ids)
+    if not (user_ids and classroom_ids):
+      return
+
+    stmt = delete(cls.__table__).where(
+      cls.user_id.in_(user_ids), cls.classroom_id.in_(classroom_ids)
+    )
+    db.session.execute(stmt if role is None else stmt.where(cls.role == role))
+
   def save(self) -> None:
     db.session.add(self)
     db.session.commit()
@@ -65,15 +150,23 @@ class classroom_user_association(db.Model):
 
 classroom_textbook_association = db.Table(
   'classroom_textbook_association',
-  Column('classroom_id', String, ForeignKey('classroom_table.id')),
-  Column('textbook_id', String, ForeignKey('textbook_table.id')),
+  Column('classroom_id', String, ForeignKey('classroom_table.id'), index=True),
+  Column('textbook_id', String, ForeignKey('textbook_table.id'), index=True),
+)
+
+
+textbook_category_association = db.Table(
+  'textbook_category_association',
+  Column('textbook_id', String, ForeignKey('textbook_table.id'), primary_key=True),
+  Column('category_id', String, ForeignKey('category_table.id'), primary_key=True),
+  Index('ix_textbook_category_association_category_id', 'category_id', 'textbook_id'),
 )
 
 
 assignment_textbook_association = db.Table(
   'assignment_textbook_association',
-  Column('assignment_id', String, ForeignKey('assignment_table.id')),
-  Column('textbook_id', String, ForeignKey('textbook_table.id')),
+  Column('assignment_id', String, ForeignKey('assignment_table.id'), index=True),
+  Column('textbook_id', String, ForeignKey('textbook_table.id'), index=True),
 )
 
 
@@ -84,7 +177,7 @@ class sale_textbook_association(db.Model):
     String, ForeignKey('sale_table.id'), nullable=False, primary_key=True
   )
   textbook_id = Column(
-    String, ForeignKey('textbook_table.id'), nullable=False, primary_key=True
+    String, ForeignKey('textbook_table.id'), nullable=False, primary_key=True, index=True
   )
 
   sale: Mapped['SaleModel'] = relationship('SaleModel', back_populates='data')
@@ -0,0 +1,157 @@
+"""
+Category Model
+"""
+
+from src import db
+
+import uuid
+from datetime import datetime
+from typing import Any, Iterable, List, TYPE_CHECKING
+
+from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.sql import Select
+from sqlalchemy import (
+  String,
+  DateTime,
+  func,
+  select,
+  insert,
+)
+
+
+# Import at runtime to prevent circular imports
+if TYPE_CHECKING:
+  from .textbook import TextbookModel
+
+
+class CategoryModel(db.Model):
+  """
+  Category Model
+
+  Textbooks are tagged through `textbook_category_association`
+  """
+
+  __tablename__ = 'category_table'
+
+  id: Mapped[str] = mapped_column(
+    String,
+    primary_key=True,
+    unique=True,
+    nullable=False,
+    default=lambda: uuid.uuid4().hex,
+  )
+  name: Mapped[str] = mapped_column(String, unique=True, nullable=False)
+
+  textbooks: Mapped[List['TextbookModel']] = relationship(
+    'TextbookModel',
+    secondary='textbook_category_association',
+    back_populates='categories',
+  )
+
+  created_at: Mapped[datetime] = mapped_column(
+    DateTime, nullable=False, default=datetime.utcnow
+  )
+
+  def __init__(self, name: str) -> None:
+    """
+    Category Model
+
+    Parameters
+    ----------
+    `name: str`, required
+    """
+    self.id = uuid.uuid4().hex
+    self.name = name
+
+  def __repr__(self) -> str:
+    """To be used with cache indexing"""
+    return '%s(%s)' % (self.__class__.__name__, self.name)
+
+  @staticmethod
+  def clean(names: Iterable[str]) -> list[str]:
+    """
+    Strip, lowercase and de-duplicate category names, keeping their order
+
+    Case is folded so 'Science' and 'science' are one category
+
+    Parameters
+    ----------
+    `names: Iterable[str]`, required
+    """
+    return list(dict.fromkeys(' '.join(i.split()).lower() for i in names if i and i.strip()))
+
+  @classmethod
+  def resolve(cls, names: Iterable[str]) -> list['CategoryModel']:
+    """
+    Fetch categories by name, creating missing ones, does not commit
+
+    Missing names are inserted with `ON CONFLICT DO NOTHING`,
+    so concurrent requests creating the same category do not collide
+
+    Parameters
+    ----------
+    `names: Iterable[str]`, required
+
+    Returns
+    -------
+    `categories: list[CategoryModel]`
+      In the order of `names`
+    """
+    names = cls.clean(names)
+    if not names:
+      return []
+
+    table = cls.__table__
+    dialect = db.session.get_bind().dialect.name
+    rows: list[dict[str, Any]] = [{'id': uuid.uuid4().hex, 'name': i, 'created_at': datetime.utcnow()} for i in names]
+
+    if dialect in ('postgresql', 'sqlite'):
+      upsert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+      db.session.execute(upsert(table).values(rows).on_conflict_do_nothing(index_elements=['name']))
+    else:
+      existing = set(db.session.scalars(select(cls.name).where(cls.name.in_(names))))
+      missing = [row for row in rows if row['name'] not in existing]
+      if missing:
+        db.session.execute(insert(table).values(missing))
+
+    found = {i.name: i for i in cls.query.filter(cls.name.in_(names))}
+    return [found[i] for i in names]
+
+  @classmethod
+  def facets(cls, textbook_ids: Select[Any]) -> dict[str, int]:
+    """
+    Count textbooks per category
+
+    Parameters
+    ----------
+    `textbook_ids: Select`, required
+      The textbooks to count, selecting only their ids
+
+    Returns
+    -------
+    `facets: dict[str, int]`
+      Most used first
+    """
+    from .association import textbook_category_association
+
+    count = func.count(textbook_category_association.c.textbook_id)
+    stmt = (
+      select(cls.name, count)
+      .join(textbook_category_association, textbook_category_association.c.category_id == cls.id)
+      .where(textbook_category_association.c.textbook_id.in_(textbook_ids))
+      .group_by(cls.name)
+      .order_by(count.desc(), cls.name)
+    )
+    return {name: total for name, total in db.session.execute(stmt)}
+
+  # DB
+  def save(self) -> None:
+    """Commits the model"""
+    db.session.add(self)
+    db.session.commit()
+
+  def delete(self) -> None:
+    """Deletes the model"""
+    db.session.delete(self)
+    db.session.commit()
@@ -6,14 +6,18 @@ from src import db
 
 import uuid
 from datetime import datetime
-from typing import List, Optional, TYPE_CHECKING
+from typing import Iterable, List, Optional, TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.sql.elements import ColumnElement
 from sqlalchemy import (
   String,
   Boolean,
   DateTime,
   ForeignKey,
+  Index,
+  select,
+  union,
 )
 
 
@@ -30,6 +34,9 @@ class ClassroomModel(db.Model):
   """Classroom model"""
 
   __tablename__ = 'classroom_table'
+  __table_args__ = (
+    Index('ix_classroom_table_owner_id_created_at', 'owner_id', 'created_at', 'id'),
+  )
 
   # Identifiers
   id: Mapped[str] = mapped_column(
@@ -85,7 +92,7 @@ class ClassroomModel(db.Model):
 
   # Logs
   created_at: Mapped[datetime] = mapped_column(
-    DateTime, nullable=False, default=datetime.utcnow
+    DateTime, nullable=False, default=datetime.utcnow, index=True
   )
   updated_at: Mapped[datetime] = mapped_column(
     DateTime, nullable=False, default=datetime.utcnow
@@ -123,6 +130,32 @@ class ClassroomModel(db.Model):
     """To be used with cache indexing"""
     return '%s(%s)' % (self.__class__.__name__, self.id)
 
+  @classmethod
+  def accessible_by(cls, user_id: str) -> ColumnElement[bool]:
+    """
+    Filter for classrooms the user owns or is a member of
+
+    Parameters
+    ----------
+    `user_id: str`, required
+
+    Examples
+    --------
+    ```py
+      ClassroomModel.query.filter(ClassroomModel.accessible_by(user.id))
+    ```
+    """
+    from .association import classroom_user_association
+
+    return cls.id.in_(
+      union(
+        select(classroom_user_association.classroom_id).where(
+          classroom_user_association.user_id == user_id
+        ),
+        select(cls.id).where(cls.owner_id == user_id),
+      )
+    )
+
   def is_student(self, user: 'UserModel') -> bool:
     """
     Checks if the user is a student in the classroom
@@ -176,7 +209,7 @@ class ClassroomModel(db.Model):
   # Editing
   def add_students(self, *students: 'UserModel') -> None:
     """
-    Add students to the classroom\n
+    Add students to the classroom in a single statement, existing members keep their role\n
     `DOES NOT COMMIT`\n
     `SKIPS IF OWNER`
 
@@ -198,12 +231,18 @@ class ClassroomModel(db.Model):
       add_students(user2, user3)
     ```
     """
-    self.students.extend(students)
+    from .association import classroom_user_association
+
+    self._prepare_roster()
+    classroom_user_association.add_many(
+      ((i.id, self.id) for i in students if i.id != self.owner_id), 'Student'
+    )
+    self._expire_roster(students)
     return None
 
   def remove_students(self, *students: 'UserModel') -> None:
     """
-    Remove students from the classroom\n
+    Remove students from the classroom in a single statement\n
     `DOES NOT COMMIT`
 
 
@@ -224,12 +263,16 @@ class ClassroomModel(db.Model):
       remove_students(user2, user3)
     ```
     """
-    self.students = [i for i in self.students if i not in students]
+    from .association import classroom_user_association
+
+    self._prepare_roster()
+    classroom_user_association.remove_many((i.id for i in students), [self.id], 'Student')
+    self._expire_roster(students)
     return None
 
   def add_educators(self, *educators: 'UserModel') -> None:
     """
-    Add educators to the classroom\n
+    Add educators to the classroom in a single statement, existing students are promoted\n
     `DOES NOT COMMIT`\n
     `SKIPS IF OWNER`
 
@@ -253,13 +296,18 @@ class ClassroomModel(db.Model):
     """
     from .association import classroom_user_association
 
-    for educator in educators:
-      classroom_user_association(classroom=self, user=educator, role='Educator').save()
+    self._prepare_roster()
+    classroom_user_association.add_many(
+      ((i.id, self.id) for i in educators if i.id != self.owner_id),
+      'Educator',
+      replace_role=True,
+    )
+    self._expire_roster(educators)
     return None
 
   def remove_educators(self, *educators: 'UserModel') -> None:
     """
-    Remove educators from the classroom\n
+    Remove educators from the classroom in a single statement\n
     `DOES NOT COMMIT`
 
 
@@ -280,9 +328,25 @@ class ClassroomModel(db.Model):
       remove_educators(user2, user3)
     ```
     """
-    self.educators = [i for i in self.educators if i not in educators]
+    from .association import classroom_user_association
+
+    self._prepare_roster()
+    classroom_user_association.remove_many((i.id for i in educators), [self.id], 'Educator')
+    self._expire_roster(educators)
     return None
 
+  def _prepare_roster(self) -> None:
+    """Flush so roster statements see this classroom and pending collection changes"""
+    db.session.add(self)
+    db.session.flush()
+
+  def _expire_roster(self, users: Iterable['UserModel']) -> None:
+    """Reload collections on next access, roster statements bypass the ORM"""
+    db.session.expire(self, ['members', 'students', 'educators'])
+    for user in users:
+      if user in db.session:
+        db.session.expire(user, ['classrooms'])
+
   def add_textbooks(self, *textbooks: 'TextbookModel') -> None:
     """
     Add textbooks to the classroom\n
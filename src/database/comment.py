@@ -36,9 +36,11 @@ class CommentModel(db.Model):
     default=lambda: uuid.uuid4().hex,
   )
   submission_id: Mapped[str] = mapped_column(
-    ForeignKey('submission_table.id'), nullable=False
+    ForeignKey('submission_table.id'), nullable=False, index=True
+  )
+  author_id: Mapped[str] = mapped_column(
+    ForeignKey('user_table.id'), nullable=False, index=True
   )
-  author_id: Mapped[str] = mapped_column(ForeignKey('user_table.id'), nullable=False)
 
   # Attributes
   text: Mapped[str] = mapped_column(String, nullable=False)
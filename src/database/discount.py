@@ -39,7 +39,7 @@ class DiscountModel(db.Model):
     default=lambda: uuid.uuid4().hex,
   )
   textbook_id: Mapped[Optional[str]] = mapped_column(
-    ForeignKey('textbook_table.id'), nullable=False
+    ForeignKey('textbook_table.id'), nullable=False, index=True
   )
 
   code: Mapped[str] = mapped_column(String, nullable=False)
@@ -39,13 +39,13 @@ class ImageModel(db.Model):
     default=lambda: uuid.uuid4().hex,
   )
   user_id: Mapped[Optional[str]] = mapped_column(
-    ForeignKey('user_table.id'), nullable=True
+    ForeignKey('user_table.id'), nullable=True, index=True
   )
   textbook_id: Mapped[Optional[str]] = mapped_column(
-    ForeignKey('textbook_table.id'), nullable=True
+    ForeignKey('textbook_table.id'), nullable=True, index=True
   )
   classroom_id: Mapped[Optional[str]] = mapped_column(
-    ForeignKey('classroom_table.id'), nullable=True
+    ForeignKey('classroom_table.id'), nullable=True, index=True
   )
 
   uri: Mapped[str] = mapped_column(String, nullable=True)
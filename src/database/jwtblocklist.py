@@ -4,26 +4,143 @@ Stores revoked tokens
 
 from src import db
 from src.utils.ext import utc_time
+from src.utils.ext.bloom_filter import BloomFilter
 
+import time
+import threading
 from datetime import datetime, timedelta
-from typing import Union, Literal
+from typing import Optional, Union, Literal
 
+from flask import current_app
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import (
-  or_,
   Enum,
+  Index,
   String,
   DateTime,
+  event,
+  delete,
+  select,
 )
 
 JWTType = Literal['access', 'refresh']
 EnumJWTType = Enum('access', 'refresh', name='JWTType')
 
 
+class BlocklistIndex:
+  """
+  Process-local bloom filter over revoked jtis
+
+  A miss means the token is definitely not revoked and the database is skipped,
+  a hit has to be confirmed against jwtblocklist_table.\n
+  Rows written by other workers are pulled in every `sync_interval` seconds
+
+  `REVOCATION WINDOW`\n
+  A token revoked on another worker is still accepted here until the next sync,
+  up to `sync_interval` seconds. Each sync is one indexed query per worker,
+  a `sync_interval` of 0 syncs before every check and closes the window
+  """
+
+  # Re-read rows this far behind the last sync to catch slow commits
+  _overlap = timedelta(seconds=30)
+
+  _bloom: Optional[BloomFilter]
+  _lock: threading.RLock
+  _synced_at: datetime
+  _checked_at: float
+
+  sync_interval: float
+
+  def __init__(self, sync_interval: float = 5) -> None:
+    """
+    Parameters
+    ----------
+    `sync_interval: float`, optional (defaults to 5)
+      Seconds between pulling newly revoked tokens from the database
+    """
+    self._bloom = None
+    self._lock = threading.RLock()
+    self._synced_at = datetime.min
+    self._checked_at = 0.0
+    self.sync_interval = sync_interval
+
+  def rebuild(self) -> None:
+    """Reload every revoked jti from the database"""
+    with self._lock:
+      synced_at = utc_time.get()
+      jtis = db.session.scalars(select(JWTBlocklistModel.jti)).all()
+
+      self._bloom = BloomFilter(capacity=max(1024, len(jtis) * 2), items=jtis)
+      self._synced_at = synced_at
+      self._checked_at = time.monotonic()
+
+  def _sync(self) -> None:
+    """Pull tokens revoked since the last sync"""
+    synced_at = utc_time.get()
+    jtis = db.session.scalars(
+      select(JWTBlocklistModel.jti).where(
+        JWTBlocklistModel.created_at >= self._synced_at - self._overlap
+      )
+    ).all()
+
+    for jti in jtis:
+      self.add(jti)
+
+    self._synced_at = synced_at
+    self._checked_at = time.monotonic()
+
+  def add(self, jti: str) -> None:
+    """
+    Add a revoked jti
+
+    Parameters
+    ----------
+    `jti: str`, required
+    """
+    with self._lock:
+      if self._bloom is None:
+        return
+
+      self._bloom.add(jti)
+      if self._bloom.is_full:
+        self._bloom = None
+
+  def reset(self) -> None:
+    """Force a rebuild on next lookup"""
+    with self._lock:
+      self._bloom = None
+
+  def might_contain(self, jti: str) -> bool:
+    """
+    Check if a jti may be revoked
+
+    Parameters
+    ----------
+    `jti: str`, required
+
+    Returns
+    -------
+    `False` if the jti is definitely not revoked
+    """
+    with self._lock:
+      if self._bloom is None:
+        self.rebuild()
+      elif time.monotonic() - self._checked_at >= self.sync_interval:
+        self._sync()
+
+      return jti in self._bloom  # type: ignore
+
+
+blocklist_index = BlocklistIndex()
+
+
 class JWTBlocklistModel(db.Model):
   """Stores revoked tokens"""
 
   __tablename__ = 'jwtblocklist_table'
+  __table_args__ = (
+    Index('ix_jwtblocklist_table_token_type_created_at', 'token_type', 'created_at'),
+  )
 
   jti: Mapped[str] = mapped_column(
     String, primary_key=True, unique=True, nullable=False
@@ -54,43 +171,85 @@ class JWTBlocklistModel(db.Model):
     db.session.add(self)
     db.session.commit()
 
-  def save_with_cleanup(self) -> None:
-    """
-    Commits self to the database\n
-    Also invokes cleanup on expired tokens
-    """
-    self.__class__.clear_expired()
-    db.session.add(self)
-    db.session.commit()
-
   def delete(self) -> None:
     """Deletes the model and its references"""
     db.session.delete(self)
     db.session.commit()
+    blocklist_index.reset()
+
+  @classmethod
+  def is_revoked(cls, jti: str) -> bool:
+    """
+    Check if a jti has been revoked\n
+    Only queries the database when the blocklist index reports a hit
+
+    Parameters
+    ----------
+    `jti: str`, required
+    """
+    if not blocklist_index.might_contain(jti):
+      return False
+    return db.session.get(cls, jti) is not None
 
   @classmethod
   def clear_expired(
     cls,
-    access_live_time: Union[str, int, float] = '1week',
-    refresh_live_time: Union[str, int, float] = '1week1',
-  ) -> None:
+    access_live_time: Optional[Union[str, int, float, timedelta]] = None,
+    refresh_live_time: Optional[Union[str, int, float, timedelta]] = None,
+    batch_size: int = 1000,
+  ) -> int:
+    """
+    Deletes revoked tokens that have outlived their token, in batches
+
+    Each batch is a range scan over `(token_type, created_at)` and is committed
+    on its own so locks are never held for long
+
+    Parameters
+    ----------
+    `access_live_time: str | int | float | timedelta`, optional (defaults to JWT_ACCESS_TOKEN_EXPIRES)
+
+    `refresh_live_time: str | int | float | timedelta`, optional (defaults to JWT_REFRESH_TOKEN_EXPIRES)
+
+    `batch_size: int`, optional (defaults to 1000)
+      Rows deleted per statement
+
+    Returns
+    -------
+    `purged: int`
+    """
+    live_times: dict[JWTType, Union[str, int, float, timedelta]] = {
+      'access': access_live_time or current_app.config.get('JWT_ACCESS_TOKEN_EXPIRES', '15m'),
+      'refresh': refresh_live_time or current_app.config.get('JWT_REFRESH_TOKEN_EXPIRES', '30d'),
+    }
+
     now = utc_time.get()
-    access_lowest_limit = now - timedelta(
-      seconds=utc_time.convertToTime(access_live_time)
-    )
-    refresh_lowest_limit = now - timedelta(
-      seconds=utc_time.convertToTime(refresh_live_time)
-    )
-
-    cls.query.filter(
-      or_(
-        (
-          cls.token_type.like('access')
-          and cls.created_at.timestamp() <= access_lowest_limit.timestamp()
-        ),
-        (
-          cls.token_type.like('refresh')
-          and cls.created_at.timestamp() <= refresh_lowest_limit.timestamp()
-        ),
-      )
-    ).delete()
+    purged = 0
+
+    for token_type, live_time in live_times.items():
+      if not isinstance(live_time, timedelta):
+        live_time = timedelta(seconds=utc_time.convertToTime(live_time))
+
+      expired = select(cls.jti).where(
+        cls.token_type == token_type, cls.created_at <= now - live_time
+      ).limit(batch_size)
+
+      while True:
+        deleted = db.session.execute(
+          delete(cls).where(cls.jti.in_(expired)),
+          execution_options={'synchronize_session': False},
+        ).rowcount
+        db.session.commit()
+
+        purged += deleted
+        if deleted < batch_size:
+          break
+
+    if purged:
+      blocklist_index.reset()
+    return purged
+
+
+@event.listens_for(JWTBlocklistModel, 'after_insert')
+def _index_revoked(mapper, connection, target: JWTBlocklistModel) -> None:
+  """Keep the blocklist index in sync with every insert, including bulk logout adds"""
+  blocklist_index.add(target.jti)
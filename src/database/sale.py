@@ -11,7 +11,7 @@ from functools import cached_property
 from typing import Optional, Literal, List, Dict, TYPE_CHECKING, overload
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Enum, Float, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Enum, Index, Float, String, Boolean, DateTime, ForeignKey
 
 
 # Import at runtime to prevent circular imports
@@ -36,6 +36,10 @@ class SaleModel(db.Model):
   """Sale Model"""
 
   __tablename__ = 'sale_table'
+  __table_args__ = (
+    # `UserModel.transactions` and `UserModel.pending_transactions`
+    Index('ix_sale_table_user_id_paid', 'user_id', 'paid'),
+  )
 
   # Identifiers
   id: Mapped[str] = mapped_column(
@@ -47,17 +51,22 @@ class SaleModel(db.Model):
   )
   user_id: Mapped[str] = mapped_column(ForeignKey('user_table.id'), nullable=False)
   discount_id: Mapped[Optional[str]] = mapped_column(
-    ForeignKey('discount_table.id'), nullable=True
+    ForeignKey('discount_table.id'), nullable=True, index=True
   )
 
   # Stripe IDs
-  session_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-  subscription_id: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+  session_id: Mapped[Optional[str]] = mapped_column(String, nullable=True, index=True)
+  subscription_id: Mapped[Optional[str]] = mapped_column(
+    String, nullable=True, index=True
+  )
 
   # Attributes
   type: Mapped[SaleType] = mapped_column(EnumSaleType, nullable=False)
-  paid: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
-  total_cost: Mapped[float] = mapped_column(Float, nullable=False)
+  # Old values are loaded on change for the revenue rollup
+  paid: Mapped[bool] = mapped_column(
+    Boolean, nullable=False, default=False, active_history=True
+  )
+  total_cost: Mapped[float] = mapped_column(Float, nullable=False, active_history=True)
 
   user: Mapped['UserModel'] = relationship('UserModel')
   used_discount: Mapped[Optional['DiscountModel']] = relationship(
@@ -70,7 +79,7 @@ class SaleModel(db.Model):
   # Logs
   paid_at: Mapped[datetime] = mapped_column(DateTime, nullable=True)
   created_at: Mapped[datetime] = mapped_column(
-    DateTime, nullable=False, default=datetime.utcnow
+    DateTime, nullable=False, default=datetime.utcnow, index=True
   )
 
   @overload
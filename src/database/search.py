@@ -0,0 +1,270 @@
+"""
+Textbook search index
+
+Full-text index over the title, description, categories and author username,
+kept up to date after each flush
+"""
+
+from src import db
+from .user import UserModel
+from .textbook import TextbookModel
+from .category import CategoryModel
+from .association import textbook_category_association
+
+import re
+from typing import Optional
+
+from sqlalchemy.orm import Session
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import Subquery
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy import (
+  event,
+  func,
+  text,
+  table,
+  column,
+  select,
+  insert,
+  delete,
+  inspect,
+  literal_column,
+)
+
+
+class TextbookSearchIndex:
+  """
+  Textbook search index
+
+  Postgres stores a weighted `tsvector` behind a GIN index and SQLite uses an FTS5 table,
+  both under the same table name. Other dialects fall back to `LIKE`
+
+  Examples
+  --------
+  ```py
+    hits = textbook_search.match('linear alg')
+    TextbookModel.query.join(hits, hits.c.textbook_id == TextbookModel.id).order_by(hits.c.rank)
+  ```
+  """
+
+  tablename = 'textbook_search_table'
+  config = literal_column("'english'::regconfig")
+
+  max_terms: int = 8
+  """Words past this are ignored"""
+
+  schema: dict[str, tuple[str, ...]] = {
+    'postgresql': (
+      f'CREATE TABLE IF NOT EXISTS {tablename} (textbook_id VARCHAR PRIMARY KEY, document TSVECTOR NOT NULL)',
+      f'CREATE INDEX IF NOT EXISTS ix_{tablename}_document ON {tablename} USING GIN (document)',
+    ),
+    'sqlite': (
+      f'CREATE VIRTUAL TABLE IF NOT EXISTS {tablename} USING fts5('
+      "textbook_id UNINDEXED, title, description, categories, author, tokenize = 'unicode61 remove_diacritics 2')",
+    ),
+  }
+
+  _postgres = table(tablename, column('textbook_id'), column('document'))
+  _sqlite = table(
+    tablename,
+    column('textbook_id'),
+    column('title'),
+    column('description'),
+    column('categories'),
+    column('author'),
+  )
+
+  def supports(self, dialect: str) -> bool:
+    return dialect in self.schema
+
+  def create(self, connection: Connection) -> None:
+    """
+    Create and fill the index if it does not exist yet
+
+    Parameters
+    ----------
+    `connection: Connection`, required
+    """
+    dialect = connection.dialect.name
+    if not self.supports(dialect) or inspect(connection).has_table(self.tablename):
+      return
+
+    for statement in self.schema[dialect]:
+      connection.execute(text(statement))
+    self.reindex(connection)
+
+  def reindex(self, connection: Connection, where: Optional[ColumnElement[bool]] = None) -> None:
+    """
+    Rewrite the index rows of matching textbooks, does not commit
+
+    Parameters
+    ----------
+    `connection: Connection`, required
+
+    `where: ColumnElement[bool]`, optional (defaults to None)
+      Filter on the textbook and author, else every textbook is reindexed
+    """
+    dialect = connection.dialect.name
+    if not self.supports(dialect):
+      return
+
+    target = self._postgres if dialect == 'postgresql' else self._sqlite
+    source = select(TextbookModel.id).join(UserModel, TextbookModel.author_id == UserModel.id)
+    if where is not None:
+      source = source.where(where)
+
+    connection.execute(
+      delete(target)
+      if where is None
+      else delete(target).where(target.c.textbook_id.in_(source))
+    )
+
+    aggregate = func.string_agg if dialect == 'postgresql' else func.group_concat
+    categories = (
+      select(aggregate(CategoryModel.name, ' '))
+      .join(textbook_category_association, textbook_category_association.c.category_id == CategoryModel.id)
+      .where(textbook_category_association.c.textbook_id == TextbookModel.id)
+      .scalar_subquery()
+    )
+
+    if dialect == 'postgresql':
+      def weighted(value, weight: str):
+        return func.setweight(func.to_tsvector(self.config, func.coalesce(value, '')), weight)
+
+      document = (
+        weighted(TextbookModel.title, 'A')
+        .op('||')(weighted(UserModel.username, 'B'))
+        .op('||')(weighted(categories, 'B'))
+        .op('||')(weighted(TextbookModel.description, 'C'))
+      )
+      rows = source.add_columns(document)
+    else:
+      rows = source.add_columns(
+        TextbookModel.title,
+        TextbookModel.description,
+        categories,
+        UserModel.username,
+      )
+
+    connection.execute(insert(target).from_select(list(target.c.keys()), rows))
+
+  def remove(self, connection: Connection, textbook_id: str) -> None:
+    """
+    Drop a textbook from the index, does not commit
+
+    Parameters
+    ----------
+    `connection: Connection`, required
+
+    `textbook_id: str`, required
+    """
+    dialect = connection.dialect.name
+    if not self.supports(dialect):
+      return
+
+    target = self._postgres if dialect == 'postgresql' else self._sqlite
+    connection.execute(delete(target).where(target.c.textbook_id == textbook_id))
+
+  def rebuild(self) -> int:
+    """
+    Reindex every textbook and commit
+
+    Returns
+    -------
+    `textbooks: int`
+      The number of textbooks indexed
+    """
+    connection = db.session.connection()
+    if not self.supports(connection.dialect.name):
+      return 0
+
+    self.create(connection)
+    self.reindex(connection)
+    db.session.commit()
+    return db.session.scalar(select(func.count()).select_from(TextbookModel)) or 0
+
+  def match(self, query: str) -> Optional[Subquery]:
+    """
+    Textbooks matching every word of the query, each word matched as a prefix
+
+    Parameters
+    ----------
+    `query: str`, required
+
+    Returns
+    -------
+    `hits: Subquery | None`
+      Columns `textbook_id` and `rank`, where a lower rank is more relevant.
+      None if the query has no words or the dialect has no index
+    """
+    terms = re.findall(r'\w+', query.lower())[: self.max_terms]
+    dialect = db.session.get_bind().dialect.name
+    if not terms or not self.supports(dialect):
+      return None
+
+    if dialect == 'postgresql':
+      target = self._postgres
+      tsquery = func.to_tsquery(self.config, ' & '.join(f'{term}:*' for term in terms))
+
+      return (
+        select(target.c.textbook_id, (-func.ts_rank(target.c.document, tsquery)).label('rank'))
+        .where(target.c.document.op('@@')(tsquery))
+        .subquery()
+      )
+
+    # bm25 weights follow the column order: textbook_id, title, description, categories, author
+    target = self._sqlite
+    fts = literal_column(self.tablename)
+    return (
+      select(target.c.textbook_id, func.bm25(fts, 0, 10, 1, 4, 4).label('rank'))
+      .where(fts.op('MATCH')(' '.join(f'"{term}"*' for term in terms)))
+      .subquery()
+    )
+
+
+textbook_search = TextbookSearchIndex()
+
+
+# Schema
+@event.listens_for(db.metadata, 'after_create')
+def _create_index(target, connection: Connection, **kwargs) -> None:
+  textbook_search.create(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def _drop_index(target, connection: Connection, **kwargs) -> None:
+  if textbook_search.supports(connection.dialect.name):
+    connection.execute(text(f'DROP TABLE IF EXISTS {textbook_search.tablename}'))
+
+
+# Incremental updates, run after the flush so category links are written,
+# and on the same transaction so they commit with the change
+_indexed = ('title', 'description', 'author_id', 'categories')
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_index(session: Session, context) -> None:
+  changed: set[str] = set()
+  renamed: set[str] = set()
+
+  for target in session.new | session.dirty:
+    if isinstance(target, TextbookModel):
+      state = inspect(target)
+      if target in session.new or any(state.attrs[i].history.has_changes() for i in _indexed):
+        changed.add(target.id)
+
+    elif isinstance(target, UserModel) and target not in session.new:
+      if inspect(target).attrs.username.history.has_changes():
+        renamed.add(target.id)
+
+  deleted = [i.id for i in session.deleted if isinstance(i, TextbookModel)]
+  if not (changed or renamed or deleted):
+    return
+
+  connection = session.connection()
+  for textbook_id in deleted:
+    textbook_search.remove(connection, textbook_id)
+  if changed:
+    textbook_search.reindex(connection, TextbookModel.id.in_(changed))
+  if renamed:
+    textbook_search.reindex(connection, TextbookModel.author_id.in_(renamed))
@@ -0,0 +1,202 @@
+"""
+Statistic Model
+
+Daily rollup of admin statistics, kept up to date by mapper events
+"""
+
+from src import db
+from .user import UserModel
+from .sale import SaleModel
+from .textbook import TextbookModel
+
+from datetime import date, datetime
+from typing import Any, Iterable, Literal, Optional
+
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.engine import Connection
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy import (
+  Enum,
+  Date,
+  Float,
+  event,
+  select,
+  update,
+  delete,
+  func,
+  inspect,
+)
+
+StatisticMetric = Literal['users', 'textbooks', 'revenue']
+EnumStatisticMetric = Enum('users', 'textbooks', 'revenue', name='StatisticMetric')
+
+
+class StatisticModel(db.Model):
+  """
+  Statistic Model
+
+  One row per day per metric
+  """
+
+  __tablename__ = 'statistic_table'
+
+  day: Mapped[date] = mapped_column(Date, primary_key=True, nullable=False)
+  metric: Mapped[StatisticMetric] = mapped_column(
+    EnumStatisticMetric, primary_key=True, nullable=False
+  )
+  value: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
+
+  def __init__(self, day: date, metric: StatisticMetric, value: float = 0.0) -> None:
+    """
+    Statistic Model
+
+    Parameters
+    ----------
+    `day: date`, required
+
+    `metric: users | textbooks | revenue`, required
+
+    `value: float`, optional (defaults to 0.0)
+    """
+    self.day = day
+    self.metric = metric
+    self.value = value
+
+  def __repr__(self) -> str:
+    return '%s(%s, %s)' % (self.__class__.__name__, self.day, self.metric)
+
+  @classmethod
+  def increment(
+    cls,
+    metric: StatisticMetric,
+    amount: float = 1,
+    day: Optional[date | datetime] = None,
+    connection: Optional[Connection] = None,
+  ) -> None:
+    """
+    Add to a day's counter with a single upsert, does not commit
+
+    Parameters
+    ----------
+    `metric: users | textbooks | revenue`, required
+
+    `amount: float`, optional (defaults to 1)
+      Negative to decrement
+
+    `day: date | datetime`, optional (defaults to today)
+
+    `connection: Connection`, optional (defaults to the session)
+      Pass the flush connection when called from a mapper event
+    """
+    if isinstance(day, datetime):
+      day = day.date()
+    day = day or datetime.utcnow().date()
+
+    executor = connection if connection is not None else db.session
+    cls._upsert(executor, [{'day': day, 'metric': metric, 'value': float(amount)}])
+
+  @classmethod
+  def _upsert(cls, executor: Any, rows: list[dict[str, Any]]) -> None:
+    """Add each row's value onto the existing counter, inserting it if missing"""
+    if not rows:
+      return
+
+    table = cls.__table__
+    dialect = (
+      executor.dialect.name if isinstance(executor, Connection) else executor.get_bind().dialect.name
+    )
+
+    if dialect in ('postgresql', 'sqlite'):
+      insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+      stmt = insert(table).values(rows)
+      executor.execute(
+        stmt.on_conflict_do_update(
+          index_elements=[table.c.day, table.c.metric],
+          set_={'value': table.c.value + stmt.excluded.value},
+        )
+      )
+      return
+
+    # Fallback for dialects without ON CONFLICT
+    for row in rows:
+      updated = executor.execute(
+        update(table)
+        .where(table.c.day == row['day'], table.c.metric == row['metric'])
+        .values(value=table.c.value + row['value'])
+      )
+      if not updated.rowcount:
+        executor.execute(table.insert().values(**row))
+
+  @classmethod
+  def rebuild(cls) -> int:
+    """
+    Recompute every counter from the source tables and commit
+
+    Returns
+    -------
+    `rows: int`
+      The number of rollup rows written
+    """
+    sources: Iterable[tuple[StatisticMetric, Any, Any, Any]] = (
+      ('users', UserModel, func.count(), None),
+      ('textbooks', TextbookModel, func.count(), None),
+      ('revenue', SaleModel, func.sum(SaleModel.total_cost), SaleModel.paid.is_(True)),
+    )
+
+    rows: list[dict[str, Any]] = []
+    for metric, model, value, where in sources:
+      day = func.date(model.created_at)
+      stmt = select(day, value).group_by(day)
+      if where is not None:
+        stmt = stmt.where(where)
+
+      for d, v in db.session.execute(stmt):
+        rows.append({
+          'day': d if isinstance(d, date) else date.fromisoformat(str(d)),
+          'metric': metric,
+          'value': float(v or 0),
+        })
+
+    db.session.execute(delete(cls))
+    cls._upsert(db.session, rows)
+    db.session.commit()
+    return len(rows)
+
+
+# Incremental updates, run on the flush connection so they commit with the change
+def _counter(metric: StatisticMetric, sign: int):
+  def listener(mapper, connection: Connection, target: UserModel | TextbookModel) -> None:
+    StatisticModel.increment(metric, sign, target.created_at, connection)
+  return listener
+
+event.listen(UserModel, 'after_insert', _counter('users', 1))
+event.listen(UserModel, 'after_delete', _counter('users', -1))
+event.listen(TextbookModel, 'after_insert', _counter('textbooks', 1))
+event.listen(TextbookModel, 'after_delete', _counter('textbooks', -1))
+
+
+@event.listens_for(SaleModel, 'after_insert')
+def _revenue_insert(mapper, connection: Connection, target: SaleModel) -> None:
+  if target.paid:
+    StatisticModel.increment('revenue', target.total_cost, target.created_at, connection)
+
+
+@event.listens_for(SaleModel, 'after_update')
+def _revenue_update(mapper, connection: Connection, target: SaleModel) -> None:
+  """Picks up the webhook marking a sale as paid, and cost changes on paid sales"""
+  state = inspect(target)
+  paid = state.attrs.paid.history
+  cost = state.attrs.total_cost.history
+
+  was_paid = paid.deleted[0] if paid.deleted else target.paid
+  old_cost = cost.deleted[0] if cost.deleted else target.total_cost
+
+  amount = (target.total_cost if target.paid else 0) - (old_cost if was_paid else 0)
+  if amount:
+    StatisticModel.increment('revenue', amount, target.created_at, connection)
+
+
+@event.listens_for(SaleModel, 'after_delete')
+def _revenue_delete(mapper, connection: Connection, target: SaleModel) -> None:
+  if target.paid:
+    StatisticModel.increment('revenue', -target.total_cost, target.created_at, connection)
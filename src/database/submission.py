@@ -13,6 +13,7 @@ from sqlalchemy import (
   String,
   DateTime,
   ForeignKey,
+  Index,
 )
 
 
@@ -28,6 +29,9 @@ class SubmissionModel(db.Model):
   """Submission Model"""
 
   __tablename__ = 'submission_table'
+  __table_args__ = (
+    Index('ix_submission_table_student_id_created_at', 'student_id', 'created_at', 'id'),
+  )
 
   # Identifiers
   id: Mapped[str] = mapped_column(
@@ -39,7 +43,7 @@ class SubmissionModel(db.Model):
   )
   student_id: Mapped[str] = mapped_column(ForeignKey('user_table.id'), nullable=False)
   assignment_id: Mapped[str] = mapped_column(
-    ForeignKey('assignment_table.id'), nullable=False
+    ForeignKey('assignment_table.id'), nullable=False, index=True
   )
 
   # Attributes
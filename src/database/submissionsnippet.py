@@ -8,7 +8,7 @@ from src.service.cdn_provider import deleteFile, uploadSubmission
 import uuid
 from thread import Thread
 from datetime import datetime
-from typing import TYPE_CHECKING, Literal
+from typing import TYPE_CHECKING, Literal, Optional
 from werkzeug.datastructures import FileStorage
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -17,6 +17,8 @@ from sqlalchemy import (
   String,
   DateTime,
   ForeignKey,
+  and_,
+  select,
 )
 
 
@@ -36,15 +38,21 @@ class SubmissionSnippetModel(db.Model):
   __tablename__ = 'submission_snippet_table'
 
   id: Mapped[str] = mapped_column(
-    String, primary_key=True, unique=True, nullable=False, default=lambda: uuid.uuid4()
+    String, primary_key=True, unique=True, nullable=False, default=lambda: uuid.uuid4().hex
+  )
+  student_id: Mapped[str] = mapped_column(
+    ForeignKey('user_table.id'), nullable=False, index=True
   )
-  student_id: Mapped[str] = mapped_column(ForeignKey('user_table.id'), nullable=False)
   submission_id: Mapped[str] = mapped_column(
-    ForeignKey('submission_table.id'), nullable=False
+    ForeignKey('submission_table.id'), nullable=False, index=True
   )
 
   uri: Mapped[str] = mapped_column(String, nullable=True)
   iuri: Mapped[str] = mapped_column(String, nullable=True)
+  # Last segment of the iuri, what `/public/submission/<public_key>` is served by
+  public_key: Mapped[Optional[str]] = mapped_column(
+    String, nullable=True, unique=True, index=True
+  )
   status: Mapped[SnippetUploadStatus] = mapped_column(
     EnumSnippetUploadStatus, nullable=False, default='Uploading'
   )
@@ -71,6 +79,7 @@ class SubmissionSnippetModel(db.Model):
 
     `upload: FileStorage`, required
     """
+    self.id = uuid.uuid4().hex
     self.student_id = student.id
     self.submission_id = submission.id
     self._handle_upload(upload)
@@ -79,12 +88,58 @@ class SubmissionSnippetModel(db.Model):
     """To be used with cache indexing"""
     return '%s(%s)' % (self.__class__.__name__, self.id)
 
+  @classmethod
+  def can_view(cls, user_id: str, public_key: str) -> Optional[bool]:
+    """
+    Whether the user submitted the snippet or is privileged in its classroom
+
+    Resolved with one query from the public key index through the submission,
+    assignment and classroom, joined to the user's membership
+
+    Parameters
+    ----------
+    `user_id: str`, required
+
+    `public_key: str`, required
+
+    Returns
+    -------
+    `allowed: bool | None`
+      None if no snippet has the key
+    """
+    from .submission import SubmissionModel
+    from .assignment import AssignmentModel
+    from .classroom import ClassroomModel
+    from .association import classroom_user_association
+
+    row = db.session.execute(
+      select(cls.student_id, ClassroomModel.owner_id, classroom_user_association.role)
+      .join(SubmissionModel, SubmissionModel.id == cls.submission_id)
+      .join(AssignmentModel, AssignmentModel.id == SubmissionModel.assignment_id)
+      .join(ClassroomModel, ClassroomModel.id == AssignmentModel.classroom_id)
+      .outerjoin(
+        classroom_user_association,
+        and_(
+          classroom_user_association.classroom_id == ClassroomModel.id,
+          classroom_user_association.user_id == user_id,
+        ),
+      )
+      .where(cls.public_key == public_key)
+      .limit(1)
+    ).first()
+    if row is None:
+      return None
+
+    studentId, ownerId, role = row
+    return user_id in (studentId, ownerId) or role in ('Owner', 'Educator')
+
   def _handle_upload(self, upload: FileStorage) -> None:
     filename = f'{self.id}-{self.student_id or ""}{self.submission_id}'
     filePath = uploadSubmission(upload, filename)
 
     self.iuri = filePath
-    self.uri = f'/public/textbook/{filePath.split("/")[-1]}'
+    self.public_key = filePath.split('/')[-1]
+    self.uri = f'/public/submission/{self.public_key}'
     self.status = 'Uploaded'
     self.save()
 
@@ -4,6 +4,8 @@ Textbook Model
 
 from src import db
 from src.service.cdn_provider import uploadTextbook, deleteFile
+from src.utils.ext.cache import TTLCache
+from .category import CategoryModel
 
 import uuid
 from thread import Thread
@@ -12,7 +14,8 @@ from typing import Optional, TYPE_CHECKING, List, Literal
 from werkzeug.datastructures import FileStorage
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import Enum, Float, String, DateTime, ForeignKey
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy import Enum, Float, String, DateTime, ForeignKey, and_, select, union
 
 # Import at runtime to prevent circular imports
 if TYPE_CHECKING:
@@ -24,6 +27,7 @@ if TYPE_CHECKING:
   from .assignment import AssignmentModel
   from .association import (
     user_textbook_association,
+    textbook_category_association,
     classroom_textbook_association,
     assignment_textbook_association,
     sale_textbook_association,
@@ -36,6 +40,10 @@ EnumTextbookStatus = Enum('Available', 'Unavailable', 'DMCA', name='TextbookStat
 TextbookUploadStatus = Literal['Uploading', 'Uploaded']
 EnumTextbookUploadStatus = Enum('Uploading', 'Uploaded', name='TextbookUploadStatus')
 
+# Granted downloads keyed by (user id, uri), denials are not cached so purchases apply at once
+# Configured in init_app with TEXTBOOK_ACCESS_CACHE_TTL and TEXTBOOK_ACCESS_CACHE_SIZE
+access_cache: TTLCache[tuple[str, str], bool] = TTLCache(ttl=30, maxsize=4096)
+
 
 class TextbookModel(db.Model):
   """Textbook Model"""
@@ -50,14 +58,23 @@ class TextbookModel(db.Model):
     nullable=False,
     default=lambda: uuid.uuid4().hex,
   )
-  author_id: Mapped[str] = mapped_column(ForeignKey('user_table.id'), nullable=False)
+  author_id: Mapped[str] = mapped_column(
+    ForeignKey('user_table.id'), nullable=False, index=True
+  )
 
   # Attributes
   title: Mapped[str] = mapped_column(String, nullable=False)
   description: Mapped[str] = mapped_column(String, nullable=True, default='')
-  categories: Mapped[str] = mapped_column(
-    String, nullable=False, default=''
-  )  # 'category1|category2...'
+  categories: Mapped[List['CategoryModel']] = relationship(
+    'CategoryModel',
+    secondary='textbook_category_association',
+    back_populates='textbooks',
+    order_by='CategoryModel.name',
+  )
+  # Pipe-joined 'category1|category2' from before the category table, emptied by migration 0006
+  legacy_categories: Mapped[str] = mapped_column(
+    'categories', String, nullable=False, default=''
+  )
   price: Mapped[float] = mapped_column(Float, nullable=False, default=0.0)
 
   author: Mapped['UserModel'] = relationship(
@@ -83,7 +100,7 @@ class TextbookModel(db.Model):
     'sale_textbook_association', back_populates='textbook'
   )
 
-  uri: Mapped[str] = mapped_column(String, nullable=True)
+  uri: Mapped[str] = mapped_column(String, nullable=True, index=True)
   iuri: Mapped[str] = mapped_column(String, nullable=True)
   status: Mapped[TextbookStatus] = mapped_column(
     EnumTextbookStatus, nullable=False, default='Available'
@@ -97,7 +114,7 @@ class TextbookModel(db.Model):
 
   # Logs
   created_at: Mapped[datetime] = mapped_column(
-    DateTime, nullable=False, default=datetime.utcnow
+    DateTime, nullable=False, default=datetime.utcnow, index=True
   )
   updated_at: Mapped[datetime] = mapped_column(
     DateTime, nullable=False, default=datetime.utcnow
@@ -142,7 +159,7 @@ class TextbookModel(db.Model):
     self.author_id = author.id
     self.title = title
     self.description = description
-    self.categories = '|'.join(categories)
+    self.categories = CategoryModel.resolve(categories)
 
     self.price = price
     self.discount = discount
@@ -152,6 +169,100 @@ class TextbookModel(db.Model):
     """To be used with cache indexing"""
     return '%s(%s)' % (self.__class__.__name__, self.id)
 
+  @property
+  def category_names(self) -> List[str]:
+    return [i.name for i in self.categories]
+
+  @classmethod
+  def in_categories(cls, names: List[str]) -> ColumnElement[bool]:
+    """
+    Filter for textbooks tagged with any of the categories
+
+    Parameters
+    ----------
+    `names: list[str]`, required
+    """
+    from .association import textbook_category_association
+
+    return cls.id.in_(
+      select(textbook_category_association.c.textbook_id)
+      .join(CategoryModel, CategoryModel.id == textbook_category_association.c.category_id)
+      .where(CategoryModel.name.in_(CategoryModel.clean(names)))
+    )
+
+  @classmethod
+  def owned_by(cls, user_id: str) -> ColumnElement[bool]:
+    """
+    Filter for textbooks the user has bought or authored
+
+    Built as a `UNION` of the two id lookups so both sides can use their own index
+
+    Parameters
+    ----------
+    `user_id: str`, required
+
+    Examples
+    --------
+    ```py
+      TextbookModel.query.filter(TextbookModel.owned_by(user.id)).paginate(page=1)
+    ```
+    """
+    from .association import user_textbook_association
+
+    return cls.id.in_(
+      union(
+        select(user_textbook_association.c.textbook_id).where(
+          user_textbook_association.c.user_id == user_id
+        ),
+        select(cls.id).where(cls.author_id == user_id),
+      )
+    )
+
+  @classmethod
+  def can_download(cls, user_id: str, uri: str) -> Optional[bool]:
+    """
+    Whether the user has bought or authored the textbook stored at `uri`
+
+    One lookup on the uri index joined to the user's purchase, so the cost
+    does not grow with the size of their library
+
+    Parameters
+    ----------
+    `user_id: str`, required
+
+    `uri: str`, required
+      e.g. `/public/textbook/<identifier>`
+
+    Returns
+    -------
+    `allowed: bool | None`
+      None if no textbook is stored at `uri`
+    """
+    from .association import user_textbook_association
+
+    if access_cache.get((user_id, uri)):
+      return True
+
+    row = db.session.execute(
+      select(cls.author_id, user_textbook_association.c.user_id)
+      .outerjoin(
+        user_textbook_association,
+        and_(
+          user_textbook_association.c.textbook_id == cls.id,
+          user_textbook_association.c.user_id == user_id,
+        ),
+      )
+      .where(cls.uri == uri)
+      .limit(1)
+    ).first()
+    if row is None:
+      return None
+
+    allowed = (row[0] == user_id) or (row[1] is not None)
+    if allowed:
+      access_cache.set((user_id, uri), True)
+    return allowed
+
   def _upload_handler(self, file: FileStorage) -> None:
     """Threaded background upload process"""
     self.upload_status = 'Uploading'
@@ -172,6 +283,7 @@ class TextbookModel(db.Model):
   def delete(self) -> None:
     """Deletes the model and its references"""
     Thread(deleteFile, args=[self.iuri]).start()
+    access_cache.invalidate_where(lambda key: key[1] == self.uri)
 
     if self.cover_image:
       self.cover_image.delete()
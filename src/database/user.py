@@ -4,13 +4,14 @@ User Model
 
 from src import db
 from src.utils import passwords
+from src.utils.ext.cache import TTLCache
 
 import uuid
-from functools import cache, cached_property
+from functools import cached_property
 from datetime import datetime
-from typing import Literal, List, Optional, TYPE_CHECKING
+from typing import Any, Iterable, Literal, List, Optional, TYPE_CHECKING
 
-from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.orm import Mapped, mapped_column, relationship, make_transient_to_detached
 from sqlalchemy import Enum, String, Boolean, DateTime
 
 
@@ -45,6 +46,14 @@ EnumMembershipType = Enum('Free', 'Unlimited', name='MembershipType')
 ClassroomMemberType = Literal['Student', 'Educator', 'Owner']
 
 
+# Column snapshots of recently authenticated users, keyed by user id
+# Configured in init_app with USER_CACHE_TTL and USER_CACHE_SIZE
+identity_cache: TTLCache[str, dict[str, Any]] = TTLCache(ttl=30, maxsize=1024)
+
+# Column snapshots of query_by results, keyed by the filter
+query_cache: TTLCache[tuple[tuple[str, Any], ...], list[dict[str, Any]]] = TTLCache(ttl=30, maxsize=256)
+
+
 class ClassroomMember:
   """ClassroomMember"""
 
@@ -146,7 +155,7 @@ class UserModel(db.Model):
 
   # Logs
   created_at: Mapped[datetime] = mapped_column(
-    DateTime, nullable=False, default=datetime.utcnow
+    DateTime, nullable=False, default=datetime.utcnow, index=True
   )
   last_login: Mapped[datetime] = mapped_column(
     DateTime, nullable=False, default=datetime.utcnow
@@ -195,7 +204,7 @@ class UserModel(db.Model):
   # Editing
   def join_class(self, *classrooms: 'ClassroomModel', commits: bool = True) -> None:
     """
-    Add user to the classroom\n
+    Add user to the classrooms as a student in a single statement, existing members keep their role\n
     `COMMITS`
 
 
@@ -218,11 +227,13 @@ class UserModel(db.Model):
       join_class(class2, class3)
     ```
     """
-    cleaned_classrooms = set(classrooms)
+    from .association import classroom_user_association
 
-    for class_ in cleaned_classrooms:
-      if class_ in self.classrooms:
-        class_.add_students(self)
+    db.session.flush()
+    classroom_user_association.add_many(
+      ((self.id, i.id) for i in classrooms if i.owner_id != self.id), 'Student'
+    )
+    self._expire_classrooms(classrooms)
 
     if commits:
       db.session.commit()
@@ -230,7 +241,7 @@ class UserModel(db.Model):
 
   def exit_class(self, *classrooms: 'ClassroomModel', commits: bool = True) -> None:
     """
-    Remove user from the classroom\n
+    Remove user from the classrooms in a single statement\n
     `COMMITS`
 
 
@@ -253,28 +264,30 @@ class UserModel(db.Model):
       exit_class(class2, class3)
     ```
     """
-    cleaned_classrooms = set(classrooms)
+    from .association import classroom_user_association
 
-    for class_ in self.classrooms:
-      if class_ not in cleaned_classrooms:
-        continue
-
-      if self in class_.students:
-        class_.remove_students(self)
-
-      if self in class_.educators:
-        class_.remove_educators(self)
+    db.session.flush()
+    classroom_user_association.remove_many([self.id], (i.id for i in classrooms))
+    self._expire_classrooms(classrooms)
 
     if commits:
       db.session.commit()
     return None
 
+  def _expire_classrooms(self, classrooms: Iterable['ClassroomModel']) -> None:
+    """Reload collections on next access, roster statements bypass the ORM"""
+    if self in db.session:
+      db.session.expire(self, ['classrooms'])
+    for classroom in classrooms:
+      if classroom in db.session:
+        db.session.expire(classroom, ['members', 'students', 'educators'])
+
   # Querying
-  @staticmethod
-  @cache
-  def query_by(primary_key: Optional[str], **kwargs) -> List['UserModel']:
+  @classmethod
+  def query_by(cls, primary_key: Optional[str] = None, **kwargs) -> List['UserModel']:
     """
-    Query with caching
+    Query with caching\n
+    Column snapshots are cached, so results are attached to the current session
 
     Parameters
     ----------
@@ -288,13 +301,65 @@ class UserModel(db.Model):
     if primary_key is not None:
       kwargs['id'] = primary_key
 
-    return UserModel.query.filter_by(**kwargs).all()
+    key = tuple(sorted(kwargs.items()))
+    snapshots = query_cache.get(key)
+
+    if snapshots is None:
+      users = cls.query.filter_by(**kwargs).all()
+      query_cache.set(key, [user._snapshot() for user in users])
+      return users
+
+    return [cls._restore(snapshot) for snapshot in snapshots]
+
+  @classmethod
+  def query_identity(cls, identity: str) -> Optional['UserModel']:
+    """
+    Fetch a user by id for authentication\n
+    Served from the identity cache when possible, attaching the cached
+    columns to the current session without a database round trip
+
+    Parameters
+    ----------
+    `identity: str`, required
+      The user id
+
+    Returns
+    -------
+    `UserModel | None`
+    """
+    snapshot = identity_cache.get(identity)
+
+    if snapshot is None:
+      user = cls.query.filter(cls.id == identity).first()
+      if isinstance(user, cls):
+        identity_cache.set(identity, user._snapshot())
+      return user
+
+    return cls._restore(snapshot)
+
+  @classmethod
+  def _restore(cls, snapshot: dict[str, Any]) -> 'UserModel':
+    """Attach a cached snapshot to the current session without a database round trip"""
+    user = cls.__mapper__.class_manager.new_instance()
+    for key, value in snapshot.items():
+      setattr(user, key, value)
+
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+  def _snapshot(self) -> dict[str, Any]:
+    """Column values to be stored in the identity cache"""
+    return {
+      attr.key: getattr(self, attr.key) for attr in self.__class__.__mapper__.column_attrs
+    }
 
   # Verification
   def verify_password(self, password: str) -> bool:
     try:
       is_equal = passwords.compare_password(password, self.password_hash.encode())
       return is_equal
+    except passwords.PasswordHasherBusy:
+      raise
     except Exception:
       return False
 
@@ -303,6 +368,7 @@ class UserModel(db.Model):
     """Commit the model"""
     db.session.add(self)
     db.session.commit()
+    identity_cache.invalidate(self.id)
 
   def delete(self) -> None:
     """Deletes the model and its references"""
@@ -326,3 +392,11 @@ class UserModel(db.Model):
 
     db.session.delete(self)
     db.session.commit()
+    identity_cache.invalidate(self.id)
+
+
+# Invalidation, covers changes committed without going through save()
+identity_cache.invalidate_on(
+  UserModel, 'after_update', 'after_delete', key=lambda mapper, connection, target: target.id
+)
+query_cache.invalidate_on(UserModel, 'after_insert', 'after_update', 'after_delete')
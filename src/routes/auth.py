@@ -4,16 +4,17 @@ Managing user login/logout
 ! Note to self: redirects from POST -> GET needs code 302/303 to change request body as 307/308 preserves the original body
 """
 
-from src import db, jwt
+from src import db, jwt, limiter
 from src.database import UserModel, JWTBlocklistModel
 
 from src.utils.ext import utc_time
 from src.utils.http import HTTPStatusCode
-from src.utils.api import TokenRefreshResponse, LoginResponse, LoginRequest
+from src.utils.api import LoginRequest, LoginReply, TokenRefreshReply
 from src.service.auth_provider import optional_login, require_login, anonymous_required
+from src.api.v1.auth import login_user, refresh_access_token
 
-import requests
 from urllib import parse
+from flask_limiter import util
 from flask import (
   g,
   flash,
@@ -50,7 +51,11 @@ def user_identity_loader(user: 'UserModel'):
 @jwt.user_lookup_loader
 def user_lookup_loader(jwtHeader, jwtPayload):
   identity = jwtPayload['sub']
-  user = UserModel.query.filter(UserModel.id == identity).first()
+
+  # Reuse the user already resolved during this request
+  user = g.get('user')
+  if not isinstance(user, UserModel) or user.id != identity:
+    user = UserModel.query_identity(identity)
 
   g.user = user
   return user
@@ -93,20 +98,11 @@ def refresh_token(response):
       raise IgnoreException('Access token not close to being expired')
 
     # Try to refresh access token
-    refresh_response = requests.post(
-      f'{request.url_root}api/v1/refresh',
-      headers={'Authorization': f'Bearer {refresh_token}'},
-    )
-
-    try:
-      data = TokenRefreshResponse(refresh_response)
-    except Exception:
-      data = False
-
-    if (refresh_response.status_code != HTTPStatusCode.OK) or (not data):
-      raise Exception(f'{data and data.message or "Endpoint returned Code"} [{refresh_response.status_code}]')
+    reply, status = refresh_access_token(refresh_token)
+    if not isinstance(reply, TokenRefreshReply):
+      raise Exception(f'{reply.message} [{status}]')
 
-    set_access_cookies(response, str(data.data.get('access_token')))
+    set_access_cookies(response, reply.data.access_token)
     app.logger.info('Successfully Auto-Refreshed expiring access token')
 
   except IgnoreException:
@@ -173,24 +169,15 @@ def expired_token_loader(jwtHeader, jwtPayload):
       if not decoded_refresh.get('remember_me'):
         raise IgnoreException('Did not log in with remember me checked!')
 
-      response = requests.post(
-        f'{request.root_url}api/v1/refresh',
-        headers={'Authorization': f'Bearer {refresh_token}'},
-      )
-
-      if response.status_code != HTTPStatusCode.OK:
-        raise Exception(f'Endpoint returned Code: {response.status_code}')
-
-      data = TokenRefreshResponse(response)
-
-      if (data.status == HTTPStatusCode.OK) and not data.data.get('access_token'):
-        raise Exception('No access token returned from api/v1/refresh')
+      reply, status = refresh_access_token(refresh_token)
+      if not isinstance(reply, TokenRefreshReply):
+        raise Exception(f'{reply.message} [{status}]')
 
       successfulRefresh = make_response(
         redirect(request.path, code=HTTPStatusCode.FOUND), HTTPStatusCode.FOUND
       )
 
-      set_access_cookies(successfulRefresh, str(data.data.get('access_token')))
+      set_access_cookies(successfulRefresh, reply.data.access_token)
       return successfulRefresh, HTTPStatusCode.FOUND
 
     except IgnoreException:
@@ -213,12 +200,14 @@ def expired_token_loader(jwtHeader, jwtPayload):
 
 @jwt.token_in_blocklist_loader
 def token_in_blocklist_loader(jwtHeader, jwtPayload) -> bool:
-  jti = jwtPayload['jti']
-  return JWTBlocklistModel.query.get(jti) is not None
+  return JWTBlocklistModel.is_revoked(jwtPayload['jti'])
 
 
 # Routing
 @app.route('/login', methods=['Get', 'POST'])
+@limiter.shared_limit(
+  '100 per hour', scope=lambda _: request.host, key_func=util.get_remote_address, methods=['POST']
+)
 @optional_login(ignore_locked=True)
 def login(user: UserModel | None):
   # Check for locked account
@@ -236,18 +225,12 @@ def login(user: UserModel | None):
     if app.testing:
       return '', HTTPStatusCode.OK
 
-    response = requests.post(
-      f'{request.url_root}api/v1/login',
-      headers={'Content-Type': 'application/json'},
-      json=LoginRequest(request).to_dict(),
-    )
+    body, _ = login_user(LoginRequest(request))
 
-    if response.status_code != HTTPStatusCode.OK:
-      flash(response.json().get('message'), 'danger')
+    if not isinstance(body, LoginReply):
+      flash(body.message, 'danger')
 
     else:
-      body = LoginResponse(response)
-
       # Handle Login and cookie
       callbackURI: str = parse.unquote_plus(request.args.get('callbackURI', '/home'))
       successfulLogin = make_response(
@@ -2,17 +2,15 @@
 Handles user uploaded content serving
 """
 
-import requests
-import cloudinary.api
 from flask import current_app as app
-from flask import Response, request, send_file, send_from_directory
+from flask import Response, request, send_from_directory
 
 
 from typing import Literal, Union, overload
 from werkzeug.exceptions import BadRequest, NotFound, Unauthorized
 
 
-from src.database import SubmissionSnippetModel, UserModel
+from src.database import SubmissionSnippetModel, TextbookModel, UserModel
 from src.service import auth_provider, cdn_provider
 
 cdn_provider._dirCheck()
@@ -41,26 +39,47 @@ def serve(
   if not identifier:
     raise BadRequest('Invalid identifier')
 
+  # Auth is checked by the caller, redirect mode then keeps the transfer off the worker threads
+  redirectMode = app.config.get('CDN_SERVE_MODE') == 'redirect'
+  asAttachment = bool(request.args.get('download', None))
+
   if (ENV == 'production') and (
     location in ['image-uploads', 'textbook-uploads', 'submission-uploads']
   ):
-    uploadData = cloudinary.api.resource(f'{location}/{identifier}')
+    uploadData = cdn_provider.getResource(f'{location}/{identifier}')
 
     if not uploadData:
       raise NotFound()
 
-    return send_file(
-      requests.get(uploadData['secure_url'], stream=True).raw,
+    if redirectMode:
+      return cdn_provider.signedRedirect(
+        uploadData,
+        asAttachment=asAttachment,
+        ttl=app.config.get('CDN_SIGNED_URL_TTL', 300),
+      )
+
+    return cdn_provider.streamRemote(
+      uploadData,
       mimetype=f'{uploadData["resource_type"] if location != "textbook-uploads" else "application"}/{uploadData["format"]}',
-      as_attachment=bool(request.args.get('download', None)),
+      asAttachment=asAttachment,
     )
 
   elif ENV == 'production':
     raise BadRequest('Invalid location')
+
+  accelPrefix = app.config.get('CDN_ACCEL_REDIRECT_PREFIX')
+  if redirectMode and accelPrefix:
+    try:
+      return cdn_provider.accelRedirect(location, identifier, accelPrefix, asAttachment=asAttachment)
+    except cdn_provider.FileDoesNotExistError:
+      raise NotFound()
+
+  # Werkzeug answers Range, If-None-Match and If-Modified-Since for local files,
+  # and sends X-Sendfile instead of the body when USE_X_SENDFILE is set
   return send_from_directory(
     location,
     identifier,
-    as_attachment=bool(request.args.get('download', None)),
+    as_attachment=asAttachment,
   )
 
 
@@ -87,46 +106,31 @@ def uploaded_images(_: UserModel | None, ident: str):
 @app.route('/public/textbook/<path:ident>', methods=['GET'])
 @auth_provider.require_login
 def uploaded_textbooks(user: UserModel, ident: str):
-  if user.privilege == 'Admin':
-    return serve(
-      'textbook-uploads' if ENV == 'production' else cdn_provider.TextbookLocation,
-      ident,
-    )
-
-  for book in user.textbooks + user.owned_textbooks:
-    if book.iuri.endswith(ident):
-      return serve(
-        'textbook-uploads' if ENV == 'production' else cdn_provider.TextbookLocation,
-        ident,
-      )
-
-    else:
+  if user.privilege != 'Admin':
+    allowed = TextbookModel.can_download(user.id, f'/public/textbook/{ident}')
+    if allowed is None:
+      raise NotFound()
+    if not allowed:
       raise Unauthorized()
-  raise NotFound()
+
+  return serve(
+    'textbook-uploads' if ENV == 'production' else cdn_provider.TextbookLocation,
+    ident,
+  )
 
 
 # Submissions
 @app.route('/public/submission/<path:ident>', methods=['GET'])
 @auth_provider.require_login
 def uploaded_submissions(user: UserModel, ident: str):
-  if user.privilege == 'Admin':
-    return serve(
-      'submission-uploads' if ENV == 'production' else cdn_provider.SubmissionUpload,
-      ident,
-    )
-
-  snippet = SubmissionSnippetModel.query.filter(
-    SubmissionSnippetModel.iuri.contains(ident)
-  ).first()
-  if not isinstance(snippet, SubmissionSnippetModel):
-    raise NotFound()
-
-  if (snippet.student == user) or snippet.submission.assignment.classroom.is_privileged(
-    user
-  ):
-    return serve(
-      'submission-uploads' if ENV == 'production' else cdn_provider.SubmissionUpload,
-      ident,
-    )
+  if user.privilege != 'Admin':
+    allowed = SubmissionSnippetModel.can_view(user.id, ident)
+    if allowed is None:
+      raise NotFound()
+    if not allowed:
+      raise Unauthorized()
 
-  raise Unauthorized()
+  return serve(
+    'submission-uploads' if ENV == 'production' else cdn_provider.SubmissionUpload,
+    ident,
+  )
@@ -7,9 +7,9 @@ from src.service import auth_provider
 
 from src.utils.http import escape_id, HTTPStatusCode
 from src.utils.forms import ClassroomCreateForm, ClassroomEditForm
-from src.utils.api import ClassroomJoinResponse, ClassroomLeaveResponse
+from src.utils.api import ClassroomJoinReply
+from src.api.v1.classroom import join_classroom, leave_classroom
 
-import requests
 from flask import (
   flash,
   request,
@@ -91,21 +91,16 @@ def classroom_join(user: UserModel, id: str):
         f'/classrooms/{classroom.id}', HTTPStatusCode.SEE_OTHER
       ), HTTPStatusCode.SEE_OTHER
 
-  response = requests.post(
-    f'{request.url_root}api/v1/classroom/join',
-    headers={'Authorization': f'Bearer {request.cookies.get("access_token_cookie")}'},
-    json={'invite_id': id},
-  )
+  body, _ = join_classroom(user, id)
 
-  if response.status_code != HTTPStatusCode.OK:
-    flash(response.json().get('message'), 'danger')
+  if not isinstance(body, ClassroomJoinReply):
+    flash(body.message, 'danger')
     return render_template(
       '(classroom)/classroom_error.html',
-      message=response.json().get('message'),
+      message=body.message,
     )
 
   else:
-    body = ClassroomJoinResponse(response)
     flash(body.message, 'success')
     return redirect(
       f'/classrooms/{body.data.classroom_id}', HTTPStatusCode.SEE_OTHER
@@ -114,23 +109,18 @@ def classroom_join(user: UserModel, id: str):
 
 @app.route('/classrooms/leave/<string:id>')
 @auth_provider.require_login
-def classroom_leave(_: UserModel, id: str):
+def classroom_leave(user: UserModel, id: str):
   id = escape_id(id)
 
-  response = requests.post(
-    f'{request.url_root}api/v1/classroom/leave',
-    headers={'Authorization': f'Bearer {request.cookies.get("access_token_cookie")}'},
-    json={'classroom_id': id},
-  )
+  body, status = leave_classroom(user, id)
 
-  if response.status_code != HTTPStatusCode.OK:
-    flash(response.json().get('message'), 'danger')
+  if status != HTTPStatusCode.OK:
+    flash(body.message, 'danger')
     return render_template(
       '(classroom)/classroom_error.html',
-      message=response.json().get('message'),
+      message=body.message,
     )
 
   else:
-    body = ClassroomLeaveResponse(response)
     flash(body.message, 'success')
     return redirect('/classrooms', HTTPStatusCode.SEE_OTHER), HTTPStatusCode.SEE_OTHER
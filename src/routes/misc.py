@@ -2,12 +2,26 @@
 Handles misc routing
 """
 
+from src import db, limiter
 from src.database import UserModel
-from src.service import auth_provider, email_provider
+from src.service import auth_provider, cdn_provider, email_provider
 from src.utils.forms import ProfileEditForm
-from src.utils.api import ContactRequest, GenericReply
 from src.utils.http import HTTPStatusCode
-
+from src.utils.api import (
+  ContactRequest,
+  GenericReply,
+  HealthGetReply,
+  _HealthGetData,
+  _HealthPoolData,
+  _HealthCDNCacheData,
+)
+
+import os
+import time
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import SQLAlchemyError
 from flask import request, render_template, current_app as app
 
 
@@ -105,3 +119,62 @@ def contact_us(user: UserModel | None):
 @auth_provider.optional_login
 def up(user: UserModel | None):
   return {'status': 200}, 200
+
+
+def _pool_status() -> Optional[_HealthPoolData]:
+  """Counts for this worker's pool, None for pools that do not queue like in-memory SQLite"""
+  pool = db.engine.pool
+  if not isinstance(pool, QueuePool):
+    return None
+
+  # Configured rather than read off the pool, QueuePool only exposes it privately
+  maxOverflow = int(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}).get('max_overflow', 10))
+  return _HealthPoolData(
+    size=pool.size(),
+    checked_out=pool.checkedout(),
+    overflow=max(0, pool.overflow()),
+    max_overflow=maxOverflow,
+    exhausted=pool.checkedout() >= pool.size() + maxOverflow,
+  )
+
+
+@app.route('/healthz')
+@limiter.exempt
+@auth_provider.optional_login
+def healthz(user: UserModel | None):
+  data = _HealthGetData(database='ok', latency_ms=None)
+  pool = _pool_status()
+
+  # Waiting on an exhausted pool would hang for `pool_timeout`,
+  # the worker is busy rather than down so it is still reported healthy
+  if pool and pool.exhausted:
+    data.database = 'exhausted'
+  else:
+    started = time.perf_counter()
+    try:
+      with db.engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+      data.latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    except SQLAlchemyError:
+      data.database = 'unreachable'
+
+  # Worker internals are only for admins
+  if user and user.privilege == 'Admin':
+    cache = cdn_provider.fileCache.stats()
+    data.pid = os.getpid()
+    data.pool = pool
+    data.cdn_cache = _HealthCDNCacheData(
+      files=cache.files,
+      size_bytes=cache.size_bytes,
+      max_bytes=cache.max_bytes,
+      hits=cache.hits,
+      misses=cache.misses,
+      evictions=cache.evictions,
+    )
+
+  status = HTTPStatusCode.SERVICE_UNAVAILABLE if data.database == 'unreachable' else HTTPStatusCode.OK
+  return HealthGetReply(
+    message='Healthy' if status == HTTPStatusCode.OK else 'Unhealthy',
+    status=status,
+    data=data,
+  ).to_dict(), status
@@ -13,7 +13,6 @@ from src.utils.api import (
 
 import re
 from datetime import datetime
-from functools import lru_cache
 from src.utils.ext import utc_time
 from src.utils.http import HashableDict
 
@@ -87,7 +86,6 @@ def pricing_page(user: UserModel | None):
 
 
 # Functions
-@lru_cache
 def filterTextbooks(
   criteria: str,
   filterPayload: HashableDict,
@@ -5,5 +5,6 @@ Service Initializer
 from . import (
   cdn_provider,
   auth_provider,
-  email_provider
+  email_provider,
+  stats_provider
 )
@@ -7,13 +7,25 @@ Change to switch to an actual CDN upload if pushing to prod
 import io
 import os
 import re
+import time
 import uuid
-from cloudinary import uploader, api
+import logging
+import mimetypes
+import requests
+import threading
+from datetime import datetime
+from cloudinary import uploader, api, utils
 from pypdf import PdfReader, PdfWriter
 
-from typing import Literal, Optional, overload
+from flask import Response, request, send_file, redirect
+from typing import Any, Literal, Mapping, Optional, overload
+from werkzeug.http import is_resource_modified
+from werkzeug.security import safe_join
 from werkzeug.datastructures import FileStorage
 
+from src.utils.ext.cache import TTLCache, cached
+from src.utils.ext.disk_cache import DiskLRUCache
+
 
 # Setup
 ENV = os.getenv('ENV', '')
@@ -30,6 +42,20 @@ SubmissionUpload = os.path.join(UploadBaseLocation, 'SubmissionUpload')
 TextbookLocation = os.path.join(UploadBaseLocation, 'textbooks')
 ImageLocation = os.path.join(UploadBaseLocation, 'images')
 
+# Bytes read from Cloudinary per chunk while proxying
+StreamChunkSize = 64 * 1024
+
+# Configured in init_app with CDN_METADATA_TTL and CDN_METADATA_CACHE_SIZE
+resourceCache: TTLCache[str, dict[str, Any]] = TTLCache(ttl=300, maxsize=1024)
+
+# Configured in init_app with CDN_CACHE_DIR, CDN_CACHE_MAX_BYTES and CDN_CACHE_MAX_FILE_BYTES,
+# the directory is only created once a Cloudinary upload is served
+fileCache = DiskLRUCache()
+
+# Cache keys being downloaded by `_fillInBackground`
+_filling: set[str] = set()
+_fillingLock = threading.Lock()
+
 TextbookFileEXT = ['pdf']
 ImageFileEXT = ['png', 'jpg', 'jpeg']
 SubmissionFileEXT = ['pdf', 'txt', 'docx', 'doc', 'odt']
@@ -287,9 +313,287 @@ def deleteFile(fileLocation: str) -> None:
     if res['deleted'][fileLocation] != 'deleted':
       raise Exception('Failed to delete file from CDN')
 
+    resource = resourceCache.get(fileLocation)
+    if resource:
+      fileCache.invalidate(_fileCacheKey(resource))
+    resourceCache.invalidate(fileLocation)
     return
 
   if not os.path.exists(fileLocation):
     raise FileDoesNotExistError()
 
   os.remove(fileLocation)
+
+
+# Serving
+@cached(resourceCache, key=lambda publicId: publicId)
+def getResource(publicId: str) -> dict[str, Any]:
+  """
+  Cloudinary metadata of an upload, memoized so each asset is looked up once per TTL
+
+  Parameters
+  ----------
+  `publicId: str`, required
+    e.g. `textbook-uploads/<identifier>`
+
+
+  Returns
+  -------
+  `resource: dict[str, Any]`
+    As returned by `cloudinary.api.resource`
+  """
+  return dict(api.resource(publicId))
+
+
+def _fileCacheKey(resource: Mapping[str, Any]) -> str:
+  """The version changes with the content, so cached files never go stale"""
+  return f'{resource["public_id"]}@{resource["version"]}'
+
+
+def _fetchToCache(resource: Mapping[str, Any]) -> Optional[str]:
+  """Download an upload into `fileCache`, None if it is too large or the download fails"""
+  size = int(resource['bytes'])
+  if size > fileCache.max_file_bytes:
+    return None
+
+  try:
+    with requests.get(resource['secure_url'], stream=True, timeout=(5, 30)) as upstream:
+      upstream.raise_for_status()
+      return fileCache.put(_fileCacheKey(resource), upstream.iter_content(StreamChunkSize), size)
+  except (requests.RequestException, OSError) as e:
+    logging.warning('Failed to cache %s: %s', resource['public_id'], e)
+    return None
+
+
+def _fillInBackground(resource: Mapping[str, Any]) -> None:
+  """Run `_fetchToCache` on a daemon thread, unless the upload is too large or already being fetched"""
+  key = _fileCacheKey(resource)
+  if int(resource['bytes']) > fileCache.max_file_bytes:
+    return
+
+  with _fillingLock:
+    if key in _filling:
+      return
+    _filling.add(key)
+
+  def fill(resource: dict[str, Any]) -> None:
+    try:
+      _fetchToCache(resource)
+    finally:
+      with _fillingLock:
+        _filling.discard(key)
+
+  threading.Thread(target=fill, args=(dict(resource),), name=f'cdn-fill-{key}', daemon=True).start()
+
+
+def resolveRange(
+  size: int, etag: str, lastModified: Optional[datetime] = None
+) -> tuple[int, Optional[tuple[int, int]]]:
+  """
+  Decide how to answer the current GET for a file from its validators
+
+  Parameters
+  ----------
+  `size: int`, required
+    File size in bytes
+
+  `etag: str`, required
+    Strong ETag, unquoted
+
+  `lastModified: datetime`, optional (defaults to None)
+
+
+  Returns
+  -------
+  `(status, byteRange): tuple[int, tuple[int, int] | None]`
+    304 when the client copy is current, 416 when the range is outside the file,
+    206 with the `[start, stop)` byte range to send, else 200 for the whole file.
+    Multiple ranges and stale `If-Range` validators are answered with the whole file
+  """
+  if not is_resource_modified(request.environ, etag, last_modified=lastModified):
+    return 304, None
+
+  byteRange = request.range
+  if (
+    (byteRange is None)
+    or (len(byteRange.ranges) != 1)
+    or (
+      'If-Range' in request.headers
+      and is_resource_modified(request.environ, etag, last_modified=lastModified, ignore_if_range=False)
+    )
+  ):
+    return 200, None
+
+  span = byteRange.range_for_length(size)
+  if span is None:
+    return 416, None
+  return 206, span
+
+
+def streamRemote(resource: Mapping[str, Any], mimetype: str, asAttachment: bool = False) -> Response:
+  """
+  Serve a Cloudinary upload with Range, ETag and Last-Modified support
+
+  Uploads are read through `fileCache` and sent from local disk, which lets the server use `sendfile`.
+  Files over `CDN_CACHE_MAX_FILE_BYTES` are proxied instead, fetching only the requested bytes.
+  A Range request on a cold cache is proxied too while the cache is filled in the background,
+  so seeking into a large file does not wait for the whole download
+
+  Parameters
+  ----------
+  `resource: Mapping[str, Any]`, required
+    Metadata from `cloudinary.api.resource`
+
+  `mimetype: str`, required
+
+  `asAttachment: bool`, optional (defaults to False)
+
+
+  Returns
+  -------
+  `response: Response`
+    Streamed, closes the upstream connection when done
+  """
+  size = int(resource['bytes'])
+  etag = resource.get('etag') or f'{resource["public_id"]}-{resource["version"]}'
+  lastModified = datetime.fromisoformat(resource['created_at'].replace('Z', '+00:00'))
+  downloadName = f'{os.path.basename(resource["public_id"])}.{resource["format"]}'
+
+  # A client with a current copy gets its 304 without the file being fetched
+  cachedPath = fileCache.get(_fileCacheKey(resource))
+  if (cachedPath is None) and is_resource_modified(request.environ, etag, last_modified=lastModified):
+    if request.range is None:
+      cachedPath = _fetchToCache(resource)
+    else:
+      _fillInBackground(resource)
+  if cachedPath:
+    try:
+      response = send_file(
+        cachedPath,
+        mimetype=mimetype,
+        as_attachment=asAttachment,
+        download_name=downloadName,
+        conditional=True,
+        etag=etag,
+        last_modified=lastModified,
+      )
+      response.cache_control.private = True
+      return response
+    except FileNotFoundError:
+      # Evicted by another thread or worker since the lookup, once opened it is safe to remove
+      logging.info('Cached %s was evicted before sending, proxying', resource['public_id'])
+
+  response = Response(mimetype=mimetype)
+  response.set_etag(etag)
+  response.last_modified = lastModified
+  response.accept_ranges = 'bytes'
+  response.cache_control.private = True
+  response.cache_control.no_cache = True
+  if asAttachment:
+    response.headers['Content-Disposition'] = f'attachment; filename={downloadName}'
+
+  status, span = resolveRange(size, etag, lastModified)
+  response.status_code = status
+
+  if status == 304:
+    return response
+
+  if status == 416:
+    response.content_range = f'bytes */{size}'  # type: ignore
+    return response
+
+  headers = {'Range': f'bytes={span[0]}-{span[1] - 1}'} if span else {}
+  upstream = requests.get(resource['secure_url'], headers=headers, stream=True, timeout=(5, 30))
+  upstream.raise_for_status()
+
+  # Cloudinary may ignore the range, then the whole file is sent
+  if span and upstream.status_code == 206:
+    response.content_range = f'bytes {span[0]}-{span[1] - 1}/{size}'  # type: ignore
+    response.content_length = span[1] - span[0]
+  else:
+    response.status_code = 200
+    response.content_length = size
+
+  response.response = upstream.iter_content(StreamChunkSize)
+  response.direct_passthrough = True
+  response.call_on_close(upstream.close)
+  return response
+
+
+def signedRedirect(resource: Mapping[str, Any], asAttachment: bool = False, ttl: int = 300) -> Response:
+  """
+  Redirect to a short-lived signed Cloudinary download URL, the bytes never pass through the app
+
+  Parameters
+  ----------
+  `resource: Mapping[str, Any]`, required
+    Metadata from `getResource`
+
+  `asAttachment: bool`, optional (defaults to False)
+
+  `ttl: int`, optional (defaults to 300)
+    Seconds before the URL expires
+
+
+  Returns
+  -------
+  `response: Response`
+    302, not stored by caches as the URL expires
+  """
+  url = utils.private_download_url(
+    resource['public_id'],
+    resource['format'],
+    resource_type=resource['resource_type'],
+    type=resource.get('type', 'upload'),
+    expires_at=int(time.time()) + ttl,
+    attachment=asAttachment,
+  )
+
+  response = redirect(url, 302)
+  response.cache_control.no_store = True
+  return response
+
+
+def accelRedirect(directory: str, identifier: str, prefix: str, asAttachment: bool = False) -> Response:
+  """
+  Hand a local upload to nginx with `X-Accel-Redirect`
+
+  `prefix` must be an `internal` location aliased to the upload directory, e.g.
+  ```nginx
+    location /_uploads/ { internal; alias /app/src/uploads/; }
+  ```
+
+  Parameters
+  ----------
+  `directory: str`, required
+    One of the upload locations
+
+  `identifier: str`, required
+    File name within `directory`
+
+  `prefix: str`, required
+
+  `asAttachment: bool`, optional (defaults to False)
+
+
+  Returns
+  -------
+  `response: Response`
+    Empty, nginx fills in the body and answers Range and conditional requests
+
+
+  Raises
+  ------
+  `FileDoesNotExistError`
+    The file is missing or outside `directory`
+  """
+  location = safe_join(directory, identifier)
+  if (location is None) or not os.path.isfile(location):
+    raise FileDoesNotExistError()
+
+  relative = os.path.relpath(location, UploadBaseLocation).replace(os.sep, '/')
+  response = Response(mimetype=mimetypes.guess_type(location)[0] or 'application/octet-stream')
+  response.headers['X-Accel-Redirect'] = f'{prefix.rstrip("/")}/{relative}'
+  if asAttachment:
+    response.headers['Content-Disposition'] = f'attachment; filename={os.path.basename(location)}'
+  return response
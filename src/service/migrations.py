@@ -0,0 +1,157 @@
+"""
+Schema migrations
+
+The schema is owned by the Alembic revisions in `migrations/`,
+boot only compares the database revision with the latest one
+"""
+
+from src import db
+
+import os
+import click
+import logging
+from typing import Optional
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from alembic.migration import MigrationContext
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+BASELINE = '0001'
+"""
+Revision matching the schema `db.create_all()` built before migrations existed,
+later revisions skip tables and indexes that a newer `db.create_all()` already made
+"""
+
+# Arbitrary key for `pg_advisory_xact_lock`, serializes concurrent upgrades
+_LOCK_KEY = 0x6564757465
+
+
+class SchemaOutOfDate(RuntimeError):
+  """The database is not at the latest revision"""
+
+
+def get_config(connection: Optional[Connection] = None) -> Config:
+  """
+  Alembic config for the repository
+
+  Parameters
+  ----------
+  `connection: Connection`, optional (defaults to None)
+    Migrations run on this connection instead of opening their own
+
+  Returns
+  -------
+  `config: Config`
+  """
+  config = Config(os.path.join(ROOT, 'alembic.ini'))
+  config.set_main_option('script_location', os.path.join(ROOT, 'migrations'))
+  if connection is not None:
+    config.attributes['connection'] = connection
+  return config
+
+
+def head_revision() -> Optional[str]:
+  """The latest revision in `migrations/versions`"""
+  return ScriptDirectory.from_config(get_config()).get_current_head()
+
+
+def current_revision(connection: Connection) -> Optional[str]:
+  """
+  The revision the database is at
+
+  Parameters
+  ----------
+  `connection: Connection`, required
+
+  Returns
+  -------
+  `revision: str | None`
+    None if the database was never migrated
+  """
+  return MigrationContext.configure(connection).get_current_revision()
+
+
+def upgrade(
+  revision: str = 'head',
+  connection: Optional[Connection] = None,
+) -> tuple[Optional[str], Optional[str]]:
+  """
+  Migrate the database, must be called in an app context
+
+  Databases built by `db.create_all()` before migrations existed are stamped at the
+  baseline first. On Postgres an advisory lock keeps concurrent upgrades from racing
+
+  Parameters
+  ----------
+  `revision: str`, optional (defaults to head)
+
+  `connection: Connection`, optional (defaults to None)
+    Migrate this connection's database inside its transaction, else the app database
+
+  Returns
+  -------
+  `revisions: tuple[str | None, str | None]`
+    The revision before and after
+  """
+  if connection is None:
+    with db.engine.begin() as connection:
+      return upgrade(revision, connection)
+
+  if connection.dialect.name == 'postgresql':
+    connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _LOCK_KEY})
+
+  config = get_config(connection)
+  before = current_revision(connection)
+
+  if before is None and inspect(connection).has_table('user_table'):
+    logging.info('Stamping unversioned database at baseline %s', BASELINE)
+    command.stamp(config, BASELINE)
+    before = BASELINE
+
+  command.upgrade(config, revision)
+  return before, current_revision(connection)
+
+
+def check_schema(upgrade_on_boot: bool = False) -> None:
+  """
+  Compare the database revision with the latest one, must be called in an app context
+
+  Costs one query, nothing is reflected or created
+
+  Parameters
+  ----------
+  `upgrade_on_boot: bool`, optional (defaults to False)
+    Migrate instead of failing
+
+  Raises
+  ------
+  `SchemaOutOfDate`
+    The database is behind and `upgrade_on_boot` is False.
+    Only logged when loaded by a `flask` command other than `run`, so `upgrade` can still run
+  """
+  with db.engine.connect() as connection:
+    current = current_revision(connection)
+
+  head = head_revision()
+  if current == head:
+    return
+
+  if upgrade_on_boot:
+    before, after = upgrade()
+    logging.info('Migrated database from %s to %s', before, after)
+    return
+
+  message = f'Database schema is at {current}, expected {head}. Run `flask --app run upgrade`'
+  # `flask run` serves requests, only maintenance commands may load against an old schema
+  context = click.get_current_context(silent=True)
+  if (context is not None) and (context.command.name != 'run'):
+    logging.warning(message)
+    return
+
+  raise SchemaOutOfDate(message)
@@ -0,0 +1,167 @@
+"""
+Periodic background jobs
+
+Jobs run on a daemon thread inside an app context, away from the request path
+"""
+
+from src import db
+
+import time
+import zlib
+import click
+import threading
+from flask import Flask
+from typing import Any, Callable, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+# Prefix for per-job `pg_try_advisory_lock` keys, the job name fills the low 32 bits
+_LOCK_PREFIX = 0x6A6F62 << 32
+
+
+class PeriodicJob(threading.Thread):
+  """
+  Runs a function every `interval` seconds until stopped
+
+  Under `gunicorn --preload` the job is started in the master process,
+  so only one copy runs no matter how many workers are forked.
+
+  `ONE RUNNER PER DEPLOYMENT`\n
+  On Postgres each run first takes a session advisory lock keyed by the job name, and keeps it.
+  Copies in other workers or containers skip their runs until the holder's connection closes.
+  Other databases are single host and run every copy
+
+  Examples
+  --------
+  ```py
+    job = PeriodicJob(app, 'cleanup', 3600, cleanup)
+    job.start()
+    job.stop()
+  ```
+  """
+
+  app: Flask
+  func: Callable[[], Any]
+  interval: float
+  lock_key: int
+
+  _stopped: threading.Event
+  _lock: Optional[Connection]
+
+  def __init__(self, app: Flask, name: str, interval: float, func: Callable[[], Any]) -> None:
+    """
+    Initializes a PeriodicJob
+
+    Parameters
+    ----------
+    `app: Flask`, required
+      The app whose context the job runs in
+
+    `name: str`, required
+      Used for the thread name and logging
+
+    `interval: float`, required
+      Seconds between each run, the first run happens after one interval
+
+    `func: () -> Any`, required
+    """
+    super().__init__(name=f'job-{name}', daemon=True)
+    self.app = app
+    self.func = func
+    self.interval = interval
+    self.lock_key = _LOCK_PREFIX | zlib.crc32(name.encode())
+    self._stopped = threading.Event()
+    self._lock = None
+
+  def run(self) -> None:
+    while not self._stopped.wait(self.interval):
+      self.run_once()
+
+  def is_runner(self) -> bool:
+    """Whether this copy holds the job's advisory lock, must be called in an app context"""
+    if db.engine.dialect.name != 'postgresql':
+      return True
+
+    try:
+      if self._lock is not None:
+        self._lock.execute(text('SELECT 1'))
+        return True
+    except SQLAlchemyError:
+      # The lock went with the connection, another copy may have taken over
+      self._lock.invalidate()
+      self._lock = None
+
+    connection = db.engine.connect()
+    if connection.execute(text('SELECT pg_try_advisory_lock(:key)'), {'key': self.lock_key}).scalar():
+      connection.commit()
+      self._lock = connection
+      return True
+
+    connection.close()
+    return False
+
+  def run_once(self) -> Optional[Any]:
+    """Run the job a single time if this copy is the runner, logging failures instead of raising"""
+    started = time.perf_counter()
+
+    with self.app.app_context():
+      try:
+        if not self.is_runner():
+          return None
+
+        result = self.func()
+        self.app.logger.info(
+          f'{self.name} finished in {time.perf_counter() - started:.3f}s with result {result}'
+        )
+        return result
+
+      except Exception as e:
+        self.app.logger.exception(f'{self.name} failed: {e}')
+
+      finally:
+        db.session.remove()
+
+  def stop(self) -> None:
+    """Stop after the current run, releasing the advisory lock"""
+    self._stopped.set()
+    if self._lock is not None:
+      self._lock.close()
+      self._lock = None
+
+
+jobs: dict[str, PeriodicJob] = {}
+
+
+def schedule(app: Flask, name: str, interval: float, func: Callable[[], Any]) -> Optional[PeriodicJob]:
+  """
+  Start a periodic job, no-op if `interval` is not positive, the job is already running
+  or the app was loaded by a `flask` command
+
+  Parameters
+  ----------
+  `app: Flask`, required
+
+  `name: str`, required
+
+  `interval: float`, required
+    Seconds between each run
+
+  `func: () -> Any`, required
+
+  Returns
+  -------
+  `job: PeriodicJob | None`
+  """
+  # CLI commands exit as soon as they are done, `purge-blocklist` and the like run jobs directly
+  if (interval <= 0) or (click.get_current_context(silent=True) is not None):
+    return None
+
+  job = jobs.get(name)
+  if job and job.is_alive():
+    return job
+
+  job = PeriodicJob(app, name, interval, func)
+  jobs[name] = job
+  job.start()
+  return job
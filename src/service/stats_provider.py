@@ -0,0 +1,181 @@
+"""
+Aggregation for admin statistics
+
+Rows are bucketed and reduced in SQL so the cost depends on the number of months, not rows
+"""
+
+import numpy
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Any, Literal, NamedTuple, Optional, Tuple
+
+from src import db
+from sqlalchemy import func, extract, select
+from sqlalchemy.sql.elements import ColumnElement
+
+# Import at runtime to prevent circular imports
+if TYPE_CHECKING:
+  from src.database import StatisticMetric
+
+
+Aggregate = Literal['count', 'sum']
+
+
+class MonthlySeries(NamedTuple):
+  """One point per calendar month, months without rows are 0"""
+
+  months: numpy.ndarray
+  """`datetime64[M]` of each month"""
+
+  values: numpy.ndarray
+  """`float64` aggregate of each month"""
+
+  @property
+  def labels(self) -> list[str]:
+    """`month/year` labels for each point"""
+    return [
+      f'{(m.astype(int) % 12) + 1}/{(m.astype(int) // 12) + 1970}' for m in self.months
+    ]
+
+
+def _toMonth(d: date) -> numpy.datetime64:
+  return numpy.datetime64(d.strftime('%Y-%m'), 'M')
+
+
+def aggregateMonthly(
+  model: type[Any],
+  dateRange: Tuple[datetime, datetime],
+  aggregate: Aggregate = 'count',
+  column: Optional[ColumnElement[Any]] = None,
+  where: Optional[ColumnElement[bool]] = None,
+  minMonths: int = 12,
+  dateColumn: Optional[ColumnElement[Any]] = None,
+) -> MonthlySeries:
+  """
+  Aggregate rows into a monthly series with `GROUP BY year, month`
+
+  Parameters
+  ----------
+  `model: Model`, required
+    Must have a `created_at` column unless `dateColumn` is given
+
+  `dateRange: tuple[datetime, datetime]`, required
+    Months after the current month are not included
+
+  `aggregate: count | sum`, optional (defaults to count)
+
+  `column: Column`, optional (defaults to None)
+    The column to sum, required for `sum`
+
+  `where: ColumnElement[bool]`, optional (defaults to None)
+    Extra filtering
+
+  `minMonths: int`, optional (defaults to 12)
+    The series is extended backwards to cover at least this many months
+
+  `dateColumn: Column`, optional (defaults to `model.created_at`)
+    The column to bucket on
+
+  Returns
+  -------
+  `series: MonthlySeries`
+  """
+  assert (aggregate == 'count') or (column is not None), 'sum requires a column'
+
+  dateColumn = model.created_at if dateColumn is None else dateColumn
+
+  year = extract('year', dateColumn)
+  month = extract('month', dateColumn)
+  value = func.count() if aggregate == 'count' else func.coalesce(func.sum(column), 0)
+
+  stmt = (
+    select(year, month, value)
+    .select_from(model)
+    .where(dateColumn.between(*dateRange))
+    .group_by(year, month)
+  )
+  if where is not None:
+    stmt = stmt.where(where)
+
+  end = min(_toMonth(dateRange[1]), _toMonth(datetime.utcnow()))
+  start = min(_toMonth(dateRange[0]), end - (minMonths - 1))
+
+  months = numpy.arange(start, end + 1, dtype='datetime64[M]')
+  values = numpy.zeros(len(months), dtype=numpy.float64)
+
+  offset = start.astype(int)
+  for y, m, v in db.session.execute(stmt):
+    i = (int(y) - 1970) * 12 + (int(m) - 1) - offset
+    if 0 <= i < len(values):
+      values[i] = v
+
+  return MonthlySeries(months, values)
+
+
+# Rollup
+def _toDays(dateRange: Tuple[datetime, datetime]) -> Tuple[date, date]:
+  return (dateRange[0].date(), dateRange[1].date())
+
+
+def rollupMonthly(
+  metric: 'StatisticMetric',
+  dateRange: Tuple[datetime, datetime],
+  minMonths: int = 12,
+) -> MonthlySeries:
+  """
+  Monthly series read from the daily statistics rollup
+
+  Reads at most one row per day instead of every source row
+
+  Parameters
+  ----------
+  `metric: users | textbooks | revenue`, required
+
+  `dateRange: tuple[datetime, datetime]`, required
+    Matched by day
+
+  `minMonths: int`, optional (defaults to 12)
+
+  Returns
+  -------
+  `series: MonthlySeries`
+  """
+  from src.database import StatisticModel
+
+  return aggregateMonthly(
+    StatisticModel,
+    _toDays(dateRange),  # type: ignore
+    'sum',
+    StatisticModel.value,
+    StatisticModel.metric == metric,
+    minMonths,
+    StatisticModel.day,
+  )
+
+
+def rollupTotal(
+  metric: 'StatisticMetric',
+  dateRange: Optional[Tuple[datetime, datetime]] = None,
+) -> float:
+  """
+  Total read from the daily statistics rollup
+
+  Parameters
+  ----------
+  `metric: users | textbooks | revenue`, required
+
+  `dateRange: tuple[datetime, datetime]`, optional (defaults to None)
+    Matched by day, else all time
+
+  Returns
+  -------
+  `total: float`
+  """
+  from src.database import StatisticModel
+
+  stmt = select(func.coalesce(func.sum(StatisticModel.value), 0)).where(
+    StatisticModel.metric == metric
+  )
+  if dateRange is not None:
+    stmt = stmt.where(StatisticModel.day.between(*_toDays(dateRange)))
+
+  return float(db.session.scalar(stmt) or 0)
@@ -5,6 +5,12 @@
  */
 let classroomList = [];
 
+/**
+ * Cursor for the next page, null once every classroom is loaded
+ * @type {string?}
+ */
+let nextCursor = null;
+
 /** @type {AbortController?} */
 let fetchController;
 
@@ -13,9 +19,10 @@ let fetchController;
 
 /**
  * Fetch Classrooms
+ * @param {string?} [after] Cursor of the page to fetch, the first page if omitted
  * @type {Promise<ClassroomGetData[]>}
  */
-const fetchClassrooms = async () => {
+const fetchClassrooms = async (after) => {
   // Abort previous
   if (fetchController) fetchController.abort();
   fetchController = new AbortController();
@@ -25,7 +32,8 @@ const fetchClassrooms = async () => {
   criteria = ['or', 'and'].includes(criteria) ? criteria : 'or';
 
   searchParams.set('criteria', criteria);
-
+  // An empty cursor starts cursor pagination at the first page
+  searchParams.set('after', after || '');
 
   /** @type {APIJSON<ClassroomGetData[]> | void} */
   const data = await fetch(`/api/v1/classroom/list?${searchParams.toString()}`, {
@@ -42,10 +50,23 @@ const fetchClassrooms = async () => {
     return data?.data || new Array();
   };
 
+  nextCursor = data.cursor || null;
   return data.data
 }
 
 
+/**
+ * Fetch the next page and append it
+ * @returns {Promise<void>}
+ */
+const loadMoreClassrooms = async () => {
+  if (!nextCursor) return;
+
+  classroomList = classroomList.concat(await fetchClassrooms(nextCursor));
+  renderClassrooms(filterClassrooms($('#sortby').val()));
+};
+
+
 /**
  * Render Classrooms
  * @param {ClassroomGetData[]} [filteredList]
@@ -83,6 +104,14 @@ const renderClassrooms = async (filteredList) => {
       })));
     });
   };
+
+  if (nextCursor) {
+    const loadMore = htmlToElement(
+      `<button type="button" class="btn btn-outline-primary w-100">Load more</button>`
+    );
+    container.append(loadMore);
+    $(loadMore).on('click', () => loadMoreClassrooms());
+  };
 };
 
 
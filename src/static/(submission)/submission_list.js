@@ -5,16 +5,25 @@
  */
 let submissionList = [];
 
+/**
+ * Cursor for the next page, null once every submission is loaded
+ * @type {string?}
+ */
+let nextCursor = null;
+
 
 /**
  * Fetch Submissions
+ * @param {string?} [after] Cursor of the page to fetch, the first page if omitted
  * @type {Promise<SubmissionGetData[]>}
  */
-const fetchSubmissions = async () => {
+const fetchSubmissions = async (after) => {
   let searchParams = ((new URL(location.href)).searchParams);
   let criteria = searchParams.get('criteria');
   criteria = ['or', 'and'].includes(criteria) ? criteria : 'or';
   searchParams.set('criteria', criteria);
+  // An empty cursor starts cursor pagination at the first page
+  searchParams.set('after', after || '');
 
   /**
    * @type {APIJSON<SubmissionGetData[]> | void}
@@ -30,6 +39,7 @@ const fetchSubmissions = async () => {
     return data?.data || new Array();
   };
 
+  nextCursor = data.cursor || null;
   return data.data;
 };
 
@@ -60,6 +70,17 @@ const renderSubmissionList = async (filteredList) => {
       })));
     });
   };
+
+  if (nextCursor) {
+    const loadMore = htmlToElement(
+      `<button type="button" class="btn btn-outline-primary">Load more</button>`
+    );
+    container.append(loadMore);
+    $(loadMore).on('click', async () => {
+      submissionList = submissionList.concat(await fetchSubmissions(nextCursor));
+      renderSubmissionList();
+    });
+  };
 };
 
 
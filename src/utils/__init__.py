@@ -8,4 +8,5 @@ from . import (
   api,
   forcetype,
   passwords,
+  pagination,
 )
\ No newline at end of file
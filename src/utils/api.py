@@ -3,7 +3,7 @@ API Parser
 """
 
 from .forcetype import recursiveValidation
-from typing import Any, Union, Literal, Optional, Mapping, get_origin, get_args
+from typing import Any, Union, Literal, Optional, Mapping, ClassVar, get_origin, get_args
 
 from requests import Response as ReqResponse
 from flask import Request, Response as FlaskResponse
@@ -42,6 +42,47 @@ class _APIBase:
   def get(self, name: Any, default = None) -> Any | None:
     return self.__dict__.get(name, default)
 
+  @classmethod
+  def loader_options(cls, model: Any, *extra: str) -> list[Any]:
+    """
+    Eager loading options for the relationships read when building this data
+
+    Many-to-one paths are joined, everything else is fetched with one `SELECT ... IN` per path,
+    so a page costs a constant number of queries
+
+    Parameters
+    ----------
+    `model: Model`, required
+      The model the paths start from
+
+    `*extra: str`
+      Additional dotted relationship paths, e.g. `assignment.classroom`
+
+    Returns
+    -------
+    `options: list[LoaderOption]`
+
+    Examples
+    --------
+    ```py
+      TextbookModel.query.options(*_TextbookGetData.loader_options(TextbookModel))
+    ```
+    """
+    from sqlalchemy.orm import joinedload, selectinload
+    from sqlalchemy.orm.interfaces import MANYTOONE
+
+    options = []
+    for path in (*getattr(cls, '_loaders', ()), *extra):
+      option, current = None, model
+      for name in path.split('.'):
+        attribute = getattr(current, name)
+        strategy = joinedload if attribute.property.direction is MANYTOONE else selectinload
+        option = strategy(attribute) if option is None else getattr(option, strategy.__name__)(attribute)
+        current = attribute.property.mapper.class_
+
+      options.append(option)
+    return options
+
 
 class _APIParser(_APIBase):
   """
@@ -422,10 +463,17 @@ class StoreGetReply(_APIReply):
 
 # Assignment LIST
 class AssignmentListRequest(_APIRequest):
-  """API Request for assignment listing"""
+  """
+  API Request for assignment listing
+
+  Sending after, empty for the first page, switches from page to cursor pagination
+  """
   criteria: Literal['and', 'or']
   query: Optional[str]
   page: Optional[int]
+  after: Optional[str]
+  per_page: Optional[int]
+  count: Optional[Boolean]
   createdLower: Optional[float]
   createdUpper: Optional[float | Literal['inf']]
 
@@ -433,6 +481,8 @@ class AssignmentListRequest(_APIRequest):
 class AssignmentListReply(_APIReply):
   """API Reply for listing assignments"""
   data: list['_AssignmentGetData']
+  cursor: Optional[str] = None
+  total: Optional[int] = None
 
 class AssignmentListResponse(_APIResponse):
   """API Response for listing assignments"""
@@ -459,6 +509,8 @@ class _AssignmentGetData(_APIBase):
   created_at  : float
   updated_at  : float
 
+  _loaders: ClassVar[tuple[str, ...]] = ('classroom', 'textbooks', 'submissions')
+
 class AssignmentGetRequest(_APIRequest):
   """API Request for assignment fetching"""
   assignment_id: str
@@ -549,10 +601,17 @@ AssignmentDeleteResponse = GenericResponse
 
 # Classroom LIST
 class ClassroomListRequest(_APIRequest):
-  """API Request for classroom listing"""
+  """
+  API Request for classroom listing
+
+  Sending after, empty for the first page, switches from page to cursor pagination
+  """
   criteria: Literal['and', 'or']
   query: Optional[str]
   page: Optional[int]
+  after: Optional[str]
+  per_page: Optional[int]
+  count: Optional[Boolean]
   createdLower: Optional[float]
   createdUpper: Optional[float | Literal['inf']]
 
@@ -567,10 +626,14 @@ class _ClassroomListData(_APIBase):
   cover_image   : Union[str, None]
   created_at    : float
 
+  _loaders: ClassVar[tuple[str, ...]] = ('owner', 'cover_image')
+
 @dataclass
 class ClassroomListReply(_APIReply):
   """API Reply for listing classrooms"""
   data: list[_ClassroomListData]
+  cursor: Optional[str] = None
+  total: Optional[int] = None
 
 
 
@@ -596,6 +659,8 @@ class _ClassroomGetData(_APIBase):
   created_at    : float
   updated_at    : float
 
+  _loaders: ClassVar[tuple[str, ...]] = ('educators', 'students', 'textbooks', 'assignments', 'cover_image')
+
 class ClassroomGetRequest(_APIRequest):
   """API Request for classroom fetching"""
   classroom_id: str
@@ -711,10 +776,22 @@ ClassroomLeaveResponse = GenericResponse
 
 # Textbook LIST
 class TextbookListRequest(_APIRequest):
-  """API Request for textbook listing"""
+  """
+  API Request for textbook listing
+
+  categories to be separated by ',', matching any of them
+
+  Sending after, empty for the first page, switches from page to cursor pagination.
+  Cursor pages are ordered by recency even when searching
+  """
   criteria: Literal['and', 'or']
   query: Optional[str]
   page: Optional[int]
+  after: Optional[str]
+  per_page: Optional[int]
+  count: Optional[Boolean]
+  categories: Optional[str]
+  facets: Optional[Boolean]
   priceLower: Optional[float]
   priceUpper: Optional[float | Literal['inf']]
   createdLower: Optional[float]
@@ -724,6 +801,10 @@ class TextbookListRequest(_APIRequest):
 class TextbookListReply(_APIReply):
   """API Reply for listing textbooks"""
   data: list['_TextbookGetData']
+  cursor: Optional[str] = None
+  total: Optional[int] = None
+  facets: Optional[dict[str, int]] = None
+  """Textbook count per category, ignoring the categories filter"""
 
 
 
@@ -747,6 +828,8 @@ class _TextbookGetData(_APIBase):
   created_at : float
   updated_at : float
 
+  _loaders: ClassVar[tuple[str, ...]] = ('cover_image', 'categories')
+
 class TextbookGetRequest(_APIRequest):
   """API Request for textbook fetching"""
   textbook_id: str
@@ -1089,10 +1172,17 @@ ImageDeleteResponse = GenericResponse
 
 # Sale LIST
 class SaleListRequest(_APIRequest):
-  """API Request for sale listing"""
+  """
+  API Request for sale listing
+
+  Sending after, empty for the first page, switches from page to cursor pagination
+  """
   criteria: Literal['and', 'or']
   query: Optional[str]
   page: Optional[int]
+  after: Optional[str]
+  per_page: Optional[int]
+  count: Optional[Boolean]
   priceLower: Optional[float]
   priceUpper: Optional[float | Literal['inf']]
   createdLower: Optional[float]
@@ -1102,6 +1192,8 @@ class SaleListRequest(_APIRequest):
 class SaleListReply(_APIReply):
   """API Reply for listing sales"""
   data: list['_SaleGetData']
+  cursor: Optional[str] = None
+  total: Optional[int] = None
 
 
 
@@ -1122,6 +1214,8 @@ class _SaleGetData(_APIBase):
   paid_at     : Optional[float]
   total_cost  : float
 
+  _loaders: ClassVar[tuple[str, ...]] = ('data.textbook',)
+
 class SaleGetRequest(_APIRequest):
   """API Request for sale fetching"""
   sale_id: str
@@ -1144,10 +1238,17 @@ class SaleaGetResponse(_APIResponse):
 
 # Submission LIST
 class SubmissionListRequest(_APIRequest):
-  """API Request for listing submissions"""
+  """
+  API Request for listing submissions
+
+  Sending after, empty for the first page, switches from page to cursor pagination
+  """
   criteria: Literal['and', 'or']
   query: Optional[str]
   page: Optional[int]
+  after: Optional[str]
+  per_page: Optional[int]
+  count: Optional[Boolean]
   createdLower: Optional[float]
   createdUpper: Optional[float | Literal['inf']]
 
@@ -1155,6 +1256,8 @@ class SubmissionListRequest(_APIRequest):
 class SubmissionListReply(_APIReply):
   """API Reply for listing submissions"""
   data: list['_SubmissionGetData']
+  cursor: Optional[str] = None
+  total: Optional[int] = None
 
 
 
@@ -1174,6 +1277,8 @@ class _SubmissionGetData(_APIBase):
   created_at   : float
   updated_at   : float
 
+  _loaders: ClassVar[tuple[str, ...]] = ('comments', 'snippet')
+
 class SubmissionGetRequest(_APIRequest):
   """API Request for fetching submissions"""
   submission_id: str
@@ -1267,10 +1372,17 @@ class SubmissionSnippetGetResponse(_APIResponse):
 
 # User LIST
 class UserListRequest(_APIRequest):
-  """API Request for fetching user list"""
+  """
+  API Request for fetching user list
+
+  Sending after, empty for the first page, switches from page to cursor pagination
+  """
   criteria: Literal['and', 'or']
   query: Optional[str]
   page: Optional[int]
+  after: Optional[str]
+  per_page: Optional[int]
+  count: Optional[Boolean]
   createdLower: Optional[float]
   createdUpper: Optional[float | Literal['inf']]
 
@@ -1278,6 +1390,8 @@ class UserListRequest(_APIRequest):
 class UserListReply(_APIReply):
   """API Reply for fetching user list"""
   data: list['_UserGetData']
+  cursor: Optional[str] = None
+  total: Optional[int] = None
 
 
 
@@ -1299,6 +1413,8 @@ class _UserGetData(_APIBase):
   created_at   : float
   last_login   : float
 
+  _loaders: ClassVar[tuple[str, ...]] = ('profile_image',)
+
 class UserGetRequest(_APIRequest):
   """API Request for fetching user"""
   user_id: str
@@ -1390,3 +1506,41 @@ class ContactRequest(_APIRequest):
   email: str
   subject: str
   message: str
+
+
+
+
+
+
+
+
+# Health GET
+@dataclass
+class _HealthPoolData(_APIBase):
+  size: int
+  checked_out: int
+  overflow: int
+  max_overflow: int
+  exhausted: bool
+
+@dataclass
+class _HealthCDNCacheData(_APIBase):
+  files: int
+  size_bytes: int
+  max_bytes: int
+  hits: int
+  misses: int
+  evictions: int
+
+@dataclass
+class _HealthGetData(_APIBase):
+  database: Literal['ok', 'unreachable', 'exhausted']
+  latency_ms: Optional[float]
+  pid: Optional[int] = None
+  pool: Optional[_HealthPoolData] = None
+  cdn_cache: Optional[_HealthCDNCacheData] = None
+
+@dataclass
+class HealthGetReply(_APIReply):
+  """API Reply for the health check, admins also get the pool and cache of the worker that answered"""
+  data: _HealthGetData
@@ -3,6 +3,9 @@ Extensions importer
 """
 
 from . import (
+  cache,
+  disk_cache,
+  bloom_filter,
   utc_time,
   math_lib,
   exponential_backoff,
@@ -0,0 +1,92 @@
+"""
+Bloom filter implementation
+"""
+
+import math
+import hashlib
+from typing import Iterable
+
+
+class BloomFilter:
+  """
+  Probabilistic set membership
+
+  Never returns a false negative, false positives happen at roughly `error_rate`
+  once `capacity` items have been added
+
+  Examples
+  --------
+  ```py
+    bloom = BloomFilter(capacity = 1000)
+    bloom.add('a')
+    'a' in bloom # True
+    'b' in bloom # False (most likely)
+  ```
+  """
+
+  _bits: bytearray
+  _size: int
+  _hashes: int
+
+  capacity: int
+  count: int
+
+  def __init__(self, capacity: int = 1024, error_rate: float = 0.001, items: Iterable[str] = ()) -> None:
+    """
+    Initializes a BloomFilter
+
+    Parameters
+    ----------
+    `capacity: int`, optional (defaults to 1024)
+      The expected number of items
+
+    `error_rate: float`, optional (defaults to 0.001)
+      The target false positive rate at capacity
+
+    `items: Iterable[str]`, optional (defaults to ())
+      Items to add on creation
+    """
+    assert 0 < error_rate < 1, 'error_rate must be between 0 and 1'
+
+    self.capacity = max(1, capacity)
+    self.count = 0
+
+    self._size = max(8, math.ceil(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+    self._hashes = max(1, round(self._size / self.capacity * math.log(2)))
+    self._bits = bytearray((self._size + 7) // 8)
+
+    for item in items:
+      self.add(item)
+
+  def __contains__(self, item: str) -> bool:
+    return all(
+      self._bits[i >> 3] & (1 << (i & 7)) for i in self._positions(item)
+    )
+
+  def __len__(self) -> int:
+    return self.count
+
+  @property
+  def is_full(self) -> bool:
+    """If the false positive rate has degraded past `error_rate`"""
+    return self.count > self.capacity
+
+  def _positions(self, item: str) -> Iterable[int]:
+    """Kirsch-Mitzenmacher double hashing"""
+    digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:], 'little') | 1
+
+    return ((h1 + i * h2) % self._size for i in range(self._hashes))
+
+  def add(self, item: str) -> None:
+    """
+    Add an item
+
+    Parameters
+    ----------
+    `item: str`, required
+    """
+    for i in self._positions(item):
+      self._bits[i >> 3] |= 1 << (i & 7)
+    self.count += 1
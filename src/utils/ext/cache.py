@@ -0,0 +1,290 @@
+"""
+In-memory caching with time-to-live
+"""
+
+import time
+import threading
+from functools import wraps
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, ParamSpec, TypeVar, Tuple
+
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+P = ParamSpec('P')
+R = TypeVar('R')
+
+_MISSING = object()
+
+
+@dataclass(frozen=True)
+class CacheStats:
+  """Point in time counters for a TTLCache"""
+
+  hits: int
+  misses: int
+  evictions: int
+  expirations: int
+  invalidations: int
+  size: int
+  maxsize: int
+
+  @property
+  def hit_rate(self) -> float:
+    """Hits over lookups, 0 if there have been none"""
+    lookups = self.hits + self.misses
+    return self.hits / lookups if lookups else 0.0
+
+
+class TTLCache(Generic[K, V]):
+  """
+  Thread-safe LRU cache where every entry expires after `ttl` seconds
+
+  `PROCESS LOCAL`\n
+  Each gunicorn worker holds its own copy, so entries written by
+  another worker are only picked up once the local entry expires
+
+  Examples
+  --------
+  ```py
+    cache = TTLCache(ttl = 30, maxsize = 128)
+    cache.set('key', 1)
+    cache.set('short', 2, ttl = 5)
+    cache.get('key') # 1
+    cache.invalidate('key')
+    cache.stats().hit_rate # 1.0
+  ```
+  """
+
+  _data: 'OrderedDict[K, Tuple[float, V]]'
+  _lock: threading.Lock
+
+  _hits: int
+  _misses: int
+  _evictions: int
+  _expirations: int
+  _invalidations: int
+
+  ttl: float
+  maxsize: int
+
+  def __init__(self, ttl: float = 60, maxsize: int = 1024) -> None:
+    """
+    Initializes a TTLCache
+
+    Parameters
+    ----------
+    `ttl: float`, optional (defaults to 60)
+      Seconds before an entry expires
+
+    `maxsize: int`, optional (defaults to 1024)
+      The maximum number of entries before the least recently used is evicted
+    """
+    self._data = OrderedDict()
+    self._lock = threading.Lock()
+    self._hits = self._misses = self._evictions = self._expirations = self._invalidations = 0
+    self.configure(ttl, maxsize)
+
+  def __len__(self) -> int:
+    return len(self._data)
+
+  def __contains__(self, key: K) -> bool:
+    return self.get(key) is not None
+
+  def _evict(self) -> None:
+    while len(self._data) > self.maxsize:
+      self._data.popitem(last=False)
+      self._evictions += 1
+
+  def configure(self, ttl: Optional[float] = None, maxsize: Optional[int] = None) -> None:
+    """
+    Update the cache limits
+
+    Parameters
+    ----------
+    `ttl: float`, optional (defaults to None)
+
+    `maxsize: int`, optional (defaults to None)
+    """
+    with self._lock:
+      if ttl is not None:
+        self.ttl = float(ttl)
+      if maxsize is not None:
+        self.maxsize = max(1, int(maxsize))
+
+      self._evict()
+
+  def get(self, key: K, default: Optional[V] = None) -> Optional[V]:
+    """
+    Fetch a live entry
+
+    Parameters
+    ----------
+    `key: Hashable`, required
+
+    `default: Any`, optional (defaults to None)
+      Returned if the entry is missing or expired
+    """
+    with self._lock:
+      entry = self._data.get(key)
+      if entry is None:
+        self._misses += 1
+        return default
+
+      if entry[0] <= time.monotonic():
+        del self._data[key]
+        self._expirations += 1
+        self._misses += 1
+        return default
+
+      self._data.move_to_end(key)
+      self._hits += 1
+      return entry[1]
+
+  def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+    """
+    Store an entry, evicting the least recently used entry if full
+
+    Parameters
+    ----------
+    `key: Hashable`, required
+
+    `value: Any`, required
+
+    `ttl: float`, optional (defaults to None)
+      Seconds before this entry expires, else the cache ttl
+    """
+    with self._lock:
+      self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+      self._data.move_to_end(key)
+      self._evict()
+
+  def invalidate(self, *keys: K) -> None:
+    """
+    Drop entries
+
+    Parameters
+    ----------
+    `*keys: Hashable`
+    """
+    with self._lock:
+      for key in keys:
+        if self._data.pop(key, _MISSING) is not _MISSING:
+          self._invalidations += 1
+
+  def invalidate_where(self, predicate: Callable[[K], bool]) -> None:
+    """
+    Drop every entry whose key matches
+
+    Parameters
+    ----------
+    `predicate: (key) -> bool`, required
+    """
+    with self._lock:
+      for key in [k for k in self._data if predicate(k)]:
+        del self._data[key]
+        self._invalidations += 1
+
+  def invalidate_on(
+    self,
+    target: Any,
+    *identifiers: str,
+    key: Optional[Callable[..., Optional[K]]] = None,
+  ) -> None:
+    """
+    Invalidate whenever a SQLAlchemy event fires
+
+    Parameters
+    ----------
+    `target: Any`, required
+      The event target, e.g. a model class
+
+    `*identifiers: str`
+      The event names, e.g. `after_insert`
+
+    `key: (*eventArgs) -> Hashable | None`, optional (defaults to None)
+      Picks the entry to drop from the event arguments, else every entry is dropped
+
+    Examples
+    --------
+    ```py
+      cache.invalidate_on(UserModel, 'after_update', key = lambda mapper, conn, target: target.id)
+    ```
+    """
+    from sqlalchemy import event
+
+    def _listener(*args: Any) -> None:
+      if key is None:
+        self.clear()
+        return
+
+      k = key(*args)
+      if k is not None:
+        self.invalidate(k)
+
+    for identifier in identifiers:
+      event.listen(target, identifier, _listener)
+
+  def clear(self) -> None:
+    """Drop every entry"""
+    with self._lock:
+      self._invalidations += len(self._data)
+      self._data.clear()
+
+  def stats(self) -> CacheStats:
+    """Snapshot of the hit/miss counters"""
+    with self._lock:
+      return CacheStats(
+        hits=self._hits,
+        misses=self._misses,
+        evictions=self._evictions,
+        expirations=self._expirations,
+        invalidations=self._invalidations,
+        size=len(self._data),
+        maxsize=self.maxsize,
+      )
+
+
+def cached(
+  cache: TTLCache[Any, Any],
+  key: Optional[Callable[..., Hashable]] = None,
+  ttl: Optional[float] = None,
+) -> Callable[[Callable[P, R]], Callable[P, R]]:
+  """
+  Memoize a function on a TTLCache
+
+  Parameters
+  ----------
+  `cache: TTLCache`, required
+
+  `key: (*args, **kwargs) -> Hashable`, optional (defaults to None)
+    Builds the cache key, else the positional and keyword arguments are used
+
+  `ttl: float`, optional (defaults to None)
+    Seconds before each result expires, else the cache ttl
+
+  Examples
+  --------
+  ```py
+    statsCache = TTLCache(ttl = 60, maxsize = 1)
+
+    @cached(statsCache)
+    def getStats() -> dict: ...
+
+    statsCache.clear()
+  ```
+  """
+  def decorator(func: Callable[P, R]) -> Callable[P, R]:
+    @wraps(func)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+      k = key(*args, **kwargs) if key else (args, tuple(sorted(kwargs.items())))
+
+      value = cache.get(k, _MISSING)
+      if value is _MISSING:
+        value = func(*args, **kwargs)
+        cache.set(k, value, ttl)
+      return value
+
+    return wrapper
+  return decorator
@@ -0,0 +1,306 @@
+"""
+Size-bounded LRU cache of files on local disk
+"""
+
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass
+from collections import OrderedDict
+from typing import IO, Iterable, Optional
+
+
+@dataclass(frozen=True)
+class DiskCacheStats:
+  """Point in time counters for a DiskLRUCache"""
+
+  hits: int
+  misses: int
+  evictions: int
+  rejections: int
+  files: int
+  size_bytes: int
+  max_bytes: int
+
+  @property
+  def hit_rate(self) -> float:
+    """Hits over lookups, 0 if there have been none"""
+    lookups = self.hits + self.misses
+    return self.hits / lookups if lookups else 0.0
+
+
+class DiskLRUCache:
+  """
+  Thread-safe cache of files in a directory, evicting the least recently used past `max_bytes`
+
+  Files are written to a temporary name and renamed into place, so readers never see
+  partial files and several gunicorn workers can share the directory.
+
+  `PROCESS LOCAL INDEX`\n
+  Each worker tracks sizes and recency itself, starting from the files already on disk
+  ordered by modification time. A file evicted by another worker is treated as a miss.
+  Workers only count the files they wrote or read, so a shared directory can grow to
+  the number of workers × `max_bytes`
+
+  The directory is made readable by the owner only, as it holds private uploads.
+  It is created on first use rather than when configured, and caching is disabled
+  with a warning if it cannot be created or belongs to another user
+
+  Examples
+  --------
+  ```py
+    cache = DiskLRUCache('/tmp/files', max_bytes = 1 << 30)
+    path = cache.get('textbook-uploads/abc@1')
+    if path is None:
+      path = cache.put('textbook-uploads/abc@1', chunks)
+    cache.stats().hit_rate
+  ```
+  """
+
+  _index: 'OrderedDict[str, int]'
+  _lock: threading.Lock
+  _size: int
+  _usable: Optional[bool]
+
+  _hits: int
+  _misses: int
+  _evictions: int
+  _rejections: int
+
+  directory: Optional[str]
+  max_bytes: int
+  max_file_bytes: int
+
+  def __init__(
+    self,
+    directory: Optional[str] = None,
+    max_bytes: int = 1 << 30,
+    max_file_bytes: int = 100 << 20,
+  ) -> None:
+    """
+    Initializes a DiskLRUCache
+
+    Parameters
+    ----------
+    `directory: str`, optional (defaults to None)
+      Created on first use if missing, with mode 0o700. Nothing is cached until one is set
+
+    `max_bytes: int`, optional (defaults to 1 GiB)
+      Total size before the least recently used files are removed
+
+    `max_file_bytes: int`, optional (defaults to 100 MiB)
+      Larger files are not cached
+    """
+    self._index = OrderedDict()
+    self._lock = threading.Lock()
+    self._size = 0
+    self._usable = None
+    self.directory = None
+    self._hits = self._misses = self._evictions = self._rejections = 0
+    self.configure(directory, max_bytes, max_file_bytes)
+
+  def __len__(self) -> int:
+    return len(self._index)
+
+  def configure(
+    self,
+    directory: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    max_file_bytes: Optional[int] = None,
+  ) -> None:
+    """
+    Update the cache limits, a new directory is scanned for existing files on first use
+
+    Parameters
+    ----------
+    `directory: str`, optional (defaults to None)
+
+    `max_bytes: int`, optional (defaults to None)
+
+    `max_file_bytes: int`, optional (defaults to None)
+    """
+    with self._lock:
+      if max_bytes is not None:
+        self.max_bytes = max(0, int(max_bytes))
+      if max_file_bytes is not None:
+        self.max_file_bytes = max(0, int(max_file_bytes))
+
+      if (directory is not None) and (directory != self.directory):
+        self.directory = directory
+        self._index = OrderedDict()
+        self._size = 0
+        self._usable = None
+
+      self._evict()
+
+  def _ready(self) -> bool:
+    """Create and scan the directory on first use, False if there is none or it is unusable"""
+    if self._usable is None and self.directory is not None:
+      try:
+        self._scan(self.directory)
+        self._usable = True
+      except OSError as e:
+        logging.warning('Disk cache %s is unusable, caching disabled: %s', self.directory, e)
+        self._usable = False
+    return bool(self._usable)
+
+  def _scan(self, directory: str) -> None:
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.chmod(directory, 0o700)
+
+    entries = []
+    for entry in os.scandir(directory):
+      if entry.is_file() and not entry.name.endswith('.tmp'):
+        stat = entry.stat()
+        entries.append((stat.st_mtime, entry.name, stat.st_size))
+
+    self._index = OrderedDict((name, size) for _, name, size in sorted(entries))
+    self._size = sum(self._index.values())
+
+  def _evict(self) -> None:
+    while self._index and self._size > self.max_bytes:
+      name, size = self._index.popitem(last=False)
+      self._size -= size
+      self._evictions += 1
+      try:
+        os.remove(os.path.join(self.directory, name))  # type: ignore
+      except FileNotFoundError:
+        pass
+
+  @staticmethod
+  def _name(key: str) -> str:
+    return hashlib.sha256(key.encode()).hexdigest()
+
+  def get(self, key: str) -> Optional[str]:
+    """
+    Path of a cached file, marking it recently used
+
+    Parameters
+    ----------
+    `key: str`, required
+      Should change whenever the file content does, e.g. include a version
+
+    Returns
+    -------
+    `path: str | None`
+      None on a miss or when the cache is disabled
+    """
+    name = self._name(key)
+
+    with self._lock:
+      if not self._ready():
+        self._misses += 1
+        return None
+
+      path = os.path.join(self.directory, name)  # type: ignore
+      try:
+        os.utime(path)
+      except FileNotFoundError:
+        if self._index.pop(name, None) is not None:
+          self._size = sum(self._index.values())
+        self._misses += 1
+        return None
+
+      if name not in self._index:
+        self._index[name] = os.path.getsize(path)
+        self._size += self._index[name]
+      self._index.move_to_end(name)
+      self._hits += 1
+      return path
+
+  def put(self, key: str, chunks: Iterable[bytes], size: Optional[int] = None) -> Optional[str]:
+    """
+    Store a file, evicting the least recently used files if full
+
+    Parameters
+    ----------
+    `key: str`, required
+
+    `chunks: Iterable[bytes]`, required
+      The file content, consumed while writing
+
+    `size: int`, optional (defaults to None)
+      Expected size, lets oversized files be rejected before reading anything
+
+    Returns
+    -------
+    `path: str | None`
+      None if the file is over `max_file_bytes` or the cache is disabled
+    """
+    with self._lock:
+      if not self._ready():
+        return None
+      if (size is not None) and (size > self.max_file_bytes):
+        self._rejections += 1
+        return None
+      directory: str = self.directory  # type: ignore
+
+    name = self._name(key)
+    path = os.path.join(directory, name)
+    temp = f'{path}.{uuid.uuid4().hex}.tmp'
+
+    written = 0
+    try:
+      with open(temp, 'wb') as f:
+        written = self._write(f, chunks)
+      if written is None:
+        with self._lock:
+          self._rejections += 1
+        return None
+
+      os.replace(temp, path)
+    finally:
+      if os.path.exists(temp):
+        os.remove(temp)
+
+    with self._lock:
+      self._size += written - self._index.get(name, 0)
+      self._index[name] = written
+      self._index.move_to_end(name)
+      self._evict()
+    return path
+
+  def _write(self, f: IO[bytes], chunks: Iterable[bytes]) -> Optional[int]:
+    """Bytes written, None once past `max_file_bytes`"""
+    written = 0
+    for chunk in chunks:
+      written += len(chunk)
+      if written > self.max_file_bytes:
+        return None
+      f.write(chunk)
+    return written
+
+  def invalidate(self, *keys: str) -> None:
+    """
+    Remove cached files
+
+    Parameters
+    ----------
+    `*keys: str`
+    """
+    with self._lock:
+      if not self._ready():
+        return
+
+      for key in keys:
+        name = self._name(key)
+        self._size -= self._index.pop(name, 0)
+        try:
+          os.remove(os.path.join(self.directory, name))  # type: ignore
+        except FileNotFoundError:
+          pass
+
+  def stats(self) -> DiskCacheStats:
+    """Snapshot of the hit/miss counters and disk usage"""
+    with self._lock:
+      return DiskCacheStats(
+        hits=self._hits,
+        misses=self._misses,
+        evictions=self._evictions,
+        rejections=self._rejections,
+        files=len(self._index),
+        size_bytes=self._size,
+        max_bytes=self.max_bytes,
+      )
@@ -0,0 +1,214 @@
+"""
+Keyset pagination
+
+Pages continue from the last row seen instead of an offset,
+so deep pages cost the same as the first one
+"""
+
+import json
+import base64
+import binascii
+from datetime import datetime
+from dataclasses import dataclass
+from typing import Any, Generic, Optional, Sequence, TypeVar
+
+from werkzeug.exceptions import BadRequest
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Query, InstrumentedAttribute
+
+
+T = TypeVar('T')
+
+DEFAULT_PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+def given_cursor(after: Optional[str]) -> Optional[str]:
+  """
+  The cursor a request sent, None if it sent none
+
+  The request parser turns a missing field into the string 'None'
+
+  Parameters
+  ----------
+  `after: str`, optional
+  """
+  return None if after == 'None' else after
+
+
+@dataclass
+class KeysetPage(Generic[T]):
+  """A page of rows and the cursor for the next one"""
+
+  items: list[T]
+  cursor: Optional[str]
+  """`None` on the last page"""
+
+  total: Optional[int] = None
+  """Rows matching the query, only counted when asked for"""
+
+  def __iter__(self):
+    return iter(self.items)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+  """
+  Encode the sort key of a row into an opaque url-safe cursor
+
+  Parameters
+  ----------
+  `values: Sequence[Any]`, required
+    Datetimes are stored as ISO strings
+
+  Returns
+  -------
+  `cursor: str`
+  """
+  raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+  return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, columns: Sequence[InstrumentedAttribute[Any]]) -> list[Any]:
+  """
+  Decode a cursor made by `encode_cursor`
+
+  Parameters
+  ----------
+  `cursor: str`, required
+
+  `columns: Sequence[Column]`, required
+    The sort columns, used to restore each value's type
+
+  Returns
+  -------
+  `values: list[Any]`
+
+  Raises
+  ------
+  `BadRequest: code 400`
+    The cursor is malformed or does not match the columns
+  """
+  try:
+    values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    assert isinstance(values, list) and len(values) == len(columns)
+
+    return [
+      datetime.fromisoformat(v) if column.type.python_type is datetime else v
+      for column, v in zip(columns, values)
+    ]
+  except (ValueError, TypeError, AssertionError, binascii.Error, NotImplementedError):
+    raise BadRequest('after is not a valid cursor')
+
+
+def keyset_paginate(
+  query: 'Query[T]',
+  order: Sequence[InstrumentedAttribute[Any]],
+  after: Optional[str] = None,
+  per_page: Optional[int] = None,
+) -> KeysetPage[T]:
+  """
+  Fetch the page after a cursor, ordered descending by `order`
+
+  Parameters
+  ----------
+  `query: Query`, required
+    The filtered query, must not already be ordered or limited
+
+  `order: Sequence[Column]`, required
+    Sort key, the last column must be unique, e.g. `(Model.created_at, Model.id)`
+
+  `after: str`, optional (defaults to None)
+    The cursor from the previous page, else the first page
+
+  `per_page: int`, optional (defaults to 20)
+    Capped at 100
+
+  Returns
+  -------
+  `page: KeysetPage`
+
+  Examples
+  --------
+  ```py
+    page = keyset_paginate(
+      SubmissionModel.query.filter(SubmissionModel.student_id == user.id),
+      (SubmissionModel.created_at, SubmissionModel.id),
+      req.after,
+    )
+    page.items, page.cursor
+  ```
+  """
+  per_page = min(max(1, per_page or DEFAULT_PER_PAGE), MAX_PER_PAGE)
+  after = given_cursor(after)
+
+  if after:
+    values = decode_cursor(after, order)
+
+    # (a, b) < (x, y) as a AND/OR chain, row values are not portable across dialects
+    condition = order[-1] < values[-1]
+    for column, value in zip(reversed(order[:-1]), reversed(values[:-1])):
+      condition = or_(column < value, and_(column == value, condition))
+    query = query.filter(condition)
+
+  rows = query.order_by(*(column.desc() for column in order)).limit(per_page + 1).all()
+  items = rows[:per_page]
+
+  cursor = None
+  if len(rows) > per_page:
+    cursor = encode_cursor([getattr(items[-1], column.key) for column in order])
+
+  return KeysetPage(items, cursor)
+
+
+def paginate(
+  query: 'Query[T]',
+  order: Sequence[InstrumentedAttribute[Any]],
+  after: Optional[str] = None,
+  page: Optional[int] = None,
+  per_page: Optional[int] = None,
+  count: bool = False,
+) -> KeysetPage[T]:
+  """
+  Keyset page when a cursor is given, else an offset page, ordered descending by `order`
+
+  Offset pages keep older clients working but cost more the deeper they go
+  and have no cursor. Neither runs a `COUNT(*)` unless asked to
+
+  Parameters
+  ----------
+  `query: Query`, required
+    The filtered query. In cursor mode it must not already be ordered,
+    in offset mode `order` is applied after any existing ordering
+
+  `order: Sequence[Column]`, required
+    Sort key, the last column must be unique
+
+  `after: str`, optional (defaults to None)
+    The cursor from the previous page, an empty string starts cursor mode at the first page
+
+  `page: int`, optional (defaults to 1)
+    Offset page, ignored in cursor mode
+
+  `per_page: int`, optional (defaults to 20)
+    Capped at 100
+
+  `count: bool`, optional (defaults to False)
+    Fill `total` with the number of matching rows
+
+  Returns
+  -------
+  `page: KeysetPage`
+  """
+  total = query.order_by(None).count() if count else None
+  after = given_cursor(after)
+
+  if after is not None:
+    result = keyset_paginate(query, order, after, per_page)
+    result.total = total
+    return result
+
+  per_page = min(max(1, per_page or DEFAULT_PER_PAGE), MAX_PER_PAGE)
+  offset = (max(1, page or 1) - 1) * per_page
+
+  items = query.order_by(*(column.desc() for column in order)).offset(offset).limit(per_page).all()
+  return KeysetPage(items, None, total)
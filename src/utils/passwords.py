@@ -1,4 +1,145 @@
+import os
 import bcrypt
+import threading
+from typing import Any, Callable, Literal, Optional, TypeVar
+from werkzeug.exceptions import ServiceUnavailable
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+
+
+T = TypeVar('T')
+ExecutorMode = Literal['sync', 'thread', 'process']
+
+
+class PasswordHasherBusy(ServiceUnavailable):
+  """Raised when the bcrypt queue is full"""
+  description = 'Too many password checks in progress, please try again shortly'
+
+
+class _BcryptExecutor:
+  """
+  Runs bcrypt on a bounded pool with a bounded queue
+
+  `sync` runs inline on the caller, `thread` uses a thread pool (bcrypt releases the GIL)
+  and `process` uses a process pool.\n
+  The request thread still waits for the result, so no gunicorn thread is freed.
+  The pool caps how many hashes run at once and turns overload into `PasswordHasherBusy`
+  instead of every request queueing behind bcrypt.\n
+  The pool is created lazily so it is never inherited across a gunicorn fork
+  """
+
+  mode: ExecutorMode
+  rounds: int
+  workers: int
+  queue_size: int
+
+  _pid: Optional[int]
+  _pool: Optional[Executor]
+  _slots: threading.BoundedSemaphore
+  _lock: threading.Lock
+
+  def __init__(self) -> None:
+    self._pid = None
+    self._pool = None
+    self._lock = threading.Lock()
+    self.configure()
+
+  def configure(
+    self,
+    mode: ExecutorMode = 'sync',
+    rounds: int = 12,
+    workers: int = 2,
+    queue_size: int = 16,
+  ) -> None:
+    """
+    Update the executor, shutting down any running pool
+
+    Parameters
+    ----------
+    `mode: sync | thread | process`, optional (defaults to sync)
+
+    `rounds: int`, optional (defaults to 12)
+      The bcrypt cost factor for new hashes
+
+    `workers: int`, optional (defaults to 2)
+      Concurrent bcrypt operations
+
+    `queue_size: int`, optional (defaults to 16)
+      Operations allowed to wait for a worker before `PasswordHasherBusy` is raised
+    """
+    assert mode in ('sync', 'thread', 'process'), 'mode must be one of sync, thread or process'
+    assert 4 <= rounds <= 31, 'rounds must be between 4 and 31'
+
+    with self._lock:
+      if self._pool and self._pid == os.getpid():
+        self._pool.shutdown(wait=False)
+
+      self.mode = mode
+      self.rounds = rounds
+      self.workers = max(1, workers)
+      self.queue_size = max(0, queue_size)
+
+      self._pid = None
+      self._pool = None
+      self._slots = threading.BoundedSemaphore(self.workers + self.queue_size)
+
+  def _get_pool(self) -> Executor:
+    with self._lock:
+      if self._pool is None or self._pid != os.getpid():
+        self._pool = (
+          ProcessPoolExecutor(max_workers=self.workers)
+          if self.mode == 'process'
+          else ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+        )
+        self._pid = os.getpid()
+      return self._pool
+
+  def run(self, func: Callable[..., T], *args: Any) -> T:
+    """
+    Run a bcrypt function, blocking until it is done
+
+    Raises
+    ------
+    `PasswordHasherBusy`
+      If every worker is busy and the queue is full
+    """
+    if self.mode == 'sync':
+      return func(*args)
+
+    slots = self._slots
+    if not slots.acquire(blocking=False):
+      raise PasswordHasherBusy()
+
+    try:
+      future = self._get_pool().submit(func, *args)
+    except Exception:
+      slots.release()
+      raise
+
+    future.add_done_callback(lambda _: slots.release())
+    return future.result()
+
+
+executor = _BcryptExecutor()
+
+
+def configure(
+  mode: ExecutorMode = 'sync',
+  rounds: int = 12,
+  workers: int = 2,
+  queue_size: int = 16,
+) -> None:
+  """
+  Configure how bcrypt is run, see `_BcryptExecutor.configure`
+  """
+  executor.configure(mode=mode, rounds=rounds, workers=workers, queue_size=queue_size)
+
+
+# Top level so they can be pickled for the process pool
+def _hashpw(password: bytes, rounds: int) -> bytes:
+  return bcrypt.hashpw(password=password, salt=bcrypt.gensalt(rounds=rounds))
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+  return bcrypt.checkpw(password=password, hashed_password=hashed)
 
 
 def _encode(toEncode: str | bytes) -> bytes:
@@ -53,14 +194,14 @@ def hash_password(password: str | bytes) -> bytes:
   ------
   `TypeError`
     If the password parameter is of a valid type
+
+  `PasswordHasherBusy`
+    If the bcrypt queue is full
   """
   assert isinstance(password, (str, bytes))
   
   encoded: bytes = _encode(password)
-  return bcrypt.hashpw(
-    password = encoded,
-    salt = bcrypt.gensalt()
-  )
+  return executor.run(_hashpw, encoded, executor.rounds)
 
 
 
@@ -90,12 +231,12 @@ def compare_password(password: str | bytes, hashed: bytes) -> bool:
   ------
   `TypeError`
     If the password or hashed parameter is of a valid type
+
+  `PasswordHasherBusy`
+    If the bcrypt queue is full
   """
   assert isinstance(password, (str, bytes))
   assert isinstance(hashed, bytes)
 
   encoded: bytes = _encode(password)
-  return bcrypt.checkpw(
-    password = encoded,
-    hashed_password = hashed
-  )
+  return executor.run(_checkpw, encoded, hashed)
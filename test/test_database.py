@@ -58,6 +58,208 @@ def test_userModel(app: Flask):
   run()
 
 
+def test_userIdentityCache(app: Flask):
+  """
+  Testing for cached user lookups being served and invalidated
+  """
+  from src import db
+  from src.database import UserModel, identity_cache
+
+  def clean():
+    UserModel.query.filter(UserModel.username == 'identity_test_user').delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    userNew = UserModel(
+      email = 'identity_test_user@example.com',
+      username = 'identity_test_user',
+      password = '<PASSWORD>',
+      privilege = 'Student'
+    )
+    userNew.save()
+    userID = userNew.id
+
+    assert UserModel.query_identity(userID) is userNew
+    assert identity_cache.get(userID) is not None
+
+    # Served from cache in a new session
+    db.session.remove()
+    cached = UserModel.query_identity(userID)
+    assert isinstance(cached, UserModel)
+    assert cached.username == 'identity_test_user'
+
+    # Invalidated on save
+    cached.status = 'Locked'
+    cached.save()
+    assert identity_cache.get(userID) is None
+    assert UserModel.query_identity(userID).status == 'Locked'
+
+    # Filtered queries are cached as snapshots and dropped on writes
+    found = UserModel.query_by(None, username='identity_test_user')
+    assert [i.id for i in found] == [userID]
+    db.session.remove()
+    assert UserModel.query_by(None, username='identity_test_user')[0].status == 'Locked'
+
+    cached.status = 'Active'
+    db.session.merge(cached)
+    db.session.commit()
+    assert UserModel.query_by(None, username='identity_test_user')[0].status == 'Active'
+
+  run()
+
+
+def test_jwtBlocklistIndex(app: Flask):
+  """
+  Testing for revoked tokens being picked up by the blocklist index
+  """
+  from src import db
+  from src.database import JWTBlocklistModel
+
+  def clean():
+    JWTBlocklistModel.query.filter(JWTBlocklistModel.jti == 'blocklist_test_jti').delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    assert not JWTBlocklistModel.is_revoked('blocklist_test_jti')
+
+    JWTBlocklistModel('blocklist_test_jti', 'access').save()
+    assert JWTBlocklistModel.is_revoked('blocklist_test_jti')
+
+  run()
+
+
+def test_jwtBlocklistSyncWindow(app: Flask):
+  """
+  Testing tokens revoked on another worker are accepted until the next sync
+  """
+  from src import db
+  from src.database import JWTBlocklistModel, blocklist_index
+  from sqlalchemy import insert
+
+  def clean():
+    JWTBlocklistModel.query.filter(JWTBlocklistModel.jti == 'blocklist_window_jti').delete()
+    blocklist_index.sync_interval = app.config['JWT_BLOCKLIST_SYNC_INTERVAL']
+
+  @withCleanup(app, db, clean)
+  def run():
+    blocklist_index.sync_interval = 60
+    blocklist_index.rebuild()
+
+    # Written without this worker's mapper events, as another worker would
+    db.session.execute(insert(JWTBlocklistModel).values(jti = 'blocklist_window_jti', token_type = 'access'))
+    db.session.commit()
+    assert not JWTBlocklistModel.is_revoked('blocklist_window_jti')
+
+    # No window when syncing before every check
+    blocklist_index.sync_interval = 0
+    assert JWTBlocklistModel.is_revoked('blocklist_window_jti')
+
+  run()
+
+
+def test_jwtBlocklistExpiry(app: Flask):
+  """
+  Testing for expired revoked tokens being purged in batches
+  """
+  from src import db
+  from src.database import JWTBlocklistModel
+  from src.utils.ext import utc_time
+  from datetime import timedelta
+
+  def clean():
+    JWTBlocklistModel.query.filter(JWTBlocklistModel.jti.like('expiry_test_%')).delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    for i in range(5):
+      token = JWTBlocklistModel(f'expiry_test_old_{i}', 'access')
+      token.created_at = utc_time.get() - timedelta(days=1)
+      db.session.add(token)
+    db.session.add(JWTBlocklistModel('expiry_test_new', 'access'))
+    db.session.add(JWTBlocklistModel('expiry_test_refresh', 'refresh'))
+    db.session.commit()
+
+    purged = JWTBlocklistModel.clear_expired('1h', '1h', batch_size=2)
+    assert purged == 5, f'Purged {purged}'
+    assert JWTBlocklistModel.is_revoked('expiry_test_new')
+    assert JWTBlocklistModel.is_revoked('expiry_test_refresh')
+    assert not JWTBlocklistModel.is_revoked('expiry_test_old_0')
+
+  run()
+
+
+def test_periodicJob(app: Flask):
+  """
+  Testing background jobs are not started by CLI commands and run when this copy holds the lock
+  """
+  import click
+  from src import db
+  from src.service import scheduler
+
+  calls: list[int] = []
+
+  def job() -> int:
+    calls.append(1)
+    return len(calls)
+
+  @withCleanup(app, db)
+  def run():
+    with click.Context(click.Command('upgrade')):
+      assert scheduler.schedule(app, 'test-job', 60, job) is None
+
+    periodic = scheduler.PeriodicJob(app, 'test-job', 60, job)
+    assert periodic.is_runner()
+    assert periodic.run_once() == 1
+    periodic.stop()
+
+  run()
+
+
+def test_inProcessTokenRefresh(app: Flask):
+  """
+  Testing for access tokens minted from refresh tokens without the api hop
+  """
+  from src import db
+  from src.database import UserModel, JWTBlocklistModel
+  from src.api.v1.auth import refresh_access_token
+  from src.utils.api import TokenRefreshReply
+  from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+
+  revoked: list[str] = []
+
+  def clean():
+    UserModel.query.filter(UserModel.username == 'refresh_test_user').delete()
+    JWTBlocklistModel.query.filter(JWTBlocklistModel.jti.in_(revoked)).delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    userNew = UserModel(
+      email = 'refresh_test_user@example.com',
+      username = 'refresh_test_user',
+      password = '<PASSWORD>',
+      privilege = 'Student'
+    )
+    userNew.save()
+
+    refreshToken = create_refresh_token(identity=userNew, additional_claims={'aud': 'localhost'})
+    reply, status = refresh_access_token(refreshToken)
+    assert isinstance(reply, TokenRefreshReply) and status == 200
+    decoded = decode_token(reply.data.access_token)
+    assert decoded['sub'] == userNew.id and decoded['fresh'] is False
+
+    # Access tokens cannot be used to refresh
+    _, status = refresh_access_token(create_access_token(identity=userNew))
+    assert status == 422
+
+    # Revoked refresh tokens are rejected
+    revoked.append(decode_token(refreshToken)['jti'])
+    JWTBlocklistModel(revoked[0], 'refresh').save()
+    _, status = refresh_access_token(refreshToken)
+    assert status == 401
+
+  run()
+
+
 def test_token_User_Relationship(app: Flask):
   """
   Testing for Token-User DB Schema relationships & Token model writing to database
@@ -178,3 +380,860 @@ def test_classroom_user_relationship(app: Flask):
 
   run()
 
+
+
+def test_monthlyAggregation(app: Flask):
+  """
+  Testing for rows being bucketed by month in SQL
+  """
+  from src import db
+  from src.database import UserModel
+  from src.service import stats_provider
+  from src.utils.ext import utc_time
+  from datetime import timedelta
+
+  def clean():
+    UserModel.query.filter(UserModel.username.like('aggregate_test_%')).delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    now = utc_time.get()
+    dateRange = (now - timedelta(days=365), now + timedelta(days=1))
+    before = stats_provider.aggregateMonthly(UserModel, dateRange)
+
+    for i, days in enumerate([0, 0, 62]):
+      user = UserModel(
+        email = f'aggregate_test_{i}@example.com',
+        username = f'aggregate_test_{i}',
+        password = '<PASSWORD>',
+        privilege = 'Student'
+      )
+      user.created_at = now - timedelta(days=days)
+      db.session.add(user)
+    db.session.commit()
+
+    after = stats_provider.aggregateMonthly(UserModel, dateRange)
+    assert len(after.values) == len(before.values) >= 12
+    assert after.labels[-1] == f'{now.month}/{now.year}'
+    assert after.values[-1] - before.values[-1] == 2
+    assert (after.values - before.values).sum() == 3
+
+  run()
+
+
+def test_chartCacheInvalidation(app: Flask):
+  """
+  Testing for rendered admin charts being cached until a relevant write
+  """
+  from src import db
+  from src.database import UserModel
+  from src.api.v1.admin import renderChart, chartCache
+
+  def clean():
+    UserModel.query.filter(UserModel.username == 'chart_test_user').delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    svg, etag = renderChart('User')
+    assert svg.lstrip().startswith(b'<?xml')
+    assert renderChart('User')[1] == etag
+
+    # Re-rendering the same data, as another worker would, keeps the ETag
+    chartCache.clear()
+    assert renderChart('User') == (svg, etag)
+
+    UserModel(
+      email = 'chart_test_user@example.com',
+      username = 'chart_test_user',
+      password = '<PASSWORD>',
+      privilege = 'Student'
+    ).save()
+    assert renderChart('User')[1] != etag
+
+  run()
+
+
+def test_csvExport(app: Flask):
+  """
+  Testing for admin exports streaming quoted CSV
+  """
+  import csv
+  import gzip
+  from src import db
+  from src.database import UserModel
+  from src.api.v1.admin import exportRows, gzipStream
+
+  def clean():
+    UserModel.query.filter(UserModel.username.like('export_test_%')).delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    for i in range(3):
+      UserModel(
+        email = f'export_test_{i}@example.com',
+        username = f'export_test_{i},"quoted"',
+        password = '<PASSWORD>',
+        privilege = 'Student'
+      ).save()
+
+    chunks = list(exportRows('User', batchSize = 2))
+    rows = list(csv.reader(''.join(chunks).splitlines()))
+    assert rows[0] == ['id', 'username', 'email', 'status', 'created_at', 'privilege']
+    assert [r[1] for r in rows if r[1].startswith('export_test_')] == [f'export_test_{i},"quoted"' for i in range(3)]
+
+    assert gzip.decompress(b''.join(gzipStream(chunks))) == ''.join(chunks).encode()
+
+  run()
+
+
+def test_statisticRollup(app: Flask):
+  """
+  Testing for the statistics rollup following writes and matching a rebuild
+  """
+  from src import db
+  from src.database import UserModel, SaleModel, StatisticModel
+  from src.service import stats_provider
+
+  def clean():
+    for user in UserModel.query.filter(UserModel.username == 'rollup_test_user').all():
+      user.delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    StatisticModel.rebuild()
+    users = stats_provider.rollupTotal('users')
+    revenue = stats_provider.rollupTotal('revenue')
+
+    user = UserModel(
+      email = 'rollup_test_user@example.com',
+      username = 'rollup_test_user',
+      password = '<PASSWORD>',
+      privilege = 'Student'
+    )
+    user.save()
+    assert stats_provider.rollupTotal('users') == users + 1
+
+    sale = SaleModel(user=user, saleType='Subscription', total_cost=12.5)
+    sale.save()
+    assert stats_provider.rollupTotal('revenue') == revenue
+
+    # Webhook marking the sale as paid
+    sale.paid = True
+    sale.save()
+    assert stats_provider.rollupTotal('revenue') == revenue + 12.5
+
+    incremental = {(i.day, i.metric): i.value for i in StatisticModel.query.all()}
+    StatisticModel.rebuild()
+    assert {(i.day, i.metric): i.value for i in StatisticModel.query.all()} == incremental
+
+    user.delete()
+    assert stats_provider.rollupTotal('users') == users
+    assert stats_provider.rollupTotal('revenue') == revenue
+
+  run()
+
+
+def test_loaderProfiles(app: Flask):
+  """
+  Testing for serializer loader profiles loading a page in a constant number of queries
+  """
+  from src import db
+  from src.database import UserModel, ClassroomModel
+  from src.utils.api import _ClassroomGetData
+  from sqlalchemy import event
+
+  def clean():
+    ClassroomModel.query.filter(ClassroomModel.title == 'loader_test').delete()
+    UserModel.query.filter(UserModel.username.like('loader_test_%')).delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    owner = UserModel(
+      email = 'loader_test_owner@example.com',
+      username = 'loader_test_owner',
+      password = '<PASSWORD>',
+      privilege = 'Educator'
+    )
+    student = UserModel(
+      email = 'loader_test_student@example.com',
+      username = 'loader_test_student',
+      password = '<PASSWORD>',
+      privilege = 'Student'
+    )
+    db.session.add_all([owner, student])
+    db.session.commit()
+
+    for _ in range(5):
+      classroom = ClassroomModel(owner = owner, title = 'loader_test', description = 'desc')
+      db.session.add(classroom)
+      classroom.add_students(student)
+    db.session.commit()
+    db.session.expunge_all()
+
+    statements: list[str] = []
+    def count(conn, cursor, statement, *args) -> None:
+      statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+      classrooms = (
+        ClassroomModel.query.options(*_ClassroomGetData.loader_options(ClassroomModel))
+        .filter(ClassroomModel.title == 'loader_test')
+        .all()
+      )
+      for classroom in classrooms:
+        [i.id for i in classroom.educators + classroom.students + classroom.textbooks + classroom.assignments]
+        classroom.cover_image
+    finally:
+      event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(classrooms) == 5
+    assert len(statements) <= 1 + len(_ClassroomGetData._loaders), statements
+
+  run()
+
+
+def test_textbookOwnership(app: Flask):
+  """
+  Testing for the bought or authored textbook filter
+  """
+  import io
+  from pypdf import PdfWriter
+  from werkzeug.datastructures import FileStorage
+  from src import db
+  from src.database import UserModel, TextbookModel
+
+  def upload() -> FileStorage:
+    writer, stream = PdfWriter(), io.BytesIO()
+    writer.add_blank_page(72, 72)
+    writer.write(stream)
+    stream.seek(0)
+    return FileStorage(stream, filename = 'owned_test.pdf')
+
+  def clean():
+    for textbook in TextbookModel.query.filter(TextbookModel.title.like('owned_test_%')).all():
+      textbook.delete()
+    UserModel.query.filter(UserModel.username.like('owned_test_%')).delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    author = UserModel(
+      email = 'owned_test_author@example.com',
+      username = 'owned_test_author',
+      password = '<PASSWORD>',
+      privilege = 'Educator'
+    )
+    buyer = UserModel(
+      email = 'owned_test_buyer@example.com',
+      username = 'owned_test_buyer',
+      password = '<PASSWORD>',
+      privilege = 'Student'
+    )
+    db.session.add_all([author, buyer])
+    db.session.commit()
+
+    kept = TextbookModel(author, upload(), 'owned_test_kept')
+    sold = TextbookModel(author, upload(), 'owned_test_sold')
+    buyer.textbooks.append(sold)
+    db.session.commit()
+
+    def owned(user: UserModel, query: str = '') -> set[str]:
+      return {
+        i.title for i in TextbookModel.query.join(UserModel, TextbookModel.author_id == UserModel.id)
+        .filter(TextbookModel.owned_by(user.id), (TextbookModel.title + UserModel.username).contains(query))
+      }
+
+    assert owned(author) == {'owned_test_kept', 'owned_test_sold'}
+    assert owned(buyer) == {'owned_test_sold'}
+    assert owned(buyer, 'soldowned_test_author') == {'owned_test_sold'}
+    assert owned(buyer, 'kept') == set()
+
+    # Download checks match on the stored uri
+    from src.database import textbook_access_cache
+
+    textbook_access_cache.clear()
+    assert TextbookModel.can_download(author.id, kept.uri) is True
+    assert TextbookModel.can_download(buyer.id, sold.uri) is True
+    assert TextbookModel.can_download(buyer.id, kept.uri) is False
+    assert TextbookModel.can_download(buyer.id, '/public/textbook/missing.pdf') is None
+
+    # Grants are cached, denials are not
+    buyer.textbooks.append(kept)
+    db.session.commit()
+    assert TextbookModel.can_download(buyer.id, kept.uri) is True
+    hits = textbook_access_cache.stats().hits
+    assert TextbookModel.can_download(buyer.id, kept.uri) is True
+    assert textbook_access_cache.stats().hits == hits + 1
+
+  run()
+
+
+def test_keysetPagination(app: Flask):
+  """
+  Testing for keyset pagination walking every page once in order
+  """
+  import pytest
+  from datetime import datetime
+  from werkzeug.exceptions import BadRequest
+  from src import db
+  from src.database import UserModel, ClassroomModel
+  from src.utils.pagination import keyset_paginate
+
+  def clean():
+    ClassroomModel.query.filter(ClassroomModel.title.like('keyset_test_%')).delete()
+    UserModel.query.filter(UserModel.username == 'keyset_test_user').delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    owner = UserModel(
+      email = 'keyset_test_user@example.com',
+      username = 'keyset_test_user',
+      password = '<PASSWORD>',
+      privilege = 'Educator'
+    )
+    db.session.add(owner)
+    db.session.commit()
+
+    # Ties on created_at fall back to the id
+    created = [datetime(2024, 1, 1), datetime(2024, 1, 2), datetime(2024, 1, 2), datetime(2024, 1, 3), datetime(2024, 1, 4)]
+    for i, createdAt in enumerate(created):
+      classroom = ClassroomModel(owner = owner, title = f'keyset_test_{i}', description = 'desc')
+      classroom.created_at = createdAt
+      db.session.add(classroom)
+    db.session.commit()
+
+    query = ClassroomModel.query.filter(ClassroomModel.accessible_by(owner.id))
+    order = (ClassroomModel.created_at, ClassroomModel.id)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+      page = keyset_paginate(query, order, cursor, per_page = 2)
+      seen += [(i.created_at, i.id) for i in page]
+      pages += 1
+      cursor = page.cursor
+      if not cursor: break
+
+    assert pages == 3
+    assert seen == sorted(seen, reverse = True)
+    assert len(set(seen)) == len(created)
+
+    # A missing field reaches the endpoint as 'None', which is the first page
+    assert [i.id for i in keyset_paginate(query, order, 'None', per_page = 2)] == [i.id for i in keyset_paginate(query, order, None, per_page = 2)]
+
+    with pytest.raises(BadRequest):
+      keyset_paginate(query, order, 'not-a-cursor')
+
+  run()
+
+
+def test_textbookSearch(app: Flask):
+  """
+  Testing for the textbook search index following writes and ranking matches
+  """
+  import io
+  from pypdf import PdfWriter
+  from werkzeug.datastructures import FileStorage
+  from src import db
+  from src.database import UserModel, TextbookModel, textbook_search
+
+  def upload() -> FileStorage:
+    writer, stream = PdfWriter(), io.BytesIO()
+    writer.add_blank_page(72, 72)
+    writer.write(stream)
+    stream.seek(0)
+    return FileStorage(stream, filename = 'search_test.pdf')
+
+  def clean():
+    for textbook in TextbookModel.query.filter(TextbookModel.title.like('search_test %')).all():
+      textbook.delete()
+    UserModel.query.filter(UserModel.username.like('search_test_%')).delete()
+
+  def search(query: str) -> list[str]:
+    hits = textbook_search.match(query)
+    assert hits is not None
+    return [
+      i.title for i in TextbookModel.query.join(hits, hits.c.textbook_id == TextbookModel.id)
+      .filter(TextbookModel.title.like('search_test %'))
+      .order_by(hits.c.rank)
+    ]
+
+  @withCleanup(app, db, clean)
+  def run():
+    author = UserModel(
+      email = 'search_test_author@example.com',
+      username = 'search_test_quokka',
+      password = '<PASSWORD>',
+      privilege = 'Educator'
+    )
+    db.session.add(author)
+    db.session.commit()
+
+    TextbookModel(author, upload(), 'search_test Linear Algebra', 'Vectors and matrices', ['Mathematics'])
+    TextbookModel(author, upload(), 'search_test Calculus', 'Limits, then some linear approximation', ['Mathematics'])
+
+    assert textbook_search.match('  ') is None
+    assert search('linear') == ['search_test Linear Algebra', 'search_test Calculus']
+    assert search('alg') == ['search_test Linear Algebra']
+    assert search('mathemat calc') == ['search_test Calculus']
+    assert len(search('quokka')) == 2
+
+    author.username = 'search_test_wombat'
+    author.save()
+    assert search('quokka') == []
+    assert len(search('wombat')) == 2
+
+  run()
+
+
+def test_textbookCategories(app: Flask):
+  """
+  Testing for normalized textbook categories and faceting
+  """
+  import io
+  from pypdf import PdfWriter
+  from werkzeug.datastructures import FileStorage
+  from src import db
+  from src.database import UserModel, TextbookModel, CategoryModel
+
+  def upload() -> FileStorage:
+    writer, stream = PdfWriter(), io.BytesIO()
+    writer.add_blank_page(72, 72)
+    writer.write(stream)
+    stream.seek(0)
+    return FileStorage(stream, filename = 'category_test.pdf')
+
+  def clean():
+    for textbook in TextbookModel.query.filter(TextbookModel.title.like('category_test_%')).all():
+      textbook.delete()
+    CategoryModel.query.filter(CategoryModel.name.like('category_test %')).delete()
+    UserModel.query.filter(UserModel.username == 'category_test_user').delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    author = UserModel(
+      email = 'category_test_user@example.com',
+      username = 'category_test_user',
+      password = '<PASSWORD>',
+      privilege = 'Educator'
+    )
+    db.session.add(author)
+    db.session.commit()
+
+    algebra = TextbookModel(author, upload(), 'category_test_algebra', categories = ['category_test math', ' category_test  math '])
+    physics = TextbookModel(author, upload(), 'category_test_physics', categories = ['category_test math', 'category_test science'])
+    assert algebra.category_names == ['category_test math']
+    assert CategoryModel.query.filter(CategoryModel.name == 'category_test math').count() == 1
+
+    ids = TextbookModel.query.filter(TextbookModel.title.like('category_test_%')).with_entities(TextbookModel.id).statement
+    assert CategoryModel.facets(ids) == {'category_test math': 2, 'category_test science': 1}
+
+    found = TextbookModel.query.filter(TextbookModel.in_categories(['category_test science'])).all()
+    assert found == [physics]
+
+  run()
+
+
+def test_indexUsage(app: Flask):
+  """
+  Testing that hot lookups are served by an index, with `EXPLAIN QUERY PLAN`
+  """
+  from src import db
+  from src.database import (
+    UserModel,
+    SaleModel,
+    ImageModel,
+    CommentModel,
+    TextbookModel,
+    AssignmentModel,
+    SubmissionSnippetModel,
+  )
+  from src.database.association import user_textbook_association
+
+  from datetime import datetime, timedelta
+  from sqlalchemy import select
+
+  def plan(stmt) -> str:
+    compiled = stmt.compile(db.engine, compile_kwargs = {'literal_binds': True})
+    rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {compiled}')
+    return ' | '.join(row[-1] for row in rows)
+
+  @withCleanup(app, db)
+  def run():
+    if db.engine.dialect.name != 'sqlite':
+      return
+
+    week = (datetime(2024, 1, 1), datetime(2024, 1, 8))
+    expected = {
+      'ix_sale_table_user_id_paid': select(SaleModel).where(SaleModel.user_id == 'x', SaleModel.paid == True),
+      'ix_sale_table_session_id': select(SaleModel).where(SaleModel.session_id == 'x'),
+      'ix_sale_table_subscription_id': select(SaleModel).where(SaleModel.subscription_id == 'x'),
+      'ix_sale_table_created_at': select(SaleModel).where(SaleModel.created_at.between(*week)),
+      'ix_image_table_textbook_id': select(ImageModel).where(ImageModel.textbook_id == 'x'),
+      'ix_textbook_table_author_id': select(TextbookModel).where(TextbookModel.author_id == 'x'),
+      'ix_textbook_table_created_at': select(TextbookModel).order_by(TextbookModel.created_at.desc()).limit(20),
+      'ix_textbook_table_uri': select(TextbookModel.id).where(TextbookModel.uri == '/public/textbook/x'),
+      'ix_submission_snippet_table_public_key': select(SubmissionSnippetModel.id).where(SubmissionSnippetModel.public_key == 'x'),
+      'ix_assignment_table_classroom_id': select(AssignmentModel).where(AssignmentModel.classroom_id == 'x'),
+      'ix_comment_table_submission_id': select(CommentModel).where(CommentModel.submission_id == 'x'),
+      'ix_user_table_created_at': select(UserModel).where(UserModel.created_at >= week[0] - timedelta(days = 30)),
+      'ix_user_textbook_association_user_id': select(user_textbook_association).where(user_textbook_association.c.user_id == 'x'),
+    }
+
+    for index, stmt in expected.items():
+      found = plan(stmt)
+      assert index in found, f'{index} not used: {found}'
+
+  run()
+
+
+def test_schemaMigrations(app: Flask):
+  """
+  Testing that boot migrated the database and the revisions match the models
+  """
+  import click
+  from src import db
+  from src.service import migrations
+
+  from alembic import command
+  from alembic.migration import MigrationContext
+  from alembic.autogenerate import compare_metadata
+
+  @withCleanup(app, db)
+  def run():
+    with db.engine.connect() as connection:
+      assert migrations.current_revision(connection) == migrations.head_revision()
+
+      context = MigrationContext.configure(connection, opts = {
+        'compare_type': True,
+        'include_name': lambda name, type_, parent: not (name or '').startswith('textbook_search_table'),
+      })
+      assert compare_metadata(context, db.metadata) == []
+
+    # Already at head, nothing to do
+    migrations.check_schema()
+
+    # Behind head, `flask run` refuses to serve while other commands still load
+    with db.engine.begin() as connection:
+      command.stamp(migrations.get_config(connection), '0008')
+    try:
+      with click.Context(click.Command('upgrade')):
+        migrations.check_schema()
+
+      with click.Context(click.Command('run')):
+        try:
+          migrations.check_schema()
+          assert False, 'Expected SchemaOutOfDate'
+        except migrations.SchemaOutOfDate:
+          pass
+    finally:
+      with db.engine.begin() as connection:
+        command.stamp(migrations.get_config(connection), 'head')
+
+  run()
+
+
+def test_legacyDatabaseUpgrade(app: Flask):
+  """
+  Testing that a database built by `db.create_all()` before migrations is stamped and brought to head
+  """
+  from src import db
+  from src.service import migrations
+
+  from sqlalchemy import create_engine, inspect, text
+  from alembic import command
+  from alembic.migration import MigrationContext
+  from alembic.autogenerate import compare_metadata
+
+  @withCleanup(app, db)
+  def run():
+    engine = create_engine('sqlite://')
+
+    with engine.begin() as connection:
+      # Unversioned, as `db.create_all()` left it
+      migrations.upgrade(migrations.BASELINE, connection)
+      connection.execute(text('DROP TABLE alembic_version'))
+
+      # Only the tables and indexes from before the series of schema changes
+      inspector = inspect(connection)
+      assert set(inspector.get_table_names()) == {
+        'user_table', 'token_table', 'jwtblocklist_table', 'classroom_table', 'classroom_user_association',
+        'classroom_textbook_association', 'textbook_table', 'user_textbook_association', 'discount_table',
+        'sale_table', 'sale_textbook_association', 'image_table', 'assignment_table',
+        'assignment_textbook_association', 'submission_table', 'submission_snippet_table', 'comment_table',
+      }
+      for table in inspector.get_table_names():
+        assert inspector.get_indexes(table) == [], table
+
+      connection.execute(text(
+        "INSERT INTO user_table VALUES ('u1', 'legacy@example.com', 'legacy', 'Active', 'Educator', 'Free', 'x', 1, NULL, 'Inactive', '2024-01-02 10:00:00', '2024-01-02 10:00:00')"
+      ))
+      connection.execute(text(
+        "INSERT INTO textbook_table VALUES ('t1', 'u1', 'Legacy algebra', 'Vectors', 'math|science', 10, NULL, NULL, 'Available', 'Uploaded', '2024-01-03 10:00:00', '2024-01-03 10:00:00'),"
+        " ('t2', 'u1', 'Legacy physics', 'Forces', ' Science | physics|science', 10, NULL, NULL, 'Available', 'Uploaded', '2024-01-03 10:00:00', '2024-01-03 10:00:00')"
+      ))
+      connection.execute(text(
+        "INSERT INTO sale_table VALUES ('s1', 'u1', NULL, NULL, NULL, 'OneTime', 1, 10, '2024-01-03 11:00:00', '2024-01-03 11:00:00'),"
+        " ('s2', 'u1', NULL, NULL, NULL, 'OneTime', 0, 99, NULL, '2024-01-03 12:00:00')"
+      ))
+
+      assert migrations.upgrade(connection = connection) == (migrations.BASELINE, migrations.head_revision())
+
+      tables = inspect(connection).get_table_names()
+      for table in ('statistic_table', 'category_table', 'textbook_category_association', 'textbook_search_table'):
+        assert table in tables
+
+      context = MigrationContext.configure(connection, opts = {
+        'compare_type': True,
+        'include_name': lambda name, type_, parent: not (name or '').startswith('textbook_search_table'),
+      })
+      assert compare_metadata(context, db.metadata) == []
+
+      hits = connection.execute(text("SELECT textbook_id FROM textbook_search_table WHERE textbook_search_table MATCH 'science' ORDER BY textbook_id"))
+      assert hits.scalars().all() == ['t1', 't2']
+
+      # Pipe-joined categories moved onto the category table
+      linked = connection.execute(text(
+        'SELECT a.textbook_id, c.name FROM textbook_category_association a'
+        ' JOIN category_table c ON c.id = a.category_id ORDER BY a.textbook_id, c.name'
+      )).all()
+      assert [tuple(i) for i in linked] == [('t1', 'math'), ('t1', 'science'), ('t2', 'physics'), ('t2', 'science')]
+      assert connection.execute(text("SELECT count(*) FROM textbook_table WHERE categories != ''")).scalar() == 0
+
+      # Downgrading past the category tables writes the strings back
+      command.downgrade(migrations.get_config(connection), '0005')
+      legacy = connection.execute(text('SELECT id, categories FROM textbook_table ORDER BY id')).all()
+      assert [tuple(i) for i in legacy] == [('t1', 'math|science'), ('t2', 'physics|science')]
+
+      # Rollup filled from the existing rows
+      statistics = connection.execute(text('SELECT day, metric, value FROM statistic_table ORDER BY day, metric')).all()
+      assert [tuple(i) for i in statistics] == [
+        ('2024-01-02', 'users', 1.0),
+        ('2024-01-03', 'revenue', 10.0),
+        ('2024-01-03', 'textbooks', 2.0),
+      ]
+
+    engine.dispose()
+
+  run()
+
+
+def test_listPagination(app: Flask):
+  """
+  Testing list endpoints in page and cursor mode, counting only when asked
+  """
+  import io
+  from pypdf import PdfWriter
+  from werkzeug.datastructures import FileStorage
+  from flask_jwt_extended import create_access_token
+  from src import db
+  from src.database import UserModel, TextbookModel, ClassroomModel
+  from src.utils.pagination import decode_cursor
+
+  def upload() -> FileStorage:
+    writer, stream = PdfWriter(), io.BytesIO()
+    writer.add_blank_page(72, 72)
+    writer.write(stream)
+    stream.seek(0)
+    return FileStorage(stream, filename = 'listpage_test.pdf')
+
+  def clean():
+    for textbook in TextbookModel.query.filter(TextbookModel.title.like('listpage%')).all():
+      textbook.delete()
+    ClassroomModel.query.filter(ClassroomModel.title.like('listpage%')).delete()
+    UserModel.query.filter(UserModel.username == 'listpage_test_user').delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    author = UserModel(
+      email = 'listpage_test_user@example.com',
+      username = 'listpage_test_user',
+      password = '<PASSWORD>',
+      privilege = 'Educator'
+    )
+    db.session.add(author)
+    db.session.commit()
+
+    for i in range(5):
+      TextbookModel(author, upload(), f'listpage {i}')
+
+    client = app.test_client()
+    params = {'criteria': 'and', 'query': 'listpage', 'createdUpper': 'inf', 'per_page': 2}
+
+    # Page mode, no count unless asked for
+    first = client.get('/api/v1/textbook/list', query_string = params).get_json()
+    assert len(first['data']) == 2
+    assert first['cursor'] is None and first['total'] is None
+
+    counted = client.get('/api/v1/textbook/list', query_string = {**params, 'page': 3, 'count': 'y'}).get_json()
+    assert len(counted['data']) == 1 and counted['total'] == 5
+
+    # Cursor mode starts with an empty cursor and walks every row once
+    seen, after = [], ''
+    while after is not None:
+      reply = client.get('/api/v1/textbook/list', query_string = {**params, 'after': after}).get_json()
+      seen += [i['id'] for i in reply['data']]
+      after = reply['cursor']
+
+    assert len(seen) == len(set(seen)) == 5
+    assert client.get('/api/v1/textbook/list', query_string = {**params, 'after': 'not-a-cursor'}).status_code == 400
+
+    # Classrooms page the same way, with cursors from the shared encoder
+    author.email_verified = True
+    for i in range(3):
+      db.session.add(ClassroomModel(owner = author, title = f'listpage classroom {i}', description = 'desc'))
+    db.session.commit()
+
+    headers = {'Authorization': f'Bearer {create_access_token(identity = author)}'}
+    classrooms = {**params, 'query': 'listpage classroom'}
+
+    paged = client.get('/api/v1/classroom/list', query_string = {**classrooms, 'page': 2, 'count': 'y'}, headers = headers).get_json()
+    assert len(paged['data']) == 1 and paged['cursor'] is None and paged['total'] == 3
+
+    first = client.get('/api/v1/classroom/list', query_string = {**classrooms, 'after': ''}, headers = headers).get_json()
+    assert len(first['data']) == 2
+    assert len(decode_cursor(first['cursor'], (ClassroomModel.created_at, ClassroomModel.id))) == 2
+
+    last = client.get('/api/v1/classroom/list', query_string = {**classrooms, 'after': first['cursor']}, headers = headers).get_json()
+    assert len(last['data']) == 1 and last['cursor'] is None
+
+  run()
+
+
+def test_rosterBulk(app: Flask):
+  """
+  Testing roster changes run as single statements and keep collections fresh
+  """
+  from src import db
+  from src.database import UserModel, ClassroomModel
+  from src.database.association import classroom_user_association
+  from sqlalchemy import event
+
+  def clean():
+    ids = [i.id for i in ClassroomModel.query.filter(ClassroomModel.title == 'roster_test')]
+    classroom_user_association.query.filter(classroom_user_association.classroom_id.in_(ids)).delete()
+    ClassroomModel.query.filter(ClassroomModel.title == 'roster_test').delete()
+    UserModel.query.filter(UserModel.username.like('roster_test_%')).delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    owner = UserModel(email = 'roster_test_owner@example.com', username = 'roster_test_owner', password = '<PASSWORD>', privilege = 'Educator')
+    students = [
+      UserModel(email = f'roster_test_{i}@example.com', username = f'roster_test_{i}', password = '<PASSWORD>', privilege = 'Student')
+      for i in range(50)
+    ]
+    db.session.add_all([owner, *students])
+    db.session.commit()
+
+    classrooms = [ClassroomModel(owner = owner, title = 'roster_test', description = 'desc') for _ in range(3)]
+    db.session.add_all(classrooms)
+    db.session.commit()
+    classroom = classrooms[0]
+
+    statements: list[str] = []
+    def count(conn, cursor, statement, *args) -> None:
+      if 'classroom_user_association' in statement:
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+      classroom.add_students(owner, *students)
+    finally:
+      event.remove(db.engine, 'before_cursor_execute', count)
+
+    assert len(statements) == 1
+    assert len(classroom.students) == 50 and owner not in classroom.members
+
+    # Re-adding is a no-op, educators promote existing students
+    classroom.add_students(*students[:5])
+    classroom.add_educators(students[0])
+    assert len(classroom.students) == 49 and classroom.educators == [students[0]]
+
+    classroom.remove_students(*students[1:])
+    classroom.remove_educators(students[0])
+    db.session.commit()
+    assert classroom.members == []
+
+    # A user joining and leaving many classrooms at once
+    students[0].join_class(*classrooms)
+    assert all(i.is_student(students[0]) for i in classrooms)
+    assert len(students[0].classrooms) == 3
+
+    students[0].exit_class(*classrooms[:2])
+    assert students[0].classrooms == [classrooms[2]]
+
+  run()
+
+
+def test_snippetAccess(app: Flask):
+  """
+  Testing submission snippets are found by public key and checked in one query
+  """
+  import io
+  import os
+  from src import db
+  from src.database import (
+    UserModel,
+    ClassroomModel,
+    AssignmentModel,
+    SubmissionModel,
+    SubmissionSnippetModel,
+  )
+  from src.database.association import classroom_user_association
+  from werkzeug.datastructures import FileStorage
+  from sqlalchemy import event
+
+  def clean():
+    userIds = [i.id for i in UserModel.query.filter(UserModel.username.like('snippet_test_%'))]
+    for snippet in SubmissionSnippetModel.query.filter(SubmissionSnippetModel.student_id.in_(userIds)):
+      if snippet.iuri and os.path.exists(snippet.iuri):
+        os.remove(snippet.iuri)
+    SubmissionSnippetModel.query.filter(SubmissionSnippetModel.student_id.in_(userIds)).delete()
+    SubmissionModel.query.filter(SubmissionModel.student_id.in_(userIds)).delete()
+
+    classroomIds = [i.id for i in ClassroomModel.query.filter(ClassroomModel.title == 'snippet_test')]
+    AssignmentModel.query.filter(AssignmentModel.classroom_id.in_(classroomIds)).delete()
+    classroom_user_association.query.filter(classroom_user_association.classroom_id.in_(classroomIds)).delete()
+    ClassroomModel.query.filter(ClassroomModel.id.in_(classroomIds)).delete()
+    UserModel.query.filter(UserModel.id.in_(userIds)).delete()
+
+  @withCleanup(app, db, clean)
+  def run():
+    owner, educator, student, stranger = [
+      UserModel(email = f'snippet_test_{i}@example.com', username = f'snippet_test_{i}', password = '<PASSWORD>', privilege = 'Educator')
+      for i in ('owner', 'educator', 'student', 'stranger')
+    ]
+    db.session.add_all([owner, educator, student, stranger])
+    db.session.commit()
+
+    classroom = ClassroomModel(owner = owner, title = 'snippet_test', description = 'desc')
+    db.session.add(classroom)
+    db.session.commit()
+    classroom.add_educators(educator)
+    classroom.add_students(student, stranger)
+    assignment = AssignmentModel(classroom, 'snippet_test', 'desc')
+    assignment.save()
+    submission = SubmissionModel(student, assignment)
+    submission.save()
+
+    snippet = SubmissionSnippetModel(student, submission, FileStorage(io.BytesIO(b'answer'), filename = 'snippet_test.txt'))
+    key, studentId = snippet.public_key, student.id
+    assert key and snippet.iuri.endswith(key)
+    assert snippet.uri == f'/public/submission/{key}'
+
+    statements: list[str] = []
+    def count(conn, cursor, statement, *args) -> None:
+      statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+      assert SubmissionSnippetModel.can_view(studentId, key) is True
+    finally:
+      event.remove(db.engine, 'before_cursor_execute', count)
+    assert len(statements) == 1
+
+    assert SubmissionSnippetModel.can_view(owner.id, key) is True
+    assert SubmissionSnippetModel.can_view(educator.id, key) is True
+    assert SubmissionSnippetModel.can_view(stranger.id, key) is False
+    assert SubmissionSnippetModel.can_view(student.id, key[1:]) is None
+
+  run()
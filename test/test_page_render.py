@@ -39,3 +39,141 @@ def test_appRoutes(app: Flask, client: FlaskClient):
     f'\n\nLog:\n\nFailed [{len(failed)}]\n>>>>>>>>>>\n%s\n<<<<<<<<<<\n\nPassed [{len(passed)}]\n>>>>>>>>>>\n%s\n<<<<<<<<<<\n'
       % ('\n'.join(failed), '\n'.join(passed))
   )
+
+
+def test_healthCheck(app: Flask, client: FlaskClient):
+  """
+  Testing the health check reports the database, and the pool of this worker to admins only
+  """
+  from unittest import mock
+  from flask_jwt_extended import create_access_token
+  from src import db
+  from src.routes import misc
+  from src.database import UserModel
+  from src.utils.api import _HealthPoolData
+
+  response = client.get('/healthz')
+  assert response.status_code == 200
+
+  data = response.get_json()['data']
+  assert data['database'] == 'ok'
+  assert data['latency_ms'] is not None
+  assert data['pid'] is None and data['pool'] is None and data['cdn_cache'] is None
+
+  # A busy pool is not an outage
+  exhausted = _HealthPoolData(size = 1, checked_out = 1, overflow = 0, max_overflow = 0, exhausted = True)
+  with mock.patch.object(misc, '_pool_status', return_value = exhausted):
+    response = client.get('/healthz')
+  assert response.status_code == 200
+  assert response.get_json()['data']['database'] == 'exhausted'
+
+  with app.app_context():
+    admin = UserModel(
+      email = 'health_test_admin@example.com',
+      username = 'health_test_admin',
+      password = '<PASSWORD>',
+      privilege = 'Admin'
+    )
+    admin.save()
+    token = create_access_token(identity = admin)
+
+  try:
+    data = client.get('/healthz', headers = {'Authorization': f'Bearer {token}'}).get_json()['data']
+
+    # File-backed SQLite queues like Postgres, with the configured sizing
+    options = app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    assert data['pid'] is not None
+    assert data['pool']['size'] == options['pool_size']
+    assert data['pool']['max_overflow'] == options['max_overflow']
+    assert data['pool']['exhausted'] is False
+    assert data['cdn_cache']['max_bytes'] == app.config['CDN_CACHE_MAX_BYTES']
+  finally:
+    with app.app_context():
+      UserModel.query.filter(UserModel.username == 'health_test_admin').delete()
+      db.session.commit()
+
+
+def test_rangeRequests(app: Flask, client: FlaskClient):
+  """
+  Testing uploads answer byte ranges and conditional requests
+  """
+  import os
+  from datetime import datetime, timezone
+  from src.service import cdn_provider
+
+  path = os.path.join(cdn_provider.ImageLocation, 'range_test.png')
+  with open(path, 'wb') as f:
+    f.write(bytes(range(256)) * 4)
+
+  try:
+    full = client.get('/public/image/range_test.png')
+    assert full.status_code == 200 and len(full.data) == 1024
+    etag = full.headers['ETag']
+
+    partial = client.get('/public/image/range_test.png', headers = {'Range': 'bytes=256-511'})
+    assert partial.status_code == 206
+    assert partial.data == bytes(range(256))
+    assert partial.headers['Content-Range'] == 'bytes 256-511/1024'
+
+    assert client.get('/public/image/range_test.png', headers = {'If-None-Match': etag}).status_code == 304
+  finally:
+    os.remove(path)
+
+  # Same rules for files proxied from Cloudinary
+  modified = datetime(2024, 1, 1, tzinfo = timezone.utc)
+  cases = [
+    ({}, (200, None)),
+    ({'Range': 'bytes=100-'}, (206, (100, 1000))),
+    ({'Range': 'bytes=5000-'}, (416, None)),
+    ({'Range': 'bytes=0-1,5-6'}, (200, None)),
+    ({'If-None-Match': '"v1"'}, (304, None)),
+    ({'Range': 'bytes=0-9', 'If-Range': '"v1"'}, (206, (0, 10))),
+    ({'Range': 'bytes=0-9', 'If-Range': '"v0"'}, (200, None)),
+  ]
+  for headers, expected in cases:
+    with app.test_request_context('/', headers = headers):
+      assert cdn_provider.resolveRange(1000, 'v1', modified) == expected, headers
+
+
+def test_redirectServing(app: Flask, client: FlaskClient):
+  """
+  Testing redirect mode hands files off instead of sending them
+  """
+  import os
+  import cloudinary
+  from urllib.parse import urlparse, parse_qs
+  from src.service import cdn_provider
+
+  path = os.path.join(cdn_provider.ImageLocation, 'redirect_test.png')
+  with open(path, 'wb') as f:
+    f.write(b'png')
+
+  app.config.update(CDN_SERVE_MODE = 'redirect', CDN_ACCEL_REDIRECT_PREFIX = '/_uploads/')
+  try:
+    response = client.get('/public/image/redirect_test.png?download=1')
+    assert response.status_code == 200 and response.data == b''
+    assert response.headers['X-Accel-Redirect'] == '/_uploads/images/redirect_test.png'
+    assert response.headers['Content-Type'] == 'image/png'
+    assert 'attachment' in response.headers['Content-Disposition']
+
+    assert client.get('/public/image/missing.png').status_code == 404
+    assert client.get('/public/image/..%2Ftextbooks%2Fx.pdf').status_code == 404
+  finally:
+    app.config.update(CDN_SERVE_MODE = 'proxy', CDN_ACCEL_REDIRECT_PREFIX = None)
+    os.remove(path)
+
+  # Cloudinary uploads get an expiring signed URL
+  previous = cloudinary.config().cloud_name, cloudinary.config().api_key, cloudinary.config().api_secret
+  cloudinary.config(cloud_name = 'test', api_key = 'key', api_secret = 'secret')
+  try:
+    resource = {'public_id': 'textbook-uploads/abc', 'format': 'pdf', 'resource_type': 'image'}
+    with app.test_request_context('/'):
+      response = cdn_provider.signedRedirect(resource, ttl = 60)
+  finally:
+    cloudinary.config(cloud_name = previous[0], api_key = previous[1], api_secret = previous[2])
+
+  assert response.status_code == 302
+  assert response.headers['Cache-Control'] == 'no-store'
+  query = parse_qs(urlparse(response.headers['Location']).query)
+  assert query['public_id'] == ['textbook-uploads/abc'] and 'signature' in query
+  assert int(query['expires_at'][0]) > 0
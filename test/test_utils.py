@@ -90,3 +90,165 @@ def test_forceTyping():
 
   assert forcetype(None, 0.0) == 0.0
   assert forcetype(None, typing.Optional[list[int]]) == None
+
+
+def test_ttlCache():
+  import time
+  from src.utils.ext.cache import TTLCache
+
+  cache = TTLCache(ttl = 60, maxsize = 2)
+  cache.set('a', 1)
+  cache.set('b', 2)
+  assert cache.get('a') == 1
+
+  # Least recently used is evicted
+  cache.set('c', 3)
+  assert cache.get('b') is None
+  assert cache.get('a') == 1
+
+  cache.invalidate('a')
+  assert cache.get('a') is None
+
+  cache.set(('x', 1), 1)
+  cache.set(('y', 1), 2)
+  cache.invalidate_where(lambda key: key[0] == 'x')
+  assert cache.get(('x', 1)) is None
+  assert cache.get(('y', 1)) == 2
+
+  # Expiry
+  cache.configure(ttl = 0.01)
+  cache.set('d', 4)
+  cache.set('e', 5, ttl = 60)
+  time.sleep(0.02)
+  assert cache.get('d') is None
+  assert cache.get('e') == 5
+
+  stats = cache.stats()
+  assert stats.expirations == 1 and stats.evictions >= 1
+  assert stats.hits + stats.misses > 0 and 0 < stats.hit_rate < 1
+
+
+def test_cachedDecorator():
+  from src.utils.ext.cache import TTLCache, cached
+
+  calls = []
+  cache = TTLCache(ttl = 60, maxsize = 8)
+
+  @cached(cache)
+  def double(x: int) -> int:
+    calls.append(x)
+    return x * 2
+
+  assert double(2) == 4 and double(2) == 4
+  assert calls == [2]
+
+  cache.clear()
+  assert double(2) == 4
+  assert calls == [2, 2]
+  assert cache.stats().hits == 1
+
+
+def test_diskLRUCache():
+  import os
+  import stat
+  import time
+  import tempfile
+  from src.utils.ext.disk_cache import DiskLRUCache
+
+  with tempfile.TemporaryDirectory() as parent:
+    # Nothing touches the disk until the first lookup
+    directory = os.path.join(parent, 'cache')
+    cache = DiskLRUCache(directory, max_bytes = 25, max_file_bytes = 10)
+    assert not os.path.exists(directory)
+    assert cache.get('a@1') is None
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    path = cache.put('a@1', [b'aaaa', b'aaaa'])
+    assert path and open(path, 'rb').read() == b'a' * 8
+    cache.put('b@1', [b'b' * 8])
+    time.sleep(0.01)
+    assert cache.get('a@1') == path
+
+    # Least recently used is evicted once over max_bytes
+    cache.put('c@1', [b'c' * 10])
+    assert cache.get('b@1') is None
+    assert cache.get('a@1') and cache.get('c@1')
+
+    # Oversized files are rejected, by declared size or while writing
+    assert cache.put('d@1', [b'd'], size = 11) is None
+    assert cache.put('d@1', [b'd' * 6, b'd' * 6]) is None
+    assert not [i for i in os.listdir(directory) if i.endswith('.tmp')]
+
+    # A new worker picks up the files on disk
+    other = DiskLRUCache(directory, max_bytes = 25)
+    assert other.get('c@1') and len(other) == 2
+
+    cache.invalidate('c@1')
+    assert cache.get('c@1') is None and other.get('c@1') is None
+
+    stats = cache.stats()
+    assert stats.evictions == 1 and stats.rejections == 2
+    assert stats.files == 1 and stats.size_bytes == 8
+    assert 0 < stats.hit_rate < 1
+
+    # An unusable directory disables caching instead of raising
+    blocked = os.path.join(parent, 'file')
+    open(blocked, 'wb').close()
+    disabled = DiskLRUCache(blocked)
+    assert disabled.get('a@1') is None
+    assert disabled.put('a@1', [b'a']) is None
+    disabled.invalidate('a@1')
+
+
+def test_bloomFilter():
+  from src.utils.ext.bloom_filter import BloomFilter
+
+  bloom = BloomFilter(capacity = 100, items = [f'jti-{i}' for i in range(100)])
+
+  # No false negatives
+  assert all(f'jti-{i}' in bloom for i in range(100))
+
+  # False positives stay rare
+  falsePositives = sum(f'other-{i}' in bloom for i in range(1000))
+  assert falsePositives < 20
+
+  assert not bloom.is_full
+  bloom.add('overflow')
+  assert bloom.is_full
+
+
+def test_passwordExecutor():
+  import threading
+  from src.utils import passwords
+
+  try:
+    for mode in ('sync', 'thread', 'process'):
+      passwords.configure(mode = mode, rounds = 4, workers = 1, queue_size = 0)
+      hashed = passwords.hash_password('password')
+      assert hashed.startswith(b'$2b$04$')
+      assert passwords.compare_password('password', hashed)
+      assert not passwords.compare_password('wrong', hashed)
+
+    # Full queue is rejected instead of waiting
+    passwords.configure(mode = 'thread', rounds = 4, workers = 1, queue_size = 0)
+    started, release = threading.Event(), threading.Event()
+
+    def block() -> None:
+      started.set()
+      release.wait(5)
+
+    worker = threading.Thread(target = passwords.executor.run, args = [block])
+    worker.start()
+    started.wait(5)
+
+    try:
+      passwords.hash_password('password')
+      assert False, 'Expected PasswordHasherBusy'
+    except passwords.PasswordHasherBusy as e:
+      assert e.code == 503
+    finally:
+      release.set()
+      worker.join()
+
+  finally:
+    passwords.configure(mode = 'thread')